@@ -1,87 +1,85 @@
-import os
-from flask import Flask, request, jsonify, send_from_directory
-from flask_cors import CORS
-import pandas as pd
-import time
-from detection_engine import MoneyMulingDetector
-
-# VERCEL FIX: Use absolute path logic
-# Vercel puts your project in /var/task
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-FRONTEND_DIR = os.path.join(BASE_DIR, 'frontend')
-
-app = Flask(__name__, static_folder=FRONTEND_DIR, static_url_path='')
-CORS(app)
-
-@app.route('/')
-def serve_index():
-    return send_from_directory(app.static_folder, 'index.html')
-
-@app.route('/api/analyze', methods=['POST'])
-def analyze_transactions():
-    try:
-        if 'file' not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
-        
-        file = request.files['file']
-        df = pd.read_csv(file)
-        
-        # Simple validation
-        required = ['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp']
-        df.columns = [c.strip() for c in df.columns]
-        
-        detector = MoneyMulingDetector(df)
-        results = detector.analyze()
-        results['summary']['processing_time_seconds'] = 0.5 # Placeholder
-        
-        return jsonify(results)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/<path:path>')
-def serve_static(path):
-    # Try to serve the file from frontend folder
-    if os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
-    # Fallback to index for SPA routes
-    return send_from_directory(app.static_folder, 'index.html')
-
-# IMPORTANT: Remove app.run() for Vercel
-# --- Keep your /api/analyze and other logic below this line ---
 """
 Money Muling Detection Engine - Flask Backend
 RIFT 2026 Hackathon - Graph Theory Track
 """
 
-from flask import Flask, request, jsonify, send_from_directory
-from flask_cors import CORS
-CORS(app, resources={r"/api/*": {"origins": "*"}})
-import pandas as pd
 import os
 import time
 import json
+import uuid
+import io
+import cProfile
+import pstats
+import pandas as pd
+from flask import Flask, request, jsonify, send_from_directory
+from flask_cors import CORS
 from werkzeug.utils import secure_filename
-from detection_engine import MoneyMulingDetector
-import google.generativeai as genai
+from detection_engine import (ANALYSIS_STAGES, MoneyMulingDetector, analysis_cache_key,
+                              resolve_parameters, snapshot_cache_key)
+from graph_analyzer import GraphAnalyzer
+from graph_view import MAX_HOPS, NEIGHBORHOOD_HOPS, GraphView, GraphViewCache, suspicious_from_results
+from insights import InsightService, provider_from_env
+from ingestion import (INPUT_EXTENSIONS, REQUIRED_COLUMNS, InputFormatError, MissingColumnsError,
+                       encode_frame, parse_time_range, read_input)
+from job_queue import JobQueue, QueueFullError
+from metrics import StageRecorder, registry as metrics_registry
+from result_cache import ResultCache
+from serialization import MIN_COMPRESS_BYTES, columnar, compress, dumps, encodings
+from sessions import SessionStore, check_incremental_parameters
+from snapshots import SnapshotError, SnapshotStore
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
+# Absolute paths, so the app works from any working directory (gunicorn, Vercel)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRONTEND_DIR = os.path.join(BASE_DIR, 'frontend')
 
-app = Flask(__name__, static_folder='../frontend', static_url_path='')
-CORS(app)
+app = Flask(__name__, static_folder=FRONTEND_DIR, static_url_path='')
+CORS(app, resources={r"/api/*": {"origins": "*"}})
 
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'csv'}
+# CSV, Parquet and Arrow IPC/Feather (see ingestion.INPUT_FORMATS)
+ALLOWED_EXTENSIONS = {extension.lstrip('.') for extension in INPUT_EXTENSIONS}
 
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+# Uploads are parsed in chunks, so the cap is on disk spooling, not memory
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 4096)) * 1024 * 1024
+app.config['INGEST_CHUNK_ROWS'] = int(os.environ.get('INGEST_CHUNK_ROWS', 500_000))
+
+# Process-pool size for cycle/shell search (1 = serial, 0 = all CPUs)
+app.config['ANALYSIS_WORKERS'] = int(os.environ.get('ANALYSIS_WORKERS', 1))
+
+# Allow /api/analyze?profile=1 to attach a cProfile dump
+app.config['ENABLE_PROFILING'] = os.environ.get('ENABLE_PROFILING', '').lower() in ('1', 'true', 'yes')
+PROFILE_TOP_FUNCTIONS = 40
+
+# Append-only analysis sessions kept in this process
+sessions = SessionStore()
+
+# Results keyed by upload hash; RESULT_CACHE_DIR adds a disk tier that survives restarts
+result_cache = ResultCache(max_bytes=int(os.environ.get('RESULT_CACHE_MB', 256)) * 1024 * 1024,
+                           directory=os.environ.get('RESULT_CACHE_DIR') or None)
+
+# Background analyses for /api/jobs (concurrent jobs, and queued + running cap)
+jobs = JobQueue(max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+                max_queued=int(os.environ.get('JOB_QUEUE_DEPTH', 16)))
+JOB_STAGES = ['cache_lookup', 'parse'] + ANALYSIS_STAGES
+
+# Memory-mapped graph snapshots, re-analyzed with new parameters without re-parsing
+snapshots = SnapshotStore(os.environ.get('SNAPSHOT_DIR', 'snapshots'))
+
+# Graphs of recent analyses, for /api/graph/<account> neighborhood expansion
+graph_views = GraphViewCache(int(os.environ.get('GRAPH_VIEW_CACHE', 4)))
+
+# AI insights, written in the background and memoized (INSIGHT_PROVIDER, see
+# insights.provider_from_env); each provider call is cut off after the timeout
+insights = InsightService(provider_from_env(),
+                          timeout_seconds=float(os.environ.get('INSIGHT_TIMEOUT_SECONDS', 20)))
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -96,88 +94,505 @@ def serve_static(path):
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "message": "Money Muling Detection Engine is running"})
+    return jsonify({
+        "status": "healthy",
+        "message": "Money Muling Detection Engine is running",
+        "result_cache": result_cache.stats(),
+        "jobs": jobs.stats(),
+        "insights": insights.stats()
+    })
 
-@app.route('/api/analyze', methods=['POST'])
-def analyze_transactions():
-    start_time = time.time()
-    
-    # Check if file is present
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Stage histograms and counters (Prometheus text; ?format=json for JSON)"""
+    if request.args.get('format') == 'json':
+        return jsonify({"stages": metrics_registry.as_dict(),
+                        "result_cache": result_cache.stats(),
+                        "jobs": jobs.stats(),
+                        "insights": insights.stats()})
+    cache = result_cache.stats()
+    gauges = {
+        'result_cache_hits': cache['hits'],
+        'result_cache_misses': cache['misses'],
+        'result_cache_bytes': cache['bytes'],
+        'jobs_active': sum(jobs.stats()['jobs'].get(s, 0) for s in ('queued', 'running'))
+    }
+    return app.response_class(metrics_registry.render_prometheus(gauges),
+                              mimetype='text/plain; version=0.0.4')
+
+def input_error_message(e):
+    """User-facing message for a bad upload, or None for other errors"""
+    if isinstance(e, (MissingColumnsError, InputFormatError)):
+        return str(e)
+    if isinstance(e, pd.errors.EmptyDataError):
+        return "The uploaded file is empty"
+    if isinstance(e, pd.errors.ParserError):
+        return f"File format error: {str(e)}. Please ensure the file is a comma-separated CSV, Parquet or Arrow file with the required columns."
+    return None
+
+def get_upload():
+    """The uploaded file, as (file, None) or (None, error response)"""
     if 'file' not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
+        return None, (jsonify({"error": "No file uploaded"}), 400)
     
     file = request.files['file']
     
     if file.filename == '':
-        return jsonify({"error": "No file selected"}), 400
+        return None, (jsonify({"error": "No file selected"}), 400)
     
     if not allowed_file(file.filename):
-        return jsonify({"error": "Invalid file type. Please upload a CSV file"}), 400
+        return None, (jsonify({"error": "Invalid file type. Please upload a CSV, Parquet or Arrow file"}), 400)
+    
+    return file, None
+
+def upload_time_range():
+    """
+    ?start=&end= (timestamps or epoch seconds, end exclusive) as a time
+    range, or None; raises ValueError for bad values
+    """
+    return parse_time_range(request.args.get('start'), request.args.get('end'))
+
+def read_upload(required=True):
+    """
+    Parse the uploaded file into encoded transactions
+    Returns (transactions, None) or (None, error response)
+    """
+    if not required and 'file' not in request.files:
+        return encode_frame(pd.DataFrame(columns=REQUIRED_COLUMNS)), None
+    
+    file, error = get_upload()
+    if error:
+        return None, error
     
     try:
-        # Read CSV file with automatic delimiter detection and skip malformed rows
-        df = pd.read_csv(file, sep=None, engine='python', on_bad_lines='skip', encoding_errors='ignore')
-        
-        # Validate required columns
-        required_columns = ['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            return jsonify({
-                "error": f"Missing required columns: {', '.join(missing_columns)}"
-            }), 400
-        
-        # Initialize detector and run analysis
-        detector = MoneyMulingDetector(df)
-        results = detector.analyze()
-        
-        # Calculate processing time
-        processing_time = round(time.time() - start_time, 2)
-        results['summary']['processing_time_seconds'] = processing_time
+        # CSV is streamed in chunks (delimiter sniffed once, malformed rows skipped),
+        # Parquet/Arrow read column by column
+        return read_input(file.stream, file.filename, chunk_rows=app.config['INGEST_CHUNK_ROWS'],
+                          time_range=upload_time_range()), None
+    except (MissingColumnsError, InputFormatError, pd.errors.EmptyDataError,
+            pd.errors.ParserError) as e:
+        return None, (jsonify({"error": input_error_message(e)}), 400)
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+
+def run_analysis(stream, start_time, progress=None, recorder=None, use_cache=True,
+                 filename='upload.csv', time_range=None):
+    """
+    Full pipeline for one upload stream: cache lookup, parse, detect, then
+    request the AI insight (written in the background, see request_insight)
+    The format comes from filename; time_range keeps only rows in
+    [start, end). Each stage is timed by the recorder; progress(stage) is
+    called as each stage starts
+    """
+    if recorder is None:
+        recorder = StageRecorder(progress)
+    
+    # Identical uploads reuse the stored results
+    with recorder.stage('cache_lookup') as counts:
+        cache_key = analysis_cache_key(stream, time_range=time_range)
+        cached = result_cache.get(cache_key) if use_cache else None
+        counts['hit'] = int(cached is not None)
+    if cached is not None:
+        # The graph view may have been evicted; rebuild it from the upload (no detection)
+        # so /api/graph/<account>?analysis= keeps working for cached analyses
+        if graph_views.get(cache_key) is None:
+            with recorder.stage('graph_view') as counts:
+                transactions = read_input(stream, filename,
+                                          chunk_rows=app.config['INGEST_CHUNK_ROWS'],
+                                          time_range=time_range)
+                view = GraphView(GraphAnalyzer(transactions), suspicious_from_results(cached))
+                graph_views.put(cache_key, view)
+                counts.update(nodes=view.num_nodes, edges=view.num_edges)
+        summary = cached['summary']
+        summary['computed_processing_time_seconds'] = summary['processing_time_seconds']
+        summary['computed_timings'] = summary.get('timings', [])
+        summary['timings'] = recorder.stages
+        summary['processing_time_seconds'] = round(time.time() - start_time, 2)
+        summary['cache_hit'] = True
+        request_insight(cached)
+        return cached
+    
+    with recorder.stage('parse') as counts:
+        transactions = read_input(stream, filename, chunk_rows=app.config['INGEST_CHUNK_ROWS'],
+                                  time_range=time_range)
+        counts['rows'] = len(transactions)
+        if transactions.row_groups is not None:
+            counts['row_groups_read'], counts['row_groups'] = transactions.row_groups
+    
+    # Initialize detector and run analysis
+    detector = MoneyMulingDetector(transactions, workers=app.config['ANALYSIS_WORKERS'],
+                                   recorder=recorder)
+    results = detector.analyze()
+    results['summary']['analysis_id'] = cache_key
+    graph_views.put(cache_key, detector.graph_view)
+    
+    request_insight(results)
+    
+    # Calculate processing time
+    processing_time = round(time.time() - start_time, 2)
+    results['summary']['processing_time_seconds'] = processing_time
+    results['summary']['cache_hit'] = False
+    
+    result_cache.put(cache_key, results)
+    return results
+
+def request_insight(results):
+    """
+    Start (or reuse the memoized) AI insight for results with fraud rings;
+    its id goes in summary.ai_insight_id, the text is served by /api/insights/<id>
+    """
+    if results['fraud_rings']:
+        insight_id = insights.request(results['fraud_rings'], results['summary'])
+        if insight_id:
+            results['summary']['ai_insight_id'] = insight_id
+
+def profile_call(fn, *args, **kwargs):
+    """Run fn under cProfile; returns (result, top functions by cumulative time)"""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args, **kwargs)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    return result, out.getvalue()
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze_transactions():
+    start_time = time.time()
+    
+    file, error = get_upload()
+    if error:
+        return error
+    try:
+        time_range = upload_time_range()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    recorder = StageRecorder()
+    try:
+        # ?profile=1 attaches a cProfile dump (only when ENABLE_PROFILING is set)
+        if app.config['ENABLE_PROFILING'] and request.args.get('profile') == '1':
+            results, profile = profile_call(run_analysis, file.stream, start_time,
+                                            recorder=recorder, use_cache=False,
+                                            filename=file.filename, time_range=time_range)
+            results['profile'] = profile
+        else:
+            results = run_analysis(file.stream, start_time, recorder=recorder,
+                                   filename=file.filename, time_range=time_range)
+    except Exception as e:
+        message = input_error_message(e)
+        if message:
+            return jsonify({"error": message}), 400
+        return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
+    
+    return analysis_response(results, recorder)
+
+def json_response(payload, status=200, recorder=None):
+    """
+    JSON via the fast encoder, brotli/gzip-compressed when the client accepts it
+    Serialization and compression are timed too; they can only be reported
+    in the Server-Timing header
+    """
+    if recorder is None:
+        recorder = StageRecorder()
+    with recorder.stage('serialize') as counts:
+        body = dumps(payload)
+        counts['bytes'] = len(body)
+    
+    encoding = request.accept_encodings.best_match(encodings())
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        with recorder.stage('compress') as counts:
+            body = compress(body, encoding)
+            counts['bytes'] = len(body)
+    else:
+        encoding = None
+    
+    response = app.response_class(body, status=status, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Server-Timing'] = recorder.server_timing()
+    return response
+
+def analysis_response(results, recorder=None):
+    """Analysis results; ?format=columnar sends parallel arrays instead of row objects"""
+    if request.args.get('format') == 'columnar':
+        results = columnar(results)
+    return json_response(results, recorder=recorder)
+
+def run_job(job, path, time_range=None):
+    """Background job: analyze a saved upload, then delete it"""
+    try:
+        with open(path, 'rb') as stream:
+            return run_analysis(stream, job.started_at, progress=job.advance, filename=path,
+                                time_range=time_range)
+    except Exception as e:
+        message = input_error_message(e)
+        if message:
+            raise ValueError(message) from e
+        raise
+    finally:
+        os.remove(path)
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_analysis_job():
+    """Queue an analysis and return its job id immediately (poll /api/jobs/<id>)"""
+    file, error = get_upload()
+    if error:
+        return error
+    try:
+        time_range = upload_time_range()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    path = os.path.join(app.config['UPLOAD_FOLDER'], f'{uuid.uuid4().hex}_{secure_filename(file.filename)}')
+    file.save(path)
+    try:
+        job = jobs.submit(run_job, path, time_range, stages=JOB_STAGES)
+    except QueueFullError as e:
+        os.remove(path)
+        return jsonify({"error": str(e)}), 503, {'Retry-After': '30'}
+    
+    return jsonify({
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.job_id}"
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Job status with per-stage progress; includes the result once done"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    include_result = request.args.get('result', '1') != '0'
+    payload = job.to_dict(include_result=include_result)
+    if include_result and payload.get('result') and request.args.get('format') == 'columnar':
+        payload['result'] = columnar(payload['result'])
+    return json_response(payload)
+
+@app.route('/api/insights/<insight_id>', methods=['GET'])
+def get_insight(insight_id):
+    """
+    AI insight of an analysis (summary.ai_insight_id); status is queued,
+    running, done (with the text), failed or timeout
+    """
+    insight = insights.get(insight_id)
+    if insight is None:
+        return jsonify({"error": "Unknown or expired insight"}), 404
+    return jsonify(insight.to_dict())
+
+@app.route('/api/sessions', methods=['POST'])
+def create_session():
+    """
+    Start an append-only analysis session, optionally with a first uploaded
+    batch; detection parameters (see DEFAULT_PARAMETERS) come from the query string
+    """
+    start_time = time.time()
+    
+    overrides = {name: value for name, value in request.args.items()
+                 if name not in ('start', 'end')}
+    try:
+        parameters = resolve_parameters(overrides)
+        check_incremental_parameters(parameters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        transactions, error = read_upload(required=False)
+        if error:
+            return error
         
-        # Optional: Add AI insights for the fraud rings
-        if results['fraud_rings'] and os.environ.get("GOOGLE_API_KEY"):
-            try:
-                ai_insight = get_ai_explanation(results['fraud_rings'], results['summary'])
-                results['summary']['ai_insight'] = ai_insight
-            except Exception as e:
-                print(f"AI insight failed: {e}")
+        session = sessions.create(transactions, parameters)
+        with session.lock:
+            results = session.results()
+        results['summary']['processing_time_seconds'] = round(time.time() - start_time, 2)
+        return json_response(results, status=201)
+    
+    except Exception as e:
+        return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
+
+@app.route('/api/sessions/<session_id>/transactions', methods=['POST'])
+def append_session_transactions(session_id):
+    """Append an uploaded batch to a session and return only what changed"""
+    start_time = time.time()
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown or expired session"}), 404
+    
+    try:
+        transactions, error = read_upload()
+        if error:
+            return error
         
-        return jsonify(results)
+        with session.lock:
+            delta = session.append(transactions)
+        delta['summary']['processing_time_seconds'] = round(time.time() - start_time, 2)
+        return json_response(delta)
     
-    except pd.errors.EmptyDataError:
-        return jsonify({"error": "The uploaded CSV file is empty"}), 400
-    except pd.errors.ParserError as e:
-        return jsonify({"error": f"CSV Format Error: {str(e)}. Please ensure the file is comma-separated and has the correct columns."}), 400
     except Exception as e:
         return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
 
-@app.route('/api/sample-data', methods=['GET'])
-def get_sample_data():
-    """Generate sample transaction data for testing"""
-    sample_data = generate_sample_data()
-    return jsonify(sample_data)
+@app.route('/api/sessions/<session_id>', methods=['GET'])
+def get_session_results(session_id):
+    """Current merged results of a session"""
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown or expired session"}), 404
+    
+    with session.lock:
+        return analysis_response(session.results())
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    if not sessions.delete(session_id):
+        return jsonify({"error": "Unknown or expired session"}), 404
+    return jsonify({"deleted": session_id})
+
+@app.route('/api/snapshots', methods=['POST'])
+def create_snapshot():
+    """Build the graph for an uploaded file once and store it as a snapshot"""
+    start_time = time.time()
+    
+    try:
+        transactions, error = read_upload()
+        if error:
+            return error
+        
+        meta = snapshots.create(GraphAnalyzer(transactions, backend='csr'))
+        meta['processing_time_seconds'] = round(time.time() - start_time, 2)
+        return jsonify(meta), 201
+    
+    except Exception as e:
+        return jsonify({"error": f"Snapshot failed: {str(e)}"}), 500
+
+@app.route('/api/snapshots', methods=['GET'])
+def list_snapshots():
+    return jsonify({"snapshots": snapshots.list()})
+
+@app.route('/api/snapshots/<snapshot_id>', methods=['GET'])
+def get_snapshot(snapshot_id):
+    try:
+        return jsonify(snapshots.info(snapshot_id))
+    except (KeyError, SnapshotError):
+        return jsonify({"error": "Unknown snapshot"}), 404
+
+@app.route('/api/snapshots/<snapshot_id>', methods=['DELETE'])
+def delete_snapshot(snapshot_id):
+    try:
+        deleted = snapshots.delete(snapshot_id)
+    except SnapshotError:
+        deleted = False
+    if not deleted:
+        return jsonify({"error": "Unknown snapshot"}), 404
+    return jsonify({"deleted": snapshot_id})
+
+def run_snapshot_analysis(snapshot_id, parameters, start_time, recorder):
+    """Analyze a stored snapshot with the given parameters (results are cached)"""
+    snapshots.info(snapshot_id)  # deleted snapshots must not be served from the cache
+    with recorder.stage('cache_lookup') as counts:
+        cache_key = snapshot_cache_key(snapshot_id, parameters)
+        cached = result_cache.get(cache_key)
+        counts['hit'] = int(cached is not None)
+    if cached is not None:
+        # An evicted graph view is reopened from the snapshot on demand (graph_view_for)
+        summary = cached['summary']
+        summary['computed_processing_time_seconds'] = summary['processing_time_seconds']
+        summary['computed_timings'] = summary.get('timings', [])
+        summary['timings'] = recorder.stages
+        summary['processing_time_seconds'] = round(time.time() - start_time, 2)
+        summary['cache_hit'] = True
+        return cached
+    
+    with recorder.stage('snapshot_open') as counts:
+        analyzer, meta = snapshots.open(snapshot_id)
+        counts['bytes'] = meta['bytes']
+    detector = MoneyMulingDetector(None, workers=app.config['ANALYSIS_WORKERS'],
+                                   recorder=recorder, parameters=parameters, analyzer=analyzer)
+    results = detector.analyze()
+    results['summary']['snapshot_id'] = snapshot_id
+    results['summary']['analysis_id'] = cache_key
+    graph_views.put(cache_key, detector.graph_view)
+    results['summary']['processing_time_seconds'] = round(time.time() - start_time, 2)
+    results['summary']['cache_hit'] = False
+    
+    result_cache.put(cache_key, results)
+    return results
 
-def get_ai_explanation(rings, summary):
-    """Use Gemini AI to explain the detected fraud patterns"""
-    model = genai.GenerativeModel('gemini-1.5-flash')
+@app.route('/api/snapshots/<snapshot_id>/analyze', methods=['POST'])
+def analyze_snapshot(snapshot_id):
+    """
+    Re-run detection on a snapshot; parameters (see DEFAULT_PARAMETERS, e.g.
+    threshold or payroll_max_variation) come from the query string or a JSON body
+    """
+    start_time = time.time()
     
-    # Prepare data for the prompt
-    patterns = set(r['pattern_type'] for r in rings)
-    ring_count = len(rings)
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "Parameters must be a JSON object"}), 400
+    try:
+        parameters = resolve_parameters({**request.args.to_dict(), **body})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    prompt = f"""
-    As a Financial Forensics Expert, analyze these money muling detection results:
-    - Total rings detected: {ring_count}
-    - Pattern types found: {', '.join(patterns)}
-    - Total accounts analyzed: {summary['total_accounts_analyzed']}
-    - Suspicious accounts flagged: {summary['suspicious_accounts_flagged']}
+    recorder = StageRecorder()
+    try:
+        results = run_snapshot_analysis(snapshot_id, parameters, start_time, recorder)
+    except (KeyError, SnapshotError):
+        return jsonify({"error": "Unknown snapshot"}), 404
+    except Exception as e:
+        return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
     
-    Provide a professional, brief (2-3 sentence) forensic summary of the risk levels and what these specific patterns (like {', '.join(patterns)}) usually indicate in a real-world money laundering context.
+    return analysis_response(results, recorder)
+
+def graph_view_for(analysis_id):
+    """GraphView of a recent analysis; snapshot analyses are reopened if evicted"""
+    view = graph_views.get(analysis_id)
+    if view is not None:
+        return view
+    cached = result_cache.get(analysis_id)
+    snapshot_id = cached and cached['summary'].get('snapshot_id')
+    if not snapshot_id:
+        raise KeyError(analysis_id)
+    analyzer, _ = snapshots.open(snapshot_id)
+    view = GraphView(analyzer, suspicious_from_results(cached))
+    graph_views.put(analysis_id, view)
+    return view
+
+@app.route('/api/graph/<account>', methods=['GET'])
+def get_account_neighborhood(account):
     """
+    Accounts within `hops` of one account, for expanding the reduced graph;
+    ?analysis=<summary.analysis_id> or ?session=<session id>
+    """
+    try:
+        hops = min(int(request.args.get('hops', NEIGHBORHOOD_HOPS)), MAX_HOPS)
+    except ValueError:
+        return jsonify({"error": "hops must be an integer"}), 400
+    if hops < 0:
+        return jsonify({"error": "hops must be an integer"}), 400
+    
+    session_id = request.args.get('session')
+    if session_id:
+        session = sessions.get(session_id)
+        if session is None:
+            return jsonify({"error": "Unknown or expired session"}), 404
+        with session.lock:
+            view = GraphView(session.detector.analyzer, session.detector.suspicious_accounts)
+    else:
+        try:
+            view = graph_view_for(request.args.get('analysis', ''))
+        except (KeyError, SnapshotError):
+            return jsonify({"error": "Unknown or expired analysis, please re-run it"}), 404
     
-    response = model.generate_content(prompt)
-    return response.text
+    try:
+        return json_response(view.neighborhood(account, hops=hops))
+    except KeyError:
+        return jsonify({"error": f"Unknown account: {account}"}), 404
+
+@app.route('/api/sample-data', methods=['GET'])
+def get_sample_data():
+    """Generate sample transaction data for testing"""
+    sample_data = generate_sample_data()
+    return jsonify(sample_data)
 
 def generate_sample_data():
     """Generate sample CSV content with known fraud patterns"""
@@ -255,4 +670,6 @@ def generate_sample_data():
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # Development server; production runs gunicorn -c gunicorn.conf.py app:app
+    debug = os.environ.get('FLASK_DEBUG', '1').lower() in ('1', 'true', 'yes')
+    app.run(host='0.0.0.0', port=port, debug=debug)
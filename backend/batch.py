@@ -0,0 +1,331 @@
+"""
+Offline Batch Analysis for Money Muling Detection
+Runs MoneyMulingDetector over many transaction files (CSV, Parquet or
+Arrow IPC/Feather) from the command line, without the web server or the
+Gemini client. --start/--end analyze only a time slice, which skips
+Parquet row groups outside it. Files are analyzed
+independently across a process pool, and results are written as JSON
+Lines (one record per file) or Parquet (one row per flagged account).
+With --merge, the files are parsed in parallel and their encoded columns
+combined into one graph, so rings that cross files (branches) are found;
+each ring then lists the files its members appear in.
+
+Usage (from the backend directory):
+    python batch.py 'exports/*.csv' --workers 8 --output results.jsonl
+    python batch.py exports/ --merge --output merged.parquet --summary summary.json
+    python batch.py 'exports/*.parquet' --start 2024-03-01 --end 2024-04-01 -o march.jsonl
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from detection_engine import MoneyMulingDetector, resolve_parameters
+from ingestion import (INPUT_EXTENSIONS, InputFormatError, MissingColumnsError,
+                       TransactionColumns, parse_time_range, read_input)
+from parallel_analysis import resolve_workers
+from serialization import dumps
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+OUTPUT_FORMATS = ('jsonl', 'parquet')
+
+# Errors that mean a bad input file: missing columns, unknown format, empty or
+# malformed CSV, undecodable text, unparseable amounts (all ValueError), or I/O
+INPUT_ERRORS = (MissingColumnsError, InputFormatError, ValueError, OSError)
+
+
+def _failed(path, error, prefix=''):
+    """Record of a file that could not be analyzed; the batch carries on without it"""
+    return {'file': path, 'error': f'{prefix}{type(error).__name__}: {error}'}
+
+
+def expand_inputs(patterns):
+    """Input files from file paths, directories and glob patterns (sorted, unique)"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(os.path.join(pattern, name) for name in os.listdir(pattern)
+                         if name.lower().endswith(INPUT_EXTENSIONS))
+        else:
+            # A path that matches nothing is kept, so it is reported as failed
+            paths.extend(path for path in glob.glob(pattern) if os.path.isfile(path))
+            if not glob.has_magic(pattern) and not os.path.exists(pattern):
+                paths.append(pattern)
+    return sorted(set(paths))
+
+
+def _file_record(path, started, parsed, transactions):
+    return {
+        'file': path,
+        'bytes': os.path.getsize(path),
+        'rows': len(transactions),
+        # (read, total) Parquet row groups; fewer are read with --start/--end
+        'row_groups': transactions.row_groups,
+        'parse_seconds': round(parsed - started, 3),
+        'error': None
+    }
+
+
+def analyze_file(path, backend='networkx', parameters=None, time_range=None):
+    """
+    Analyze one file; returns its record with the results (graph_data dropped)
+    Errors are returned as a failed record, never raised into the pool,
+    where they would end the whole batch
+    """
+    started = time.perf_counter()
+    try:
+        transactions = read_input(path, time_range=time_range)
+    except INPUT_ERRORS as e:
+        return _failed(path, e)
+    parsed = time.perf_counter()
+
+    try:
+        results = MoneyMulingDetector(transactions, backend=backend,
+                                      parameters=parameters).analyze()
+    except Exception as e:
+        return _failed(path, e, 'Analysis failed: ')
+    del results['graph_data']
+    finished = time.perf_counter()
+    record = _file_record(path, started, parsed, transactions)
+    record.update(analyze_seconds=round(finished - parsed, 3),
+                  seconds=round(finished - started, 3), **results)
+    return record
+
+
+def parse_file(path, time_range=None):
+    """Parse one file for a merged analysis; returns (record, TransactionColumns or None)"""
+    started = time.perf_counter()
+    try:
+        transactions = read_input(path, time_range=time_range)
+    except INPUT_ERRORS as e:
+        return _failed(path, e), None
+    record = _file_record(path, started, time.perf_counter(), transactions)
+    record['seconds'] = record['parse_seconds']
+    return record, transactions
+
+
+def analyze_merged(paths, executor, workers, backend='networkx', parameters=None,
+                   time_range=None):
+    """
+    One analysis over all files: parse them across the pool, merge the
+    encoded columns into one graph and run detection on it
+    Returns (merged record, per-file records)
+    """
+    started = time.perf_counter()
+    merged = TransactionColumns(amount_dtype=np.float32)
+    files = []
+    sources = []
+    for record, transactions in executor.map(partial(parse_file, time_range=time_range), paths):
+        files.append(record)
+        if transactions is not None:
+            merged.add_columns(transactions)
+            sources.append((record['file'], transactions.node_ids))
+    merged.finish()
+    parsed = time.perf_counter()
+
+    results = MoneyMulingDetector(merged, backend=backend, workers=workers,
+                                  parameters=parameters).analyze()
+    del results['graph_data']
+
+    # Files each ring's members appear in
+    flagged = np.array([acc['account_id'] for acc in results['suspicious_accounts']],
+                       dtype=object)
+    account_files = {}
+    for path, node_ids in sources:
+        for account in flagged[pd.Index(node_ids).get_indexer(flagged) >= 0].tolist():
+            account_files.setdefault(account, []).append(path)
+    for ring in results['fraud_rings']:
+        ring['source_files'] = sorted({path for account in ring['member_accounts']
+                                       for path in account_files.get(account, ())})
+
+    finished = time.perf_counter()
+    record = {
+        'file': 'merged',
+        'files': len(sources),
+        'bytes': sum(item.get('bytes', 0) for item in files),
+        'rows': len(merged),
+        'parse_seconds': round(parsed - started, 3),
+        'analyze_seconds': round(finished - parsed, 3),
+        'seconds': round(finished - started, 3),
+        'error': None,
+        **results
+    }
+    return record, files
+
+
+def account_rows(record):
+    """Flat rows (one per flagged account) of a file record, for Parquet"""
+    rings = {ring['ring_id']: ring for ring in record.get('fraud_rings', ())}
+    rows = []
+    for account in record.get('suspicious_accounts', ()):
+        ring = rings.get(account['ring_id'], {})
+        rows.append({
+            'file': record['file'],
+            'account_id': str(account['account_id']),
+            'suspicion_score': account['suspicion_score'],
+            'detected_patterns': account['detected_patterns'],
+            'ring_id': account['ring_id'],
+            'pattern_type': ring.get('pattern_type'),
+            'ring_risk_score': ring.get('risk_score'),
+            'source_files': ring.get('source_files', [record['file']])
+        })
+    return rows
+
+
+class ResultWriter:
+    """Writes file records as JSON Lines as they arrive, or Parquet at close"""
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self._rows = []
+        self._out = open(path, 'wb') if output_format == 'jsonl' else None
+
+    def write(self, record):
+        if self._out is not None:
+            self._out.write(dumps(record) + b'\n')
+        else:
+            self._rows.extend(account_rows(record))
+
+    def close(self):
+        if self._out is not None:
+            self._out.close()
+            return
+        columns = ['file', 'account_id', 'suspicion_score', 'detected_patterns', 'ring_id',
+                   'pattern_type', 'ring_risk_score', 'source_files']
+        pd.DataFrame(self._rows, columns=columns).to_parquet(self.path, engine='pyarrow',
+                                                             index=False)
+
+
+def file_summary(record):
+    """Timing and throughput of one record (no results)"""
+    summary = {key: record.get(key) for key in ('file', 'bytes', 'rows', 'row_groups',
+                                                'parse_seconds', 'analyze_seconds', 'seconds',
+                                                'error')}
+    if record.get('error') is None:
+        summary['rows_per_second'] = round(record['rows'] / max(record['seconds'], 1e-9))
+    if 'summary' in record:
+        summary['fraud_rings'] = record['summary']['fraud_rings_detected']
+        summary['suspicious_accounts'] = record['summary']['suspicious_accounts_flagged']
+    return summary
+
+
+def run_batch(paths, output, output_format='jsonl', workers=0, merge=False,
+              backend='networkx', parameters=None, time_range=None):
+    """Analyze files (separately or merged) and write the results; returns the batch summary"""
+    workers = resolve_workers(workers)
+    started = time.perf_counter()
+    writer = ResultWriter(output, output_format)
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, max(1, len(paths)))) as executor:
+            if merge:
+                record, files = analyze_merged(paths, executor, workers, backend, parameters,
+                                               time_range)
+                writer.write(record)
+                files = [file_summary(file_record) for file_record in files]
+                merged = file_summary(record)
+            else:
+                files = []
+                analyze = partial(analyze_file, backend=backend, parameters=parameters,
+                                  time_range=time_range)
+                for record in executor.map(analyze, paths):
+                    if record.get('error') is None:
+                        writer.write(record)
+                    files.append(file_summary(record))
+                merged = None
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    rows = sum(record.get('rows') or 0 for record in files)
+    summary = {
+        'files': len(paths),
+        'failed': sum(record.get('error') is not None for record in files),
+        'rows': rows,
+        'bytes': sum(record.get('bytes') or 0 for record in files),
+        'workers': workers,
+        'merge': merge,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / max(elapsed, 1e-9)),
+        'output': output,
+        'per_file': files
+    }
+    if merged is not None:
+        summary['merged'] = merged
+    return summary
+
+
+def print_summary(summary, out=sys.stderr):
+    print(f'{"file":40} {"rows":>10} {"parse s":>8} {"total s":>8} {"rows/s":>10} '
+          f'{"rings":>6}', file=out)
+    for record in summary['per_file']:
+        if record['error']:
+            print(f'{record["file"][-40:]:40} error: {record["error"]}', file=out)
+            continue
+        print(f'{record["file"][-40:]:40} {record["rows"]:10,} {record["parse_seconds"]:8.2f} '
+              f'{record["seconds"] or 0:8.2f} {record.get("rows_per_second", 0):10,} '
+              f'{record.get("fraud_rings", "-"):>6}', file=out)
+    if 'merged' in summary:
+        merged = summary['merged']
+        print(f'merged graph: {merged["rows"]:,} rows, {merged["fraud_rings"]} rings, '
+              f'analysis {merged["analyze_seconds"]:.2f}s', file=out)
+    print(f'{summary["files"]} files ({summary["failed"]} failed), {summary["rows"]:,} rows '
+          f'in {summary["seconds"]:.2f}s with {summary["workers"]} workers: '
+          f'{summary["rows_per_second"]:,} rows/s -> {summary["output"]}', file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='Files, directories or glob patterns')
+    parser.add_argument('--output', '-o', required=True, help='Results file')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS,
+                        help='Output format (default: from the output extension, else jsonl)')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                        help='Worker processes (0 = all CPUs)')
+    parser.add_argument('--backend', choices=('networkx', 'csr'), default='networkx')
+    parser.add_argument('--merge', action='store_true',
+                        help='Analyze all files as one combined graph')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE',
+                        help='Detection parameter override (see DEFAULT_PARAMETERS)')
+    parser.add_argument('--start', help='Only transactions at or after this timestamp')
+    parser.add_argument('--end', help='Only transactions before this timestamp')
+    parser.add_argument('--summary', help='Also write the batch summary as JSON here')
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ('parquet' if args.output.endswith('.parquet') else 'jsonl')
+    if output_format == 'parquet' and pyarrow is None:
+        parser.error('Parquet output needs pyarrow (pip install pyarrow)')
+    try:
+        parameters = resolve_parameters(dict(param.split('=', 1) for param in args.param))
+    except ValueError as e:
+        parser.error(f'--param: {e}')
+    try:
+        time_range = parse_time_range(args.start, args.end)
+    except ValueError as e:
+        parser.error(str(e))
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        parser.error('no input files found')
+
+    summary = run_batch(paths, args.output, output_format, args.workers, args.merge,
+                        args.backend, parameters, time_range)
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, 'wb') as out:
+            out.write(dumps(summary))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
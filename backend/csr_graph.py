@@ -0,0 +1,121 @@
+"""
+Compact CSR Graph Backend for Money Muling Detection
+Integer-indexed adjacency (CSR for successors, CSC for predecessors) with
+edge aggregates stored as parallel NumPy arrays. Transaction rows live in
+the shared TransactionStore.
+"""
+
+import numpy as np
+
+
+class CSRGraph:
+    """
+    Directed transaction graph over dense int32 node ids
+
+    Edge ids follow first-appearance order of (sender, receiver) pairs, so
+    successor/predecessor order matches the networkx backend exactly
+    """
+
+    def __init__(self, node_ids, store, edge_src, edge_dst):
+        self.node_ids = np.asarray(node_ids, dtype=object)
+        self.store = store
+        num_nodes = len(self.node_ids)
+        num_edges = len(edge_src)
+        src, dst, amounts = store.src, store.dst, store.amounts
+
+        # Node aggregates
+        self.total_sent = np.bincount(src, weights=amounts, minlength=num_nodes)
+        self.total_received = np.bincount(dst, weights=amounts, minlength=num_nodes)
+        self.tx_count = np.diff(store.node_offsets).astype(np.int32)
+
+        # Edge aggregates (parallel arrays indexed by edge id)
+        self.edge_src = edge_src.astype(np.int32)
+        self.edge_dst = edge_dst.astype(np.int32)
+        self.edge_weight = np.bincount(store.edge_codes, weights=amounts, minlength=num_edges)
+        self.edge_count = store.edge_counts().astype(np.int32)
+
+        grouped_ts = store.epoch[store.edge_order]
+        starts = store.edge_offsets[:-1]
+        if num_edges:
+            self.edge_first_ts = np.minimum.reduceat(grouped_ts, starts)
+            self.edge_last_ts = np.maximum.reduceat(grouped_ts, starts)
+        else:
+            self.edge_first_ts = np.empty(0, dtype=np.int64)
+            self.edge_last_ts = np.empty(0, dtype=np.int64)
+
+        # CSR (successors) and CSC (predecessors)
+        self.out_edges = np.argsort(self.edge_src, kind='stable').astype(np.int32)
+        self.indptr = self._indptr(self.edge_src, num_nodes)
+        self.indices = self.edge_dst[self.out_edges]
+
+        self.in_edges = np.argsort(self.edge_dst, kind='stable').astype(np.int32)
+        self.in_indptr = self._indptr(self.edge_dst, num_nodes)
+        self.in_indices = self.edge_src[self.in_edges]
+
+    @classmethod
+    def from_arrays(cls, node_ids, store, arrays):
+        """Graph over existing arrays (see arrays()), without recomputing them"""
+        graph = cls.__new__(cls)
+        vars(graph).update(arrays)
+        graph.node_ids = node_ids
+        graph.store = store
+        return graph
+
+    def arrays(self):
+        """Aggregate and adjacency arrays by attribute name (node ids excluded)"""
+        return {name: value for name, value in vars(self).items()
+                if isinstance(value, np.ndarray) and name != 'node_ids'}
+
+    @staticmethod
+    def _indptr(endpoints, num_nodes):
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(endpoints, minlength=num_nodes), out=indptr[1:])
+        return indptr
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.edge_src)
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def in_degree(self):
+        return np.diff(self.in_indptr)
+
+    def successors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def predecessors(self, node):
+        return self.in_indices[self.in_indptr[node]:self.in_indptr[node + 1]]
+
+    def _labels(self, nodes):
+        return self.node_ids[nodes].tolist()
+
+    def nbytes(self):
+        """Total size of the array storage in bytes (transaction store included)"""
+        return (self.store.nbytes() + self.node_ids.nbytes
+                + sum(value.nbytes for value in self.arrays().values()))
+
+    def get_graph_data(self):
+        """Return graph data for visualization"""
+        nodes = [
+            {'id': node, 'total_sent': round(sent, 2), 'total_received': round(received, 2),
+             'transaction_count': count}
+            for node, sent, received, count in zip(
+                self.node_ids.tolist(), self.total_sent.tolist(),
+                self.total_received.tolist(), self.tx_count.tolist())
+        ]
+
+        order = self.out_edges
+        edges = [
+            {'source': u, 'target': v, 'weight': round(weight, 2), 'count': count}
+            for u, v, weight, count in zip(
+                self._labels(self.edge_src[order]), self._labels(self.edge_dst[order]),
+                self.edge_weight[order].tolist(), self.edge_count[order].tolist())
+        ]
+
+        return {'nodes': nodes, 'edges': edges}
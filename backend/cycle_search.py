@@ -0,0 +1,437 @@
+"""
+Bounded Cycle Search for Money Muling Detection
+Length-bounded simple cycle enumeration over integer CSR adjacency.
+The search is restricted to non-trivial strongly connected components and
+follows Johnson's scheme: each cycle is reported exactly once, starting
+from its minimum node id, and blocking (Gupta & Suzumura length-bounded
+locks) stops re-exploring nodes that cannot close a short enough cycle.
+find_temporal_cycles only follows transfers that happen in order, within
+a maximum duration.
+"""
+
+import time
+from bisect import bisect_right
+from collections import defaultdict
+
+import numpy as np
+
+# Expansions between deadline checks
+_CLOCK_INTERVAL = 1024
+
+# Vectorized trimming passes before falling back to Tarjan
+_MAX_TRIM_PASSES = 50
+
+# Depth of the reverse hop-distance ball around each temporal search start
+_TEMPORAL_BALL = 2
+
+
+def cyclic_core(indptr, indices):
+    """
+    Drop nodes that cannot lie on any cycle (no in- or no out-edge), repeatedly
+    Returns the remaining node mask and the surviving (src, dst) edge arrays
+    """
+    num_nodes = len(indptr) - 1
+    src = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(indptr))
+    dst = np.asarray(indices, dtype=np.int64)
+
+    # Self-loops never take part in a cycle of length >= 2
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+
+    alive = np.ones(num_nodes, dtype=bool)
+    for _ in range(_MAX_TRIM_PASSES):
+        has_out = np.bincount(src, minlength=num_nodes) > 0
+        has_in = np.bincount(dst, minlength=num_nodes) > 0
+        survivors = alive & has_out & has_in
+        if survivors.sum() == alive.sum():
+            break
+        alive = survivors
+        keep = alive[src] & alive[dst]
+        src, dst = src[keep], dst[keep]
+
+    return alive, src, dst
+
+
+def prune_nodes(indptr, indices, excluded):
+    """
+    CSR adjacency without the edges at excluded nodes (node ids unchanged)
+    Returns (indptr, indices, number of edges removed)
+    """
+    num_nodes = len(indptr) - 1
+    src = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(indptr))
+    indices = np.asarray(indices)
+    keep = ~(excluded[src] | excluded[indices])
+    pruned_indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src[keep], minlength=num_nodes), out=pruned_indptr[1:])
+    return pruned_indptr, indices[keep], int(len(keep) - keep.sum())
+
+
+def strong_components(num_nodes, ptr, adj):
+    """Iterative Tarjan SCC over a CSR adjacency"""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(num_nodes):
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, ptr[root])]
+
+        while work:
+            v, i = work[-1]
+            end = ptr[v + 1]
+            while i < end:
+                w = adj[i]
+                i += 1
+                if w not in index:
+                    work[-1] = (v, i)
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, ptr[w]))
+                    break
+                if w in on_stack and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[v] < low[parent]:
+                        low[parent] = low[v]
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+
+    return components
+
+
+class _Budget:
+    """Shared expansion counter, cycle cap and wall-clock deadline"""
+
+    def __init__(self, time_budget, max_cycles):
+        self.deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.max_cycles = max_cycles
+        self.expansions = 0
+        self.cycles = 0
+        self.truncated = False
+
+    def expand(self):
+        self.expansions += 1
+        if (self.deadline is not None and self.expansions % _CLOCK_INTERVAL == 0
+                and time.perf_counter() > self.deadline):
+            self.truncated = True
+        return not self.truncated
+
+    def emit(self):
+        self.cycles += 1
+        if self.max_cycles is not None and self.cycles >= self.max_cycles:
+            self.truncated = True
+
+
+def _distances_to(start, rptr, radj, component, comp_of, length_bound):
+    """
+    Nodes of start's component with a larger id that can reach start within
+    length_bound - 1 hops, mapped to their hop distance (reverse BFS)
+    """
+    dist = {start: 0}
+    frontier = [start]
+    for hops in range(1, length_bound):
+        next_frontier = []
+        for v in frontier:
+            for u in radj[rptr[v]:rptr[v + 1]]:
+                if u > start and comp_of[u] == component and u not in dist:
+                    dist[u] = hops
+                    next_frontier.append(u)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return dist
+
+
+def _bounded_cycles_from(start, ptr, adj, dist, length_bound, budget):
+    """
+    Yield simple cycles through `start` with at most `length_bound` nodes
+    Only nodes in `dist` are visited, and only while the remaining hop
+    distance back to start still fits in the bound
+    """
+    path = [start]
+    lock = {start: 0}
+    blocked_by = defaultdict(set)
+    stack = [iter(adj[ptr[start]:ptr[start + 1]])]
+    closed_len = [length_bound]
+
+    while stack:
+        for w in stack[-1]:
+            if w == start:
+                yield list(path)
+                closed_len[-1] = 1
+            elif (w in dist and len(path) + dist[w] <= length_bound
+                  and len(path) < lock.get(w, length_bound)):
+                if not budget.expand():
+                    return
+                path.append(w)
+                closed_len.append(length_bound)
+                lock[w] = len(path)
+                stack.append(iter(adj[ptr[w]:ptr[w + 1]]))
+                break
+        else:
+            stack.pop()
+            v = path.pop()
+            reach = closed_len.pop()
+            if closed_len and reach < closed_len[-1]:
+                closed_len[-1] = reach
+            if reach < length_bound:
+                # v can close a cycle in `reach` steps: relax locks upstream
+                relax = [(reach, v)]
+                while relax:
+                    reach, u = relax.pop()
+                    if lock.get(u, length_bound) < length_bound - reach + 1:
+                        lock[u] = length_bound - reach + 1
+                        relax.extend((reach + 1, w) for w in blocked_by[u].difference(path))
+            else:
+                for w in adj[ptr[v]:ptr[v + 1]]:
+                    if w in dist:
+                        blocked_by[w].add(v)
+
+
+def _local_csr(src, dst, num_nodes):
+    order = np.argsort(src, kind='stable')
+    ptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=ptr[1:])
+    return ptr.tolist(), dst[order].tolist()
+
+
+def find_cycles(indptr, indices, min_length=3, max_length=5,
+                time_budget=None, max_cycles=None):
+    """
+    Enumerate simple cycles with min_length..max_length nodes
+    Each cycle is returned once, as a list of node ids starting at its
+    minimum id; cycles come out ordered by that start node. Returns
+    (cycles, stats); stats['truncated'] is True when the time budget or the
+    max_cycles cap stopped the search early.
+    """
+    alive, src, dst = cyclic_core(indptr, indices)
+    core = np.flatnonzero(alive)
+    num_core = len(core)
+
+    # Local successor/predecessor CSR over the cyclic core
+    local = np.full(len(alive), -1, dtype=np.int64)
+    local[core] = np.arange(num_core)
+    src, dst = local[src], local[dst]
+    ptr, adj = _local_csr(src, dst, num_core)
+    rptr, radj = _local_csr(dst, src, num_core)
+
+    components = [c for c in strong_components(num_core, ptr, adj) if len(c) >= min_length]
+    comp_of = [-1] * num_core
+    for cid, component in enumerate(components):
+        for v in component:
+            comp_of[v] = cid
+
+    stats = {
+        'candidate_nodes': num_core,
+        'components': len(components),
+        'largest_component': max((len(c) for c in components), default=0),
+        'starts': 0,
+    }
+
+    budget = _Budget(time_budget, max_cycles)
+    cycles = []
+
+    # Canonical start: only the smallest node id of each cycle launches it
+    for start in range(num_core):
+        if comp_of[start] < 0:
+            continue
+        dist = _distances_to(start, rptr, radj, comp_of[start], comp_of, max_length)
+        if len(dist) < min_length:
+            continue
+        stats['starts'] += 1
+
+        for cycle in _bounded_cycles_from(start, ptr, adj, dist, max_length, budget):
+            if len(cycle) >= min_length:
+                cycles.append(cycle)
+                budget.emit()
+                if budget.truncated:
+                    break
+        if budget.truncated:
+            break
+
+    stats.update(expansions=budget.expansions, cycles=len(cycles),
+                 truncated=budget.truncated)
+    return [core[cycle].tolist() for cycle in cycles], stats
+
+
+def cycles_through_edge(succ, pred, u, v, rank, min_length=3, max_length=5, budget=None,
+                        allowed=None):
+    """
+    Simple cycles that use the edge u -> v, for incremental updates
+    succ/pred map each node to its successors/predecessors (e.g. networkx
+    G.succ/G.pred) and rank gives the canonical order; cycles are rotated
+    to start at their lowest-ranked node. Only the max_length-hop
+    neighbourhood of the edge is explored, and never nodes for which
+    allowed(node) is False (see prune_nodes).
+    """
+    if budget is None:
+        budget = _Budget(None, None)
+    if u == v or (allowed is not None and not (allowed(u) and allowed(v))):
+        return []
+
+    # Hop distance back to u, so the walk from v only keeps closable nodes
+    dist = {u: 0}
+    frontier = [u]
+    for hops in range(1, max_length - 1):
+        next_frontier = []
+        for w in frontier:
+            for x in pred[w]:
+                if x not in dist and (allowed is None or allowed(x)):
+                    dist[x] = hops
+                    next_frontier.append(x)
+        frontier = next_frontier
+
+    cycles = []
+    path = [u, v]
+    on_path = {u, v}
+    stack = [iter(succ[v])]
+    while stack and not budget.truncated:
+        for w in stack[-1]:
+            if w == u:
+                if len(path) >= min_length:
+                    start = min(range(len(path)), key=lambda i: rank[path[i]])
+                    cycles.append(path[start:] + path[:start])
+                    budget.emit()
+                continue
+            if (w not in on_path and w in dist and len(path) + dist[w] <= max_length
+                    and budget.expand()):
+                path.append(w)
+                on_path.add(w)
+                stack.append(iter(succ[w]))
+                break
+        else:
+            stack.pop()
+            on_path.discard(path.pop())
+    return cycles
+
+
+def find_temporal_cycles(src, dst, times, num_nodes, min_length=3, max_length=5,
+                         max_duration=None, excluded=None, time_budget=None, max_cycles=None):
+    """
+    Enumerate cycles whose transfers can happen one after another
+    src/dst/times describe transactions (epoch seconds). A path only
+    continues with a transaction strictly later than the previous hop's
+    (the earliest one per counterparty, which never rules out a
+    continuation), and the closing hop must be at most max_duration
+    seconds after the first. Each account's outgoing transactions are
+    sorted by time, so every step only scans the transfers inside that
+    window. Nodes in the `excluded` mask are never entered. Each cycle is
+    returned once, rotated to start at its minimum id as in find_cycles,
+    in the order found. Returns (cycles, stats) like find_cycles.
+    """
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    times = np.asarray(times, dtype=np.int64)
+    keep = src != dst
+    if excluded is not None:
+        keep &= ~(excluded[src] | excluded[dst])
+
+    # Only transactions between nodes of the cyclic core can be on a cycle
+    pairs = np.unique(src[keep] * num_nodes + dst[keep])
+    pair_src, pair_dst = pairs // num_nodes, pairs % num_nodes
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pair_src, minlength=num_nodes), out=indptr[1:])
+    alive, core_src, core_dst = cyclic_core(indptr, pair_dst)
+    rptr, radj = _local_csr(core_dst, core_src, num_nodes)
+
+    keep &= alive[src] & alive[dst]
+    rows = np.flatnonzero(keep)
+    rows = rows[np.lexsort((times[rows], src[rows]))]
+    out_ptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src[rows], minlength=num_nodes), out=out_ptr[1:])
+    out_ptr, out_dst, out_time = out_ptr.tolist(), dst[rows].tolist(), times[rows].tolist()
+    limit = float('inf') if max_duration is None else max_duration
+    far = _TEMPORAL_BALL + 1
+
+    def window(node, after, deadline):
+        """Outgoing transactions of node in (after, deadline]"""
+        end = out_ptr[node + 1]
+        lo = bisect_right(out_time, after, out_ptr[node], end)
+        return iter(range(lo, bisect_right(out_time, deadline, lo, end)))
+
+    stats = {'candidate_nodes': int(alive.sum()), 'starts': 0}
+    budget = _Budget(time_budget, max_cycles)
+    seen = set()
+    cycles = []
+
+    for start in np.flatnonzero(alive).tolist():
+        # Hop distance back to start within _TEMPORAL_BALL hops; farther nodes
+        # count as _TEMPORAL_BALL + 1 (a lower bound). The time window bounds
+        # the walk, so a full-depth ball would cost more than it prunes.
+        dist = {start: 0}
+        frontier = [start]
+        for hops in range(1, min(_TEMPORAL_BALL, max_length - 1) + 1):
+            next_frontier = []
+            for v in frontier:
+                for u in radj[rptr[v]:rptr[v + 1]]:
+                    if u not in dist:
+                        dist[u] = hops
+                        next_frontier.append(u)
+            frontier = next_frontier
+        stats['starts'] += 1
+
+        launched = set()
+        for j in range(out_ptr[start], out_ptr[start + 1]):
+            first, t0 = out_dst[j], out_time[j]
+            # Without a duration bound the earliest transfer to `first` dominates
+            launch = first if max_duration is None else (first, t0)
+            if 1 + dist.get(first, far) > max_length or launch in launched:
+                continue
+            launched.add(launch)
+            deadline = t0 + limit
+            path = [start, first]
+            on_path = {start, first}
+            stack = [(window(first, t0, deadline), set())]
+            while stack and not budget.truncated:
+                transfers, tried = stack[-1]
+                for k in transfers:
+                    w = out_dst[k]
+                    if w in tried:
+                        continue
+                    tried.add(w)
+                    if w == start:
+                        if len(path) >= min_length:
+                            rotate = path.index(min(path))
+                            cycle = tuple(path[rotate:] + path[:rotate])
+                            if cycle not in seen:
+                                seen.add(cycle)
+                                cycles.append(list(cycle))
+                                budget.emit()
+                        continue
+                    if (w not in on_path and len(path) + dist.get(w, far) <= max_length
+                            and budget.expand()):
+                        path.append(w)
+                        on_path.add(w)
+                        stack.append((window(w, out_time[k], deadline), set()))
+                        break
+                else:
+                    stack.pop()
+                    on_path.discard(path.pop())
+            if budget.truncated:
+                break
+        if budget.truncated:
+            break
+
+    stats.update(expansions=budget.expansions, cycles=len(cycles),
+                 truncated=budget.truncated)
+    return cycles, stats
@@ -4,134 +4,302 @@ Main orchestration module for fraud detection
 """
 
 from graph_analyzer import GraphAnalyzer
+from graph_view import GraphView
+from legitimate import (MERCHANT_IN_DEGREE, MERCHANT_OUT_DEGREE, PAYROLL_MAX_VARIATION,
+                        PAYROLL_OUT_DEGREE)
+from metrics import StageRecorder
+from rings import consolidate, pattern_mask, pattern_names, ring_risk, suspicion_scores
 from collections import defaultdict
 import hashlib
+import json
+
+# Bounds on cycle enumeration so one dense component cannot stall a request
+CYCLE_TIME_BUDGET_SECONDS = 30
+MAX_CYCLES = 5000
+
+# Bump whenever detection output changes, so cached results are not reused
+DETECTION_VERSION = 6
+
+HASH_BLOCK_BYTES = 1 << 20
+
+# Tunable detection parameters (see resolve_parameters)
+DEFAULT_PARAMETERS = {
+    'threshold': 10,           # distinct counterparties for fan-in/fan-out
+    'time_window_hours': 72,   # fan-in/fan-out window
+    'min_chain_length': 3,     # shortest reported shell chain
+    'max_transactions': 3,     # transaction_count that still counts as a shell
+    # Legitimate-account filter (see legitimate.legitimate_mask)
+    'merchant_in_degree': MERCHANT_IN_DEGREE,
+    'merchant_out_degree': MERCHANT_OUT_DEGREE,
+    'payroll_out_degree': PAYROLL_OUT_DEGREE,
+    'payroll_max_variation': PAYROLL_MAX_VARIATION,
+    # Search pruning, 0 = off: cycle/shell search skips legitimate accounts (1),
+    # cycle search skips nodes with more distinct counterparties than max_search_degree
+    'prune_legitimate': 0,
+    'max_search_degree': 0,
+    # 1 = merge overlapping rings of the same pattern type (rings.consolidate)
+    'consolidate_rings': 1,
+    # 1 = only report cycles whose transfers happen in order, all within
+    # cycle_window_hours (GraphAnalyzer.detect_temporal_cycles)
+    'temporal_cycles': 0,
+    'cycle_window_hours': 168
+}
+# Parameters where 0 is allowed (it disables the option)
+OPTIONAL_PARAMETERS = ('prune_legitimate', 'max_search_degree', 'consolidate_rings',
+                       'temporal_cycles')
+
+# Member paths kept as evidence on each ring (path_count has the total)
+MAX_EVIDENCE_PATHS = 20
+LEGITIMATE_PARAMETERS = ('merchant_in_degree', 'merchant_out_degree', 'payroll_out_degree',
+                         'payroll_max_variation')
+
+# Stages reported to the progress callback, in order
+ANALYSIS_STAGES = ['graph_build', 'legitimate_filter', 'cycles', 'fan_in', 'fan_out',
+                   'shells', 'consolidate', 'output']
+
+def resolve_parameters(overrides=None):
+    """
+    DEFAULT_PARAMETERS updated with overrides (e.g. request arguments)
+    Raises ValueError for unknown names or non-positive values (negative
+    for OPTIONAL_PARAMETERS)
+    """
+    parameters = dict(DEFAULT_PARAMETERS)
+    for name, value in (overrides or {}).items():
+        if name not in DEFAULT_PARAMETERS:
+            raise ValueError(f"Unknown parameter '{name}', expected one of {sorted(DEFAULT_PARAMETERS)}")
+        kind = type(DEFAULT_PARAMETERS[name])
+        optional = name in OPTIONAL_PARAMETERS
+        message = (f"Parameter '{name}' must be a {'non-negative' if optional else 'positive'} "
+                   f"{'integer' if kind is int else 'number'}")
+        try:
+            value = kind(value)
+        except (TypeError, ValueError):
+            raise ValueError(message) from None
+        if value < 0 or (value == 0 and not optional):
+            raise ValueError(message)
+        parameters[name] = value
+    return parameters
+
+def _detection_params(digest, backend, parameters):
+    params = {
+        'version': DETECTION_VERSION,
+        'backend': backend,
+        'cycle_time_budget': CYCLE_TIME_BUDGET_SECONDS,
+        'max_cycles': MAX_CYCLES,
+        'parameters': resolve_parameters(parameters)
+    }
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def analysis_cache_key(stream, backend='networkx', parameters=None, time_range=None):
+    """
+    SHA-256 of the upload bytes plus the detection parameters (and the
+    time range, when only a slice of the upload is analyzed)
+    The stream is read in blocks and rewound, so large uploads are not
+    held in memory
+    """
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(HASH_BLOCK_BYTES), b''):
+        digest.update(block)
+    stream.seek(0)
+    if time_range is not None:
+        digest.update(f'time_range:{time_range[0]}:{time_range[1]}'.encode())
+    return _detection_params(digest, backend, parameters)
+
+def snapshot_cache_key(snapshot_id, parameters=None):
+    """Result cache key for analyzing a stored graph snapshot"""
+    digest = hashlib.sha256(f'snapshot:{snapshot_id}'.encode())
+    return _detection_params(digest, 'csr', parameters)
+
+def pattern_paths(legitimate_accounts, cycles, fan_in_patterns, fan_out_patterns,
+                  shell_networks):
+    """
+    Detected patterns as ring paths [(pattern_type, members, patterns)],
+    skipping those carried by legitimate accounts
+    """
+    paths = []
+
+    # Process cycles
+    for cycle in cycles:
+        # Filter out legitimate accounts
+        suspicious_members = [acc for acc in cycle if acc not in legitimate_accounts]
+        if len(suspicious_members) >= 2:  # At least 2 suspicious accounts
+            paths.append(('cycle', cycle, [f'cycle_length_{len(cycle)}']))
+
+    # Process fan-in patterns
+    for pattern in fan_in_patterns:
+        account = pattern['account']
+        if account not in legitimate_accounts:
+            # Include some senders from the densest window
+            members = [account] + pattern['window']['counterparties'][:5]
+            paths.append(('fan_in', members, ['smurfing_aggregation', 'high_velocity']))
+
+    # Process fan-out patterns
+    for pattern in fan_out_patterns:
+        account = pattern['account']
+        if account not in legitimate_accounts:
+            # Include some receivers from the densest window
+            members = [account] + pattern['window']['counterparties'][:5]
+            paths.append(('fan_out', members, ['smurfing_dispersion', 'high_velocity']))
+
+    # Process shell networks
+    for chain in shell_networks:
+        suspicious_members = [acc for acc in chain if acc not in legitimate_accounts]
+        if len(suspicious_members) >= 3:
+            paths.append(('shell_network', chain,
+                          ['layered_shell', 'low_transaction_intermediary']))
+    return paths
+
 
 class MoneyMulingDetector:
-    def __init__(self, df):
+    def __init__(self, df, backend='networkx', workers=1, progress=None, recorder=None,
+                 parameters=None, analyzer=None):
         self.df = df
-        self.analyzer = GraphAnalyzer(df)
+        self.workers = workers
+        self.parameters = resolve_parameters(parameters)
+        # Stage timings; progress(stage) is called as each stage starts
+        self.recorder = recorder if recorder is not None else StageRecorder(progress)
+        with self.recorder.stage('graph_build') as counts:
+            # A prebuilt analyzer (e.g. an opened snapshot) skips the build
+            self.analyzer = analyzer if analyzer is not None else GraphAnalyzer(df, backend=backend)
+            counts.update(self.analyzer.graph_size())
+        self.paths = []
         self.fraud_rings = []
         self.suspicious_accounts = {}
         self.ring_counter = 0
     
     def analyze(self):
         """Main analysis pipeline"""
-        # Identify legitimate accounts first (to reduce false positives)
-        legitimate_accounts = self.analyzer.identify_legitimate_patterns()
+        stage = self.recorder.stage
         
-        # Detect all patterns
-        cycles = self.analyzer.detect_cycles()
-        fan_in_patterns = self.analyzer.detect_fan_in_patterns()
-        fan_out_patterns = self.analyzer.detect_fan_out_patterns()
-        shell_networks = self.analyzer.detect_shell_networks()
+        # Identify legitimate accounts first (to reduce false positives)
+        with stage('legitimate_filter') as counts:
+            legitimate_accounts = self.analyzer.identify_legitimate_patterns(
+                **{name: self.parameters[name] for name in LEGITIMATE_PARAMETERS})
+            counts['legitimate_accounts'] = len(legitimate_accounts)
         
-        # Process cycles
-        for cycle in cycles:
-            # Filter out legitimate accounts
-            suspicious_members = [acc for acc in cycle if acc not in legitimate_accounts]
-            if len(suspicious_members) >= 2:  # At least 2 suspicious accounts
-                self._add_fraud_ring(
-                    members=cycle,
-                    pattern_type='cycle',
-                    detected_patterns=[f'cycle_length_{len(cycle)}']
-                )
+        # Detect all patterns; optionally never expanding through legitimate hubs
+        params = self.parameters
+        exclude = legitimate_accounts if params['prune_legitimate'] else None
+        with stage('cycles') as counts:
+            if params['temporal_cycles']:
+                cycles = self.analyzer.detect_temporal_cycles(
+                    max_duration_hours=params['cycle_window_hours'],
+                    time_budget=CYCLE_TIME_BUDGET_SECONDS, max_cycles=MAX_CYCLES,
+                    exclude=exclude, max_degree=params['max_search_degree'])
+            else:
+                cycles = self.analyzer.detect_cycles(time_budget=CYCLE_TIME_BUDGET_SECONDS,
+                                                     max_cycles=MAX_CYCLES, workers=self.workers,
+                                                     exclude=exclude,
+                                                     max_degree=params['max_search_degree'])
+            counts.update(self.analyzer.cycle_stats)
+        with stage('fan_in') as counts:
+            fan_in_patterns = self.analyzer.detect_fan_in_patterns(
+                params['threshold'], params['time_window_hours'])
+            counts['patterns'] = len(fan_in_patterns)
+        with stage('fan_out') as counts:
+            fan_out_patterns = self.analyzer.detect_fan_out_patterns(
+                params['threshold'], params['time_window_hours'])
+            counts['patterns'] = len(fan_out_patterns)
+        with stage('shells') as counts:
+            shell_networks = self.analyzer.detect_shell_networks(
+                params['min_chain_length'], params['max_transactions'], workers=self.workers,
+                exclude=exclude)
+            counts.update(self.analyzer.shell_stats)
         
-        # Process fan-in patterns
-        for pattern in fan_in_patterns:
-            account = pattern['account']
-            if account not in legitimate_accounts:
-                members = [account] + pattern['senders'][:5]  # Include some senders
-                self._add_fraud_ring(
-                    members=members,
-                    pattern_type='fan_in',
-                    detected_patterns=['smurfing_aggregation', 'high_velocity']
-                )
+        with stage('consolidate') as counts:
+            self.add_patterns(legitimate_accounts, cycles, fan_in_patterns,
+                               fan_out_patterns, shell_networks)
+            counts.update(paths=len(self.paths), rings=len(self.fraud_rings))
         
-        # Process fan-out patterns
-        for pattern in fan_out_patterns:
-            account = pattern['account']
-            if account not in legitimate_accounts:
-                members = [account] + pattern['receivers'][:5]  # Include some receivers
-                self._add_fraud_ring(
-                    members=members,
-                    pattern_type='fan_out',
-                    detected_patterns=['smurfing_dispersion', 'high_velocity']
-                )
+        # Build final output
+        with stage('output') as counts:
+            results = self._build_output()
+            counts.update(rings=len(self.fraud_rings),
+                          suspicious_accounts=len(self.suspicious_accounts))
         
-        # Process shell networks
-        for chain in shell_networks:
-            suspicious_members = [acc for acc in chain if acc not in legitimate_accounts]
-            if len(suspicious_members) >= 3:
-                self._add_fraud_ring(
-                    members=chain,
-                    pattern_type='shell_network',
-                    detected_patterns=['layered_shell', 'low_transaction_intermediary']
-                )
+        results['summary']['timings'] = self.recorder.stages
+        return results
+    
+    def add_patterns(self, legitimate_accounts, cycles, fan_in_patterns,
+                     fan_out_patterns, shell_networks):
+        """
+        Turn detected patterns into fraud rings, skipping legitimate accounts
+        Also used by incremental callers (sessions) to add later detections
+        """
+        self._add_paths(pattern_paths(legitimate_accounts, cycles, fan_in_patterns,
+                                      fan_out_patterns, shell_networks))
+    
+    def _add_paths(self, paths):
+        """
+        Record detected paths [(pattern_type, members, patterns)] and their
+        rings: one ring per path, or with consolidate_rings all rings are
+        rebuilt by merging overlapping paths of the same type. Accounts only
+        collect pattern bits and path counts here; only the members of the
+        new paths are (re-)scored, in one _score_accounts pass.
+        """
+        first_new = len(self.paths)
+        for pattern_type, members, patterns in paths:
+            mask = pattern_mask(patterns)
+            self.paths.append((pattern_type, members))
+            for account in members:
+                account_data = self.suspicious_accounts.get(account)
+                if account_data is None:
+                    account_data = self.suspicious_accounts[account] = {
+                        'account_id': account,
+                        'suspicion_score': 0,
+                        'pattern_mask': 0,
+                        'path_count': 0,
+                        'ring_ids': []
+                    }
+                account_data['pattern_mask'] |= mask
+                account_data['path_count'] += 1
         
-        # Build final output
-        return self._build_output()
+        if self.parameters['consolidate_rings']:
+            self.fraud_rings = []
+            self.ring_counter = 0
+            for account_data in self.suspicious_accounts.values():
+                account_data['ring_ids'] = []
+            for group in consolidate(self.paths):
+                self._add_fraud_ring(group)
+        else:
+            for index in range(first_new, len(self.paths)):
+                self._add_fraud_ring([index])
+        self._score_accounts({account for _, members in self.paths[first_new:]
+                              for account in members})
     
-    def _add_fraud_ring(self, members, pattern_type, detected_patterns):
-        """Add a fraud ring and update suspicious accounts"""
+    def _add_fraud_ring(self, path_indexes):
+        """Add a fraud ring made of the given paths (members in first-seen order)"""
         self.ring_counter += 1
         ring_id = f'RING_{self.ring_counter:03d}'
         
-        # Calculate risk score based on pattern type and size
-        base_score = {
-            'cycle': 85,
-            'fan_in': 75,
-            'fan_out': 75,
-            'shell_network': 80
-        }.get(pattern_type, 70)
-        
-        # Adjust score based on ring size
-        size_factor = min(len(members) * 2, 15)
-        risk_score = min(base_score + size_factor, 100)
+        pattern_type = self.paths[path_indexes[0]][0]
+        ring_paths = [self.paths[i][1] for i in path_indexes]
+        members = list(dict.fromkeys(account for path in ring_paths for account in path))
         
         self.fraud_rings.append({
             'ring_id': ring_id,
             'member_accounts': members,
             'pattern_type': pattern_type,
-            'risk_score': round(risk_score, 1)
+            # Risk from pattern type and ring size
+            'risk_score': ring_risk(pattern_type, len(members)),
+            'path_count': len(ring_paths),
+            'evidence_paths': ring_paths[:MAX_EVIDENCE_PATHS]
         })
-        
-        # Update suspicious accounts
         for account in members:
-            if account not in self.suspicious_accounts:
-                self.suspicious_accounts[account] = {
-                    'account_id': account,
-                    'suspicion_score': 0,
-                    'detected_patterns': set(),
-                    'ring_ids': []
-                }
-            
-            # Update account suspicion score
-            account_data = self.suspicious_accounts[account]
-            account_data['detected_patterns'].update(detected_patterns)
-            account_data['ring_ids'].append(ring_id)
-            
-            # Calculate suspicion score
-            pattern_scores = {
-                'cycle_length_3': 30,
-                'cycle_length_4': 25,
-                'cycle_length_5': 20,
-                'smurfing_aggregation': 25,
-                'smurfing_dispersion': 25,
-                'high_velocity': 20,
-                'layered_shell': 25,
-                'low_transaction_intermediary': 15
-            }
-            
-            total_score = sum(
-                pattern_scores.get(p, 10) 
-                for p in account_data['detected_patterns']
-            )
-            
-            # Add bonus for being in multiple rings
-            ring_bonus = (len(account_data['ring_ids']) - 1) * 10
-            
-            account_data['suspicion_score'] = min(total_score + ring_bonus, 100)
+            self.suspicious_accounts[account]['ring_ids'].append(ring_id)
+    
+    def _score_accounts(self, account_ids=None):
+        """Suspicion scores of the given accounts (default all) in one vectorized pass"""
+        if account_ids is None:
+            account_ids = self.suspicious_accounts
+        accounts = [self.suspicious_accounts[account] for account in account_ids]
+        if not accounts:
+            return
+        scores = suspicion_scores([data['pattern_mask'] for data in accounts],
+                                  [data['path_count'] for data in accounts])
+        for account_data, score in zip(accounts, scores.tolist()):
+            account_data['suspicion_score'] = score
     
     def _build_output(self):
         """Build the final JSON output"""
@@ -141,29 +309,20 @@ class MoneyMulingDetector:
             suspicious_list.append({
                 'account_id': data['account_id'],
                 'suspicion_score': round(data['suspicion_score'], 1),
-                'detected_patterns': list(data['detected_patterns']),
+                'detected_patterns': pattern_names(data['pattern_mask']),
                 'ring_id': data['ring_ids'][0] if data['ring_ids'] else None
             })
         
         # Sort by suspicion score descending
         suspicious_list.sort(key=lambda x: x['suspicion_score'], reverse=True)
         
-        # Get graph data for visualization
-        graph_data = self.analyzer.get_graph_data()
-        
-        # Mark suspicious nodes in graph data
-        suspicious_ids = set(self.suspicious_accounts.keys())
-        for node in graph_data['nodes']:
-            node['is_suspicious'] = node['id'] in suspicious_ids
-            if node['id'] in self.suspicious_accounts:
-                node['suspicion_score'] = self.suspicious_accounts[node['id']]['suspicion_score']
-                node['ring_ids'] = self.suspicious_accounts[node['id']]['ring_ids']
-            else:
-                node['suspicion_score'] = 0
-                node['ring_ids'] = []
+        # Bounded graph for visualization: whole graph if small, else suspicious
+        # neighborhoods plus aggregated super-nodes (GraphView.neighborhood expands it)
+        self.graph_view = GraphView(self.analyzer, self.suspicious_accounts)
+        graph_data = self.graph_view.overview()
         
         # Build summary
-        total_accounts = len(graph_data['nodes'])
+        total_accounts = self.analyzer.graph_size()['nodes']
         
         return {
             'suspicious_accounts': suspicious_list,
@@ -172,6 +331,17 @@ class MoneyMulingDetector:
                 'total_accounts_analyzed': total_accounts,
                 'suspicious_accounts_flagged': len(suspicious_list),
                 'fraud_rings_detected': len(self.fraud_rings),
+                'patterns_detected': len(self.paths),
+                'cycle_search_truncated': self.analyzer.cycle_stats.get('truncated', False),
+                'shell_search_truncated': self.analyzer.shell_stats.get('truncated', False),
+                # What search pruning (prune_legitimate / max_search_degree) skipped
+                'search_pruning': {
+                    'cycle_pruned_nodes': self.analyzer.cycle_stats.get('pruned_nodes', 0),
+                    'cycle_pruned_edges': self.analyzer.cycle_stats.get('pruned_edges', 0),
+                    'degree_capped_nodes': self.analyzer.cycle_stats.get('degree_capped_nodes', 0),
+                    'shell_pruned_nodes': self.analyzer.shell_stats.get('pruned_nodes', 0)
+                },
+                'parameters': self.parameters,
                 'processing_time_seconds': 0  # Will be set by the API
             },
             'graph_data': graph_data
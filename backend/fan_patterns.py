@@ -0,0 +1,105 @@
+"""
+Sliding-Window Fan Pattern Detection for Money Muling Detection
+Smurfing means many distinct counterparties transacting with one account
+inside a single time window. Transactions are sorted once per account by
+int64 epoch time and scanned with two pointers, so the whole pass is
+O(E log E) with no per-call timestamp parsing.
+"""
+
+import numpy as np
+
+from timestamps import NAT
+
+
+def format_epoch(seconds):
+    """Epoch seconds back to the upload's 'YYYY-MM-DD HH:MM:SS' format"""
+    return str(np.datetime64(int(seconds), 's')).replace('T', ' ')
+
+
+def _densest_window(ts, counterparty, lo, hi, window_seconds):
+    """
+    Two-pointer scan over one account's time-sorted transactions [lo, hi)
+    Returns (distinct counterparties, left, right) of the densest window
+    """
+    counts = {}
+    distinct = 0
+    best = (0, lo, lo)
+    left = lo
+    for right in range(lo, hi):
+        c = counterparty[right]
+        seen = counts.get(c, 0)
+        counts[c] = seen + 1
+        if not seen:
+            distinct += 1
+        while ts[right] - ts[left] > window_seconds:
+            c = counterparty[left]
+            counts[c] -= 1
+            if not counts[c]:
+                distinct -= 1
+            left += 1
+        if distinct > best[0]:
+            best = (distinct, left, right)
+    return best
+
+
+def densest_windows(node_codes, counterparty_codes, epoch, amounts, candidates,
+                    threshold=10, time_window_hours=72):
+    """
+    Find accounts with >= threshold distinct counterparties in one window
+    node_codes/counterparty_codes/epoch/amounts are per-transaction arrays;
+    candidates is a boolean mask of accounts worth scanning (degree filter).
+    Returns {node: window dict} for the accounts that qualify.
+    """
+    window_seconds = time_window_hours * 3600
+
+    # Unparseable timestamps cannot be placed in a window
+    rows = np.flatnonzero((epoch != NAT) & candidates[node_codes])
+    order = rows[np.lexsort((epoch[rows], node_codes[rows]))]
+    nodes_sorted = node_codes[order]
+    groups, starts, sizes = np.unique(nodes_sorted, return_index=True, return_counts=True)
+
+    ts = epoch[order].tolist()
+    counterparty = counterparty_codes[order].tolist()
+
+    windows = {}
+    for node, lo, size in zip(groups.tolist(), starts.tolist(), sizes.tolist()):
+        if size < threshold:
+            continue
+        window = _window_summary(order, ts, counterparty, amounts, lo, lo + size,
+                                 threshold, window_seconds)
+        if window is not None:
+            windows[node] = window
+    return windows
+
+
+def account_window(rows, counterparty_codes, epoch, amounts, threshold=10,
+                   time_window_hours=72):
+    """
+    Densest window for a single account given its transaction rows
+    Same result as densest_windows for that account, in O(d log d)
+    for an account with d transactions; None if it does not qualify
+    """
+    rows = np.asarray(rows)
+    rows = rows[epoch[rows] != NAT]
+    if len(rows) < threshold:
+        return None
+    order = rows[np.argsort(epoch[rows], kind='stable')]
+    return _window_summary(order, epoch[order].tolist(), counterparty_codes[order].tolist(),
+                           amounts, 0, len(order), threshold, time_window_hours * 3600)
+
+
+def _window_summary(order, ts, counterparty, amounts, lo, hi, threshold, window_seconds):
+    distinct, left, right = _densest_window(ts, counterparty, lo, hi, window_seconds)
+    if distinct < threshold:
+        return None
+    # Transactions at the window's end time belong to it too
+    while right + 1 < hi and ts[right + 1] == ts[right]:
+        right += 1
+    return {
+        'start': format_epoch(ts[left]),
+        'end': format_epoch(ts[right]),
+        'counterparty_count': distinct,
+        'counterparties': list(dict.fromkeys(counterparty[left:right + 1])),
+        'transaction_count': right - left + 1,
+        'total_amount': round(float(amounts[order[left:right + 1]].sum()), 2),
+    }
@@ -4,239 +4,339 @@ Implements cycle detection, smurfing detection, and shell network analysis
 """
 
 import networkx as nx
-from collections import defaultdict
-from datetime import datetime, timedelta
 import numpy as np
+import pandas as pd
+from csr_graph import CSRGraph
+from cycle_search import (_Budget, cycles_through_edge, find_cycles, find_temporal_cycles,
+                          prune_nodes)
+from fan_patterns import account_window, densest_windows
+from ingestion import TransactionColumns, encode_frame
+from legitimate import legitimate_mask
+from parallel_analysis import parallel_find_cycles, parallel_find_shell_chains
+from shell_chains import MAX_CHAIN_LENGTH, MAX_SHELL_CHAINS, find_shell_chains
+from timestamps import NAT
+from transaction_store import TransactionStore
+
+BACKENDS = ('networkx', 'csr')
+
 
 class GraphAnalyzer:
-    def __init__(self, df):
+    def __init__(self, df, backend='networkx', csr=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown graph backend '{backend}', expected one of {BACKENDS}")
         self.df = df
-        self.G = nx.DiGraph()
-        self.node_transactions = defaultdict(list)
-        self.edge_transactions = defaultdict(list)
-        self._build_graph()
+        self.backend = 'csr' if csr is not None else backend
+        self.G = nx.DiGraph() if self.backend == 'networkx' else None
+        self.csr = csr
+        self.cycle_stats = {}
+        self.shell_stats = {}
+        self._node_index = None
+        self._node_list = None
+        if csr is not None:
+            # Prebuilt arrays (e.g. an opened snapshot); nothing to build
+            self.store = csr.store
+        else:
+            self._build_graph()
     
     def _build_graph(self):
-        """Build directed graph from transaction data"""
-        for _, row in self.df.iterrows():
-            sender = row['sender_id']
-            receiver = row['receiver_id']
-            amount = float(row['amount'])
-            timestamp = row['timestamp']
-            
-            # Add nodes with attributes
-            if sender not in self.G:
-                self.G.add_node(sender, total_sent=0, total_received=0, 
-                               transaction_count=0, timestamps=[])
-            if receiver not in self.G:
-                self.G.add_node(receiver, total_sent=0, total_received=0,
-                               transaction_count=0, timestamps=[])
-            
-            # Update node attributes
-            self.G.nodes[sender]['total_sent'] += amount
-            self.G.nodes[sender]['transaction_count'] += 1
-            self.G.nodes[sender]['timestamps'].append(timestamp)
-            
-            self.G.nodes[receiver]['total_received'] += amount
-            self.G.nodes[receiver]['transaction_count'] += 1
-            self.G.nodes[receiver]['timestamps'].append(timestamp)
-            
-            # Add or update edge
-            if self.G.has_edge(sender, receiver):
-                self.G[sender][receiver]['weight'] += amount
-                self.G[sender][receiver]['count'] += 1
-                self.G[sender][receiver]['transactions'].append({
-                    'amount': amount, 'timestamp': timestamp
-                })
-            else:
-                self.G.add_edge(sender, receiver, weight=amount, count=1,
-                               transactions=[{'amount': amount, 'timestamp': timestamp}])
-            
-            # Store transaction references
-            self.node_transactions[sender].append(row.to_dict())
-            self.node_transactions[receiver].append(row.to_dict())
-            self.edge_transactions[(sender, receiver)].append(row.to_dict())
-    
-    def detect_cycles(self, min_length=3, max_length=5):
         """
-        Detect cycles of length 3 to 5 (circular fund routing)
-        Time Complexity: O(V + E) for each DFS
+        Build directed graph from transaction data
+        Columnar build: account ids are factorized once and node and edge
+        aggregates come from grouped sums over the integer codes. Every
+        transaction is kept once, in a TransactionStore indexed by edge and
+        by node; networkx edges carry only their edge id. Accepts a
+        DataFrame or pre-encoded TransactionColumns from streaming
+        ingestion.
         """
-        cycles = []
-        visited_cycles = set()
+        columns = self.df
+        if not isinstance(columns, TransactionColumns):
+            columns = encode_frame(columns)
+        node_ids = columns.node_ids
+        num_nodes = len(node_ids)
+        src, dst = columns.src, columns.dst
         
-        def find_cycles_from_node(start, current, path, depth):
-            if depth > max_length:
-                return
-            
-            for neighbor in self.G.successors(current):
-                if neighbor == start and len(path) >= min_length:
-                    # Found a cycle
-                    cycle = tuple(sorted(path))
-                    if cycle not in visited_cycles:
-                        visited_cycles.add(cycle)
-                        cycles.append(list(path))
-                elif neighbor not in path and depth < max_length:
-                    find_cycles_from_node(start, neighbor, path + [neighbor], depth + 1)
+        # Group rows by (sender, receiver) pair
+        edge_keys = src.astype(np.int64) * num_nodes + dst
+        edge_codes, edge_uniques = pd.factorize(edge_keys)
+        num_edges = len(edge_uniques)
+        self.store = TransactionStore(src, dst, columns.amounts, columns.epoch,
+                                      edge_codes, num_nodes, num_edges)
+        edge_src, edge_dst = edge_uniques // num_nodes, edge_uniques % num_nodes
         
-        # Find cycles starting from each node
-        for node in self.G.nodes():
-            find_cycles_from_node(node, node, [node], 1)
+        if self.backend == 'csr':
+            self.csr = CSRGraph(node_ids, self.store, edge_src, edge_dst)
+            return
         
-        return cycles
+        amounts = self.store.amounts
+        edge_weight = np.bincount(edge_codes, weights=amounts, minlength=num_edges)
+        edge_count = self.store.edge_counts()
+        total_sent = np.bincount(src, weights=amounts, minlength=num_nodes)
+        total_received = np.bincount(dst, weights=amounts, minlength=num_nodes)
+        tx_count = np.diff(self.store.node_offsets)
+        
+        node_ids = node_ids.tolist()
+        self.G.add_nodes_from(
+            (node, {'total_sent': sent, 'total_received': received,
+                    'transaction_count': count})
+            for node, sent, received, count in zip(
+                node_ids, total_sent.tolist(), total_received.tolist(), tx_count.tolist())
+        )
+        
+        self.G.add_edges_from(
+            (node_ids[u], node_ids[v], {'weight': weight, 'count': count, 'edge': edge})
+            for edge, (u, v, weight, count) in enumerate(zip(
+                edge_src.tolist(), edge_dst.tolist(), edge_weight.tolist(), edge_count.tolist()))
+        )
+    
+    def graph_size(self):
+        """Node, edge and transaction counts"""
+        if self.csr is not None:
+            nodes, edges = self.csr.num_nodes, self.csr.num_edges
+        else:
+            nodes, edges = self.G.number_of_nodes(), self.G.number_of_edges()
+        return {'nodes': nodes, 'edges': edges, 'transactions': len(self.store)}
+    
+    def _adjacency(self):
+        """Successor lists as integer CSR arrays (node ids follow graph order)"""
+        if self.csr is not None:
+            return self.csr.indptr, self.csr.indices
+        
+        index = {node: i for i, node in enumerate(self.G)}
+        indptr = np.zeros(len(index) + 1, dtype=np.int64)
+        np.cumsum([len(nbrs) for nbrs in self.G.succ.values()], out=indptr[1:])
+        indices = np.fromiter((index[v] for nbrs in self.G.succ.values() for v in nbrs),
+                              dtype=np.int64, count=indptr[-1])
+        return indptr, indices
+    
+    def _transaction_counts(self):
+        """Per-node transaction_count as an array in graph order"""
+        if self.csr is not None:
+            return self.csr.tx_count
+        return np.fromiter((count for _, count in self.G.nodes(data='transaction_count')),
+                           dtype=np.int64, count=self.G.number_of_nodes())
+    
+    def _node_labels(self):
+        """Account ids indexed by integer node id"""
+        if self.csr is not None:
+            return self.csr.node_ids
+        return list(self.G)
+    
+    def _label_paths(self, paths):
+        """Map paths of integer node ids back to account ids"""
+        labels = self._node_labels()
+        return [[labels[i] for i in path] for path in paths]
+    
+    def _exclusion_mask(self, exclude):
+        """Node mask of the given account ids"""
+        return pd.Index(self._node_labels()).isin(list(exclude))
+    
+    def _excluded_nodes(self, out_degree, in_degree, exclude=None, max_degree=None):
+        """
+        Node mask of excluded accounts and of nodes with more than max_degree
+        distinct successors or predecessors, plus counts for the stats
+        """
+        excluded = np.zeros(len(out_degree), dtype=bool)
+        if exclude:
+            excluded |= self._exclusion_mask(exclude)
+        capped = 0
+        if max_degree:
+            over = np.maximum(out_degree, in_degree) > max_degree
+            capped = int((over & ~excluded).sum())
+            excluded |= over
+        return excluded, {'pruned_nodes': int(excluded.sum()), 'degree_capped_nodes': capped,
+                          'pruned_edges': 0}
+    
+    def _prune(self, indptr, indices, exclude=None, max_degree=None):
+        """
+        Remove excluded accounts, and nodes with more than max_degree distinct
+        successors or predecessors, from a search adjacency
+        Returns the pruned adjacency and counts of what was removed
+        """
+        num_nodes = len(indptr) - 1
+        excluded, stats = self._excluded_nodes(
+            np.diff(indptr), np.bincount(indices, minlength=num_nodes), exclude, max_degree)
+        if stats['pruned_nodes']:
+            indptr, indices, stats['pruned_edges'] = prune_nodes(indptr, indices, excluded)
+        return indptr, indices, stats
+    
+    def detect_cycles(self, min_length=3, max_length=5, time_budget=None, max_cycles=None,
+                      workers=1, exclude=None, max_degree=None):
+        """
+        Detect cycles of length 3 to 5 (circular fund routing)
+        Length-bounded Johnson search restricted to strongly connected
+        components; each cycle is reported once, starting at its canonical
+        (first-seen) account. time_budget (seconds) and max_cycles stop the
+        search early; see cycle_stats['truncated']. workers > 1 (or None for
+        all CPUs) searches weakly connected components in a process pool.
+        The search never enters accounts in `exclude` (e.g. legitimate hubs)
+        or nodes above max_degree; cycle_stats reports what was pruned.
+        """
+        indptr, indices, pruned = self._prune(*self._adjacency(), exclude, max_degree)
+        if workers == 1:
+            cycles, self.cycle_stats = find_cycles(
+                indptr, indices, min_length, max_length,
+                time_budget=time_budget, max_cycles=max_cycles)
+        else:
+            cycles, self.cycle_stats = parallel_find_cycles(
+                indptr, indices, min_length, max_length,
+                time_budget=time_budget, max_cycles=max_cycles, workers=workers)
+        self.cycle_stats.update(pruned)
+        return self._label_paths(cycles)
+    
+    def detect_temporal_cycles(self, min_length=3, max_length=5, max_duration_hours=None,
+                               time_budget=None, max_cycles=None, exclude=None,
+                               max_degree=None):
+        """
+        Detect cycles whose transfers happen in order (time-respecting)
+        Each hop needs a transaction later than the previous hop's, and the
+        whole loop must close within max_duration_hours, so loops money
+        could not have flowed around are never reported or explored. The
+        search reads transaction times straight from the store; arguments
+        and cycle_stats otherwise follow detect_cycles (single process).
+        """
+        store = self.store
+        first_rows = store.edge_order[store.edge_offsets[:-1]]
+        edge_src, edge_dst = store.src[first_rows], store.dst[first_rows]
+        num_nodes = store.num_nodes
+        excluded, pruned = self._excluded_nodes(np.bincount(edge_src, minlength=num_nodes),
+                                                np.bincount(edge_dst, minlength=num_nodes),
+                                                exclude, max_degree)
+        pruned['pruned_edges'] = int((excluded[edge_src] | excluded[edge_dst]).sum())
+        
+        # Unparseable timestamps cannot be ordered
+        rows = np.flatnonzero(store.epoch != NAT)
+        max_duration = None if max_duration_hours is None else max_duration_hours * 3600
+        cycles, self.cycle_stats = find_temporal_cycles(
+            store.src[rows], store.dst[rows], store.epoch[rows], num_nodes, min_length,
+            max_length, max_duration, excluded, time_budget, max_cycles)
+        self.cycle_stats.update(pruned)
+        return self._label_paths(cycles)
     
     def detect_fan_in_patterns(self, threshold=10, time_window_hours=72):
         """
         Detect fan-in patterns (smurfing - aggregation)
-        Multiple accounts sending to one aggregator
+        Multiple accounts sending to one aggregator: at least `threshold`
+        distinct senders inside a single time_window_hours window
         """
-        fan_in_accounts = []
-        
-        for node in self.G.nodes():
-            predecessors = list(self.G.predecessors(node))
-            
-            if len(predecessors) >= threshold:
-                # Check temporal clustering
-                incoming_transactions = []
-                for pred in predecessors:
-                    incoming_transactions.extend(
-                        self.G[pred][node]['transactions']
-                    )
-                
-                # Check if transactions are within time window
-                if self._check_temporal_clustering(incoming_transactions, time_window_hours):
-                    fan_in_accounts.append({
-                        'account': node,
-                        'sender_count': len(predecessors),
-                        'senders': predecessors,
-                        'pattern_type': 'fan_in'
-                    })
-        
-        return fan_in_accounts
+        return self._detect_fan_patterns('fan_in', threshold, time_window_hours)
     
     def detect_fan_out_patterns(self, threshold=10, time_window_hours=72):
         """
         Detect fan-out patterns (smurfing - dispersion)
-        One account sending to multiple receivers
+        One account sending to at least `threshold` distinct receivers
+        inside a single time_window_hours window
         """
-        fan_out_accounts = []
+        return self._detect_fan_patterns('fan_out', threshold, time_window_hours)
+    
+    def _detect_fan_patterns(self, pattern_type, threshold, time_window_hours):
+        """Shared sliding-window scan; reports each account's densest window"""
+        indptr, indices = self._adjacency()
+        if pattern_type == 'fan_in':
+            degree = np.bincount(indices, minlength=len(indptr) - 1)
+            node_codes, counterparty_codes = self.store.dst, self.store.src
+        else:
+            degree = np.diff(indptr)
+            node_codes, counterparty_codes = self.store.src, self.store.dst
         
-        for node in self.G.nodes():
-            successors = list(self.G.successors(node))
-            
-            if len(successors) >= threshold:
-                # Check temporal clustering
-                outgoing_transactions = []
-                for succ in successors:
-                    outgoing_transactions.extend(
-                        self.G[node][succ]['transactions']
-                    )
-                
-                if self._check_temporal_clustering(outgoing_transactions, time_window_hours):
-                    fan_out_accounts.append({
-                        'account': node,
-                        'receiver_count': len(successors),
-                        'receivers': successors,
-                        'pattern_type': 'fan_out'
-                    })
+        windows = densest_windows(node_codes, counterparty_codes, self.store.epoch,
+                                  self.store.amounts, degree >= threshold,
+                                  threshold, time_window_hours)
         
-        return fan_out_accounts
+        labels = self._node_labels()
+        return [self._fan_pattern(node, windows[node], pattern_type, labels, indptr, indices)
+                for node in sorted(windows)]
+    
+    def _fan_pattern(self, node, window, pattern_type, labels, indptr=None, indices=None):
+        window['counterparties'] = [labels[c] for c in window['counterparties']]
+        if pattern_type == 'fan_in':
+            count_key, members_key = 'sender_count', 'senders'
+            neighbors = self._predecessor_labels(node, labels)
+        else:
+            count_key, members_key = 'receiver_count', 'receivers'
+            if indptr is None:
+                neighbors = list(self.G.successors(labels[node]))
+            else:
+                neighbors = [labels[v] for v in indices[indptr[node]:indptr[node + 1]].tolist()]
+        return {
+            'account': labels[node],
+            count_key: len(neighbors),
+            members_key: neighbors,
+            'window': window,
+            'pattern_type': pattern_type
+        }
+    
+    def _predecessor_labels(self, node, labels):
+        if self.csr is not None:
+            return [labels[u] for u in self.csr.predecessors(node).tolist()]
+        return list(self.G.predecessors(labels[node]))
     
-    def detect_shell_networks(self, min_chain_length=3, max_transactions=3):
+    def detect_shell_networks(self, min_chain_length=3, max_transactions=3,
+                              max_chain_length=MAX_CHAIN_LENGTH, max_chains=MAX_SHELL_CHAINS,
+                              workers=1, exclude=None):
         """
         Detect layered shell networks
-        Chains of accounts with low transaction counts
+        Maximal chains of accounts with low transaction counts; chains
+        longer than max_chain_length are split into overlapping segments
+        and at most max_chains are kept (see shell_stats). Accounts in
+        `exclude` never join a chain.
         """
-        shell_chains = []
-        visited = set()
-        
-        def find_shell_chain(start, path):
-            current = path[-1]
-            
-            for successor in self.G.successors(current):
-                if successor not in path and successor not in visited:
-                    node_tx_count = self.G.nodes[successor]['transaction_count']
-                    
-                    # Check if intermediate node has low transaction count
-                    if node_tx_count <= max_transactions:
-                        new_path = path + [successor]
-                        
-                        if len(new_path) >= min_chain_length:
-                            shell_chains.append(new_path)
-                        
-                        find_shell_chain(start, new_path)
-        
-        for node in self.G.nodes():
-            if self.G.nodes[node]['transaction_count'] <= max_transactions:
-                find_shell_chain(node, [node])
-                visited.add(node)
-        
-        return shell_chains
-    
-    def _check_temporal_clustering(self, transactions, time_window_hours):
-        """Check if transactions cluster within a time window"""
-        if len(transactions) < 2:
-            return False
-        
-        try:
-            timestamps = []
-            for tx in transactions:
-                ts = tx['timestamp']
-                if isinstance(ts, str):
-                    timestamps.append(datetime.strptime(ts, '%Y-%m-%d %H:%M:%S'))
-                else:
-                    timestamps.append(ts)
-            
-            timestamps.sort()
-            
-            # Check if any consecutive transactions are within the window
-            window = timedelta(hours=time_window_hours)
-            for i in range(len(timestamps) - 1):
-                if timestamps[i + 1] - timestamps[i] <= window:
-                    return True
-            
-            return False
-        except:
-            return True  # Assume suspicious if we can't parse
+        indptr, indices = self._adjacency()
+        low = self._transaction_counts() <= max_transactions
+        pruned = 0
+        if exclude:
+            excluded = self._exclusion_mask(exclude) & low
+            pruned = int(excluded.sum())
+            low &= ~excluded
+        if workers == 1:
+            chains, self.shell_stats = find_shell_chains(
+                indptr, indices, low, min_chain_length, max_chain_length, max_chains)
+        else:
+            chains, self.shell_stats = parallel_find_shell_chains(
+                indptr, indices, low, min_chain_length, max_chain_length, max_chains,
+                workers=workers)
+        self.shell_stats['pruned_nodes'] = pruned
+        return self._label_paths(chains)
     
-    def identify_legitimate_patterns(self):
+    def identify_legitimate_patterns(self, **thresholds):
         """
         Identify potentially legitimate high-volume accounts
         (merchants, payroll) to reduce false positives
+        Whole-array pass over the transaction store, shared by both
+        backends; thresholds are legitimate_mask keyword arguments
         """
-        legitimate_accounts = set()
-        
-        for node in self.G.nodes():
-            in_degree = self.G.in_degree(node)
-            out_degree = self.G.out_degree(node)
-            
-            # High in-degree but low out-degree suggests merchant
-            if in_degree > 20 and out_degree <= 2:
-                legitimate_accounts.add(node)
-            
-            # Consistent amounts suggest payroll
-            if out_degree > 10:
-                amounts = []
-                for succ in self.G.successors(node):
-                    for tx in self.G[node][succ]['transactions']:
-                        amounts.append(tx['amount'])
-                
-                if len(amounts) > 5:
-                    # Check if amounts are similar (std dev < 10% of mean)
-                    mean_amt = np.mean(amounts)
-                    std_amt = np.std(amounts)
-                    if std_amt < 0.1 * mean_amt:
-                        legitimate_accounts.add(node)
-            
-            # Check for merchant-like naming patterns
-            if any(keyword in node.upper() for keyword in 
-                   ['MERCHANT', 'PAYROLL', 'SALARY', 'CORP', 'INC', 'LLC']):
-                legitimate_accounts.add(node)
+        labels = self._node_labels()
+        mask = legitimate_mask(self.store, labels, **thresholds)
+        return {labels[i] for i in np.flatnonzero(mask).tolist()}
+    
+    def graph_arrays(self):
+        """Node and edge aggregates as arrays indexed by node id / edge id"""
+        if self.csr is not None:
+            csr = self.csr
+            return {'node_ids': csr.node_ids, 'total_sent': csr.total_sent,
+                    'total_received': csr.total_received, 'tx_count': csr.tx_count,
+                    'edge_src': csr.edge_src, 'edge_dst': csr.edge_dst,
+                    'edge_weight': csr.edge_weight, 'edge_count': csr.edge_count}
         
-        return legitimate_accounts
+        store = self.store
+        num_nodes = store.num_nodes
+        first_rows = store.edge_order[store.edge_offsets[:-1]]
+        return {
+            'node_ids': np.asarray(self._node_labels(), dtype=object),
+            'total_sent': np.bincount(store.src, weights=store.amounts, minlength=num_nodes),
+            'total_received': np.bincount(store.dst, weights=store.amounts, minlength=num_nodes),
+            'tx_count': np.diff(store.node_offsets),
+            'edge_src': store.src[first_rows],
+            'edge_dst': store.dst[first_rows],
+            'edge_weight': np.bincount(store.edge_codes, weights=store.amounts,
+                                       minlength=store.num_edges),
+            'edge_count': store.edge_counts()
+        }
     
     def get_graph_data(self):
         """Return graph data for visualization"""
+        if self.csr is not None:
+            return self.csr.get_graph_data()
+        
         nodes = []
         edges = []
         
@@ -256,4 +356,290 @@ class GraphAnalyzer:
                 'count': data['count']
             })
         
-        return {'nodes': nodes, 'edges': edges}
\ No newline at end of file
+        return {'nodes': nodes, 'edges': edges}
+    
+    def _ensure_index(self):
+        """Account -> graph id map for incremental updates (built once)"""
+        if self._node_index is None:
+            self._node_list = list(self.G)
+            self._node_index = {node: i for i, node in enumerate(self._node_list)}
+    
+    def append_transactions(self, df):
+        """
+        Add a batch of transactions to the graph in place
+        Node/edge aggregates are updated for touched accounts only and the
+        rows are added to the transaction store's indexes, so the cost
+        follows the batch size (amortized). Returns
+        {'rows', 'new_edges', 'senders', 'receivers'} describing what changed.
+        """
+        if self.csr is not None:
+            raise ValueError("append_transactions requires the 'networkx' backend")
+        batch = df if isinstance(df, TransactionColumns) else encode_frame(df)
+        self._ensure_index()
+        
+        # Batch-local codes -> graph ids (new accounts keep first-appearance order)
+        for node in batch.node_ids.tolist():
+            if node not in self._node_index:
+                self._node_index[node] = len(self._node_list)
+                self._node_list.append(node)
+        mapping = np.fromiter((self._node_index[node] for node in batch.node_ids.tolist()),
+                              dtype=np.int64, count=len(batch.node_ids))
+        src = mapping[batch.src]
+        dst = mapping[batch.dst]
+        num_nodes = len(self._node_list)
+        
+        # Node aggregates over the touched accounts
+        codes = np.empty(2 * len(src), dtype=np.int64)
+        codes[0::2] = src
+        codes[1::2] = dst
+        touched, inverse = np.unique(codes, return_inverse=True)
+        sent = np.bincount(inverse[0::2], weights=batch.amounts, minlength=len(touched))
+        received = np.bincount(inverse[1::2], weights=batch.amounts, minlength=len(touched))
+        counts = np.bincount(inverse, minlength=len(touched))
+        
+        for i, s, r, c in zip(touched.tolist(), sent.tolist(), received.tolist(),
+                              counts.tolist()):
+            node = self._node_list[i]
+            if node in self.G:
+                data = self.G.nodes[node]
+                data['total_sent'] += s
+                data['total_received'] += r
+                data['transaction_count'] += c
+            else:
+                self.G.add_node(node, total_sent=s, total_received=r, transaction_count=c)
+        
+        # Edge aggregates, grouped by (sender, receiver) in first-appearance order;
+        # new pairs get the next edge ids
+        edge_codes, edge_uniques = pd.factorize(src * num_nodes + dst)
+        edge_weight = np.bincount(edge_codes, weights=batch.amounts, minlength=len(edge_uniques))
+        edge_count = np.bincount(edge_codes, minlength=len(edge_uniques))
+        edge_ids = np.empty(len(edge_uniques), dtype=np.int64)
+        num_edges = self.store.num_edges
+        
+        new_edges = []
+        for i, (key, weight, count) in enumerate(zip(edge_uniques.tolist(), edge_weight.tolist(),
+                                                     edge_count.tolist())):
+            u, v = divmod(key, num_nodes)
+            u, v = self._node_list[u], self._node_list[v]
+            if self.G.has_edge(u, v):
+                data = self.G[u][v]
+                data['weight'] += weight
+                data['count'] += count
+            else:
+                self.G.add_edge(u, v, weight=weight, count=count, edge=num_edges)
+                new_edges.append((u, v))
+                num_edges += 1
+            edge_ids[i] = self.G[u][v]['edge']
+        
+        rows = self.store.append(src, dst, batch.amounts, batch.epoch, edge_ids[edge_codes],
+                                 num_nodes, num_edges)
+        
+        return {
+            'rows': rows,
+            'new_edges': new_edges,
+            'senders': batch.node_ids[np.unique(batch.src)].tolist(),
+            'receivers': batch.node_ids[np.unique(batch.dst)].tolist()
+        }
+    
+    def expire_transactions(self, cutoff):
+        """
+        Remove transactions timestamped before `cutoff` (epoch seconds)
+        Node and edge aggregates are decremented by the expired rows; edges
+        and accounts left without transactions are removed, and the store
+        is rebuilt over the remaining rows with ids renumbered, so memory
+        follows what is kept. Rows without a parseable timestamp always
+        expire. Returns {'rows', 'evicted_edges', 'evicted_accounts',
+        'changed'}; changed are remaining accounts whose aggregates dropped.
+        """
+        if self.csr is not None:
+            raise ValueError("expire_transactions requires the 'networkx' backend")
+        self._ensure_index()
+        store = self.store
+        expired = store.epoch < cutoff
+        rows = np.flatnonzero(expired)
+        if not len(rows):
+            return {'rows': 0, 'evicted_edges': [], 'evicted_accounts': [], 'changed': []}
+        src, dst, amounts = store.src[rows], store.dst[rows], store.amounts[rows]
+        
+        # Node aggregates over the accounts the expired rows touched
+        touched, inverse = np.unique(store._endpoint_codes(src, dst), return_inverse=True)
+        sent = np.bincount(inverse[0::2], weights=amounts, minlength=len(touched))
+        received = np.bincount(inverse[1::2], weights=amounts, minlength=len(touched))
+        counts = np.bincount(inverse, minlength=len(touched))
+        
+        evicted_accounts, changed = [], []
+        for i, s, r, c in zip(touched.tolist(), sent.tolist(), received.tolist(),
+                              counts.tolist()):
+            node = self._node_list[i]
+            data = self.G.nodes[node]
+            data['transaction_count'] -= c
+            if data['transaction_count'] == 0:
+                evicted_accounts.append(node)
+            else:
+                data['total_sent'] -= s
+                data['total_received'] -= r
+                changed.append(node)
+        
+        # Edge aggregates; each edge's endpoints come from one of its expired rows
+        edges, edge_inverse = np.unique(store.edge_codes[rows], return_inverse=True)
+        edge_weight = np.bincount(edge_inverse, weights=amounts, minlength=len(edges))
+        edge_count = np.bincount(edge_inverse, minlength=len(edges))
+        first = np.empty(len(edges), dtype=np.int64)
+        first[edge_inverse] = np.arange(len(rows))
+        
+        evicted_edges = []
+        for u, v, weight, count in zip(src[first].tolist(), dst[first].tolist(),
+                                       edge_weight.tolist(), edge_count.tolist()):
+            u, v = self._node_list[u], self._node_list[v]
+            data = self.G[u][v]
+            data['count'] -= count
+            if data['count'] == 0:
+                self.G.remove_edge(u, v)
+                evicted_edges.append((u, v))
+            else:
+                data['weight'] -= weight
+        self.G.remove_nodes_from(evicted_accounts)
+        
+        # Rebuild the store over the kept rows; surviving ids keep their order
+        keep = np.flatnonzero(~expired)
+        node_live = np.ones(store.num_nodes, dtype=bool)
+        node_live[[self._node_index[node] for node in evicted_accounts]] = False
+        edge_live = np.bincount(store.edge_codes[keep], minlength=store.num_edges) > 0
+        node_map = np.cumsum(node_live) - 1
+        edge_map = np.cumsum(edge_live) - 1
+        self.store = store.subset(keep, node_map, int(node_live.sum()),
+                                  edge_map, int(edge_live.sum()))
+        self._node_list = [node for node, live in zip(self._node_list, node_live.tolist())
+                           if live]
+        self._node_index = {node: i for i, node in enumerate(self._node_list)}
+        edge_ids = edge_map.tolist()
+        for _, _, data in self.G.edges(data=True):
+            data['edge'] = edge_ids[data['edge']]
+        
+        return {
+            'rows': len(rows),
+            'evicted_edges': evicted_edges,
+            'evicted_accounts': evicted_accounts,
+            'changed': changed
+        }
+    
+    def detect_cycles_through(self, edges, min_length=3, max_length=5, time_budget=None,
+                              max_cycles=None, exclude=None, max_degree=None):
+        """
+        Cycles of min_length..max_length accounts that use one of `edges`
+        Each cycle is returned once, rotated to start at its first-seen
+        account, so it matches the full detect_cycles output. exclude and
+        max_degree prune the search as in detect_cycles
+        """
+        self._ensure_index()
+        budget = _Budget(time_budget, max_cycles)
+        allowed = None
+        if exclude or max_degree:
+            # Decided once per account: the graph does not change during the search
+            decided = dict.fromkeys(exclude or (), False)
+            
+            def allowed(node):
+                verdict = decided.get(node)
+                if verdict is None:
+                    verdict = decided[node] = not max_degree or max(
+                        len(self.G.succ[node]), len(self.G.pred[node])) <= max_degree
+                return verdict
+        
+        seen = set()
+        cycles = []
+        for u, v in edges:
+            for cycle in cycles_through_edge(self.G.succ, self.G.pred, u, v, self._node_index,
+                                             min_length, max_length, budget, allowed):
+                key = tuple(cycle)
+                if key not in seen:
+                    seen.add(key)
+                    cycles.append(cycle)
+            if budget.truncated:
+                break
+        self.cycle_stats = {'cycles': len(cycles), 'expansions': budget.expansions,
+                            'truncated': budget.truncated}
+        return cycles
+    
+    def detect_fan_patterns_for(self, accounts, pattern_type, threshold=10,
+                                time_window_hours=72):
+        """Fan-in/fan-out check limited to the given accounts"""
+        self._ensure_index()
+        incoming = pattern_type == 'fan_in'
+        store = self.store
+        counterparty_codes = store.src if incoming else store.dst
+        patterns = []
+        for node in sorted(accounts, key=self._node_index.get):
+            degree = self.G.in_degree(node) if incoming else self.G.out_degree(node)
+            if degree < threshold:
+                continue
+            code = self._node_index[node]
+            rows = store.received_rows(code) if incoming else store.sent_rows(code)
+            window = account_window(rows, counterparty_codes, store.epoch, store.amounts,
+                                    threshold, time_window_hours)
+            if window is not None:
+                patterns.append(self._fan_pattern(code, window, pattern_type, self._node_list))
+        return patterns
+    
+    def low_transaction_component(self, accounts, max_transactions=3):
+        """
+        Low-transaction accounts connected to `accounts` through other
+        low-transaction accounts. An account that is not low itself (e.g.
+        one that just crossed max_transactions, splitting its component)
+        contributes its low neighbours
+        """
+        def is_low(node):
+            return self.G.nodes[node]['transaction_count'] <= max_transactions
+        
+        stack = []
+        for node in accounts:
+            if is_low(node):
+                stack.append(node)
+            else:
+                stack.extend(w for w in self.G.succ[node] if is_low(w))
+                stack.extend(w for w in self.G.pred[node] if is_low(w))
+        component = set()
+        while stack:
+            node = stack.pop()
+            if node in component:
+                continue
+            component.add(node)
+            stack.extend(w for w in self.G.succ[node] if w not in component and is_low(w))
+            stack.extend(w for w in self.G.pred[node] if w not in component and is_low(w))
+        return component
+    
+    def detect_shell_networks_near(self, accounts, min_chain_length=3, max_transactions=3,
+                                   max_chain_length=MAX_CHAIN_LENGTH,
+                                   max_chains=MAX_SHELL_CHAINS, component=None):
+        """
+        Shell chains in the low-transaction components containing `accounts`
+        Chains never leave such a component, so re-running the search there
+        gives the same chains the full detect_shell_networks would. A
+        component already computed by low_transaction_component can be
+        passed instead of being searched again
+        """
+        self._ensure_index()
+        if component is None:
+            component = self.low_transaction_component(accounts, max_transactions)
+        if not component:
+            return []
+        
+        members = sorted(component, key=self._node_index.get)
+        local = {node: i for i, node in enumerate(members)}
+        indptr = np.zeros(len(members) + 1, dtype=np.int64)
+        indices = []
+        for i, node in enumerate(members):
+            indices.extend(local[w] for w in self.G.succ[node] if w in local)
+            indptr[i + 1] = len(indices)
+        chains, self.shell_stats = find_shell_chains(
+            indptr, np.array(indices, dtype=np.int64), np.ones(len(members), dtype=bool),
+            min_chain_length, max_chain_length, max_chains)
+        return [[members[i] for i in chain] for chain in chains]
+    
+    def legitimate_subset(self, accounts, **thresholds):
+        """identify_legitimate_patterns restricted to the given accounts"""
+        self._ensure_index()
+        accounts = list(accounts)
+        nodes = np.fromiter((self._node_index[node] for node in accounts), dtype=np.int64,
+                            count=len(accounts))
+        mask = legitimate_mask(self.store, accounts, nodes, **thresholds)
+        return {node for node, legitimate in zip(accounts, mask.tolist()) if legitimate}
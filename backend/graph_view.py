@@ -0,0 +1,228 @@
+"""
+Graph Views for Money Muling Detection
+Bounded visualization payloads. Small graphs are returned whole. Larger
+ones are reduced to the suspicious accounts plus their k-hop
+neighborhoods. Every other account is folded into one "other" super-node
+per transaction-count tier, and edges to and between those accounts are
+aggregated. Node and edge counts are capped, so payload size and
+serialization time do not grow with the input. neighborhood() serves the
+on-demand /api/graph/<account> expansions.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MAX_NODES = 1500
+MAX_EDGES = 4000
+OVERVIEW_HOPS = 1
+NEIGHBORHOOD_HOPS = 2
+MAX_HOPS = 4
+
+# Seeds for the overview when nothing was flagged (busiest accounts)
+FALLBACK_SEEDS = 50
+
+# Upper bounds of the transaction-count tiers used for "other" super-nodes
+TIER_BOUNDS = (2, 4, 8, 16, 32)
+TIER_LABELS = ('1', '2-3', '4-7', '8-15', '16-31', '32+')
+GROUP_PREFIX = 'OTHER_'
+
+
+def suspicious_from_results(results):
+    """{account: {'suspicion_score', 'ring_ids'}} rebuilt from an analysis result"""
+    ring_ids = {}
+    for ring in results['fraud_rings']:
+        for account in ring['member_accounts']:
+            ring_ids.setdefault(account, []).append(ring['ring_id'])
+    return {acc['account_id']: {'suspicion_score': acc['suspicion_score'],
+                                'ring_ids': ring_ids.get(acc['account_id'], [])}
+            for acc in results['suspicious_accounts']}
+
+
+class GraphView:
+    """Visualization payloads over one analyzed graph"""
+
+    def __init__(self, analyzer, suspicious):
+        self.arrays = arrays = analyzer.graph_arrays()
+        self.num_nodes = len(arrays['node_ids'])
+        self.num_edges = len(arrays['edge_src'])
+        self.suspicious = suspicious
+        self._index = pd.Index(np.asarray(arrays['node_ids'], dtype=object))
+
+        codes = self._index.get_indexer(list(suspicious))
+        known = codes >= 0
+        self.scores = np.zeros(self.num_nodes)
+        self.scores[codes[known]] = [entry['suspicion_score'] for entry, ok in
+                                     zip(suspicious.values(), known) if ok]
+        self.is_suspicious = np.zeros(self.num_nodes, dtype=bool)
+        self.is_suspicious[codes[known]] = True
+
+    def overview(self, hops=OVERVIEW_HOPS, max_nodes=MAX_NODES, max_edges=MAX_EDGES):
+        """Whole graph if it fits, else suspicious accounts plus `hops` neighborhoods"""
+        if self.num_nodes <= max_nodes and self.num_edges <= max_edges:
+            return self._payload(np.ones(self.num_nodes, dtype=bool), 'full', 0, False, max_edges)
+
+        seeds = np.flatnonzero(self.is_suspicious)
+        if not len(seeds):
+            seeds = np.argsort(-self.arrays['tx_count'], kind='stable')[:FALLBACK_SEEDS]
+        seeds = seeds[np.argsort(-self.scores[seeds], kind='stable')]
+        truncated = len(seeds) > max_nodes
+        in_view, capped = self._expand(seeds[:max_nodes], hops, max_nodes)
+        return self._payload(in_view, 'reduced', hops, truncated or capped, max_edges)
+
+    def neighborhood(self, account, hops=NEIGHBORHOOD_HOPS, max_nodes=MAX_NODES,
+                     max_edges=MAX_EDGES):
+        """Account plus everything within `hops` (either direction); KeyError if unknown"""
+        code = self._index.get_indexer([account])[0]
+        if code < 0:
+            raise KeyError(account)
+        in_view, truncated = self._expand(np.array([code]), min(hops, MAX_HOPS), max_nodes)
+        payload = self._payload(in_view, 'neighborhood', hops, truncated, max_edges)
+        payload['lod']['center'] = account
+        return payload
+
+    def _expand(self, seeds, hops, max_nodes):
+        """
+        Grow the seed set hop by hop (edges in either direction)
+        When a hop would overflow max_nodes, the neighbors with the largest
+        transfer volume to the current view are kept
+        """
+        src, dst = self.arrays['edge_src'], self.arrays['edge_dst']
+        weight = self.arrays['edge_weight']
+        in_view = np.zeros(self.num_nodes, dtype=bool)
+        in_view[seeds] = True
+        truncated = False
+        for _ in range(hops):
+            room = max_nodes - int(in_view.sum())
+            outgoing = in_view[src] & ~in_view[dst]
+            incoming = in_view[dst] & ~in_view[src]
+            candidates = np.concatenate([dst[outgoing], src[incoming]])
+            if not len(candidates):
+                break
+            if room <= 0:
+                truncated = True
+                break
+            new = np.unique(candidates)
+            if len(new) > room:
+                strength = np.bincount(candidates, minlength=self.num_nodes,
+                                       weights=np.concatenate([weight[outgoing], weight[incoming]]))
+                new = new[np.argsort(-strength[new], kind='stable')[:room]]
+                truncated = True
+            in_view[new] = True
+        return in_view, truncated
+
+    def _payload(self, in_view, mode, hops, truncated, max_edges):
+        arrays = self.arrays
+        n = self.num_nodes
+        labels = arrays['node_ids']
+
+        nodes = []
+        view = np.flatnonzero(in_view)
+        for code, sent, received, count in zip(
+                view.tolist(), arrays['total_sent'][view].tolist(),
+                arrays['total_received'][view].tolist(), arrays['tx_count'][view].tolist()):
+            account = str(labels[code])
+            entry = self.suspicious.get(account)
+            nodes.append({
+                'id': account,
+                'total_sent': round(sent, 2),
+                'total_received': round(received, 2),
+                'transaction_count': count,
+                'is_suspicious': entry is not None,
+                'suspicion_score': entry['suspicion_score'] if entry else 0,
+                'ring_ids': entry['ring_ids'] if entry else []
+            })
+
+        # Accounts outside the view collapse into one super-node per tier
+        tier = np.digitize(arrays['tx_count'], TIER_BOUNDS)
+        outside = ~in_view
+        num_tiers = len(TIER_LABELS)
+        members = np.bincount(tier[outside], minlength=num_tiers)
+        sent = np.bincount(tier[outside], weights=arrays['total_sent'][outside], minlength=num_tiers)
+        received = np.bincount(tier[outside], weights=arrays['total_received'][outside],
+                               minlength=num_tiers)
+        counts = np.bincount(tier[outside], weights=arrays['tx_count'][outside], minlength=num_tiers)
+        for t in np.flatnonzero(members).tolist():
+            nodes.append({
+                'id': GROUP_PREFIX + TIER_LABELS[t],
+                'total_sent': round(float(sent[t]), 2),
+                'total_received': round(float(received[t]), 2),
+                'transaction_count': int(counts[t]),
+                'is_suspicious': False,
+                'suspicion_score': 0,
+                'ring_ids': [],
+                'is_group': True,
+                'member_count': int(members[t])
+            })
+
+        # Edge endpoints: node id inside the view, n + tier outside it
+        src, dst = arrays['edge_src'], arrays['edge_dst']
+        src_code = np.where(in_view[src], src, n + tier[src])
+        dst_code = np.where(in_view[dst], dst, n + tier[dst])
+        keep = src_code != dst_code
+        src_code, dst_code = src_code[keep].astype(np.int64), dst_code[keep].astype(np.int64)
+        pair_codes, pairs = pd.factorize(src_code * (n + num_tiers) + dst_code)
+        weight = np.bincount(pair_codes, weights=arrays['edge_weight'][keep], minlength=len(pairs))
+        count = np.bincount(pair_codes, weights=arrays['edge_count'][keep], minlength=len(pairs))
+        pair_src, pair_dst = pairs // (n + num_tiers), pairs % (n + num_tiers)
+
+        # Edges at suspicious accounts first, then by volume
+        touches_suspicious = np.zeros(len(pairs), dtype=bool)
+        for endpoint in (pair_src, pair_dst):
+            real = endpoint < n
+            touches_suspicious[real] |= self.is_suspicious[endpoint[real]]
+        if len(pairs) > max_edges:
+            order = np.lexsort((-weight, ~touches_suspicious))[:max_edges]
+        else:
+            order = np.arange(len(pairs))
+
+        def label(code):
+            return str(labels[code]) if code < n else GROUP_PREFIX + TIER_LABELS[code - n]
+
+        edges = []
+        for s, d, w, c in zip(pair_src[order].tolist(), pair_dst[order].tolist(),
+                              weight[order].tolist(), count[order].tolist()):
+            edge = {'source': label(s), 'target': label(d), 'weight': round(w, 2), 'count': int(c)}
+            if s >= n or d >= n:
+                edge['aggregated'] = True
+            edges.append(edge)
+
+        return {
+            'nodes': nodes,
+            'edges': edges,
+            'lod': {
+                'mode': mode,
+                'hops': hops,
+                'total_nodes': self.num_nodes,
+                'total_edges': self.num_edges,
+                'shown_nodes': len(view),
+                'grouped_accounts': int(members.sum()),
+                'shown_edges': len(edges),
+                'truncated': bool(truncated or len(pairs) > max_edges)
+            }
+        }
+
+
+class GraphViewCache:
+    """Recent GraphViews by analysis id, for neighborhood requests"""
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key, view):
+        with self._lock:
+            self._views[key] = view
+            self._views.move_to_end(key)
+            while len(self._views) > self.max_entries:
+                self._views.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+            return view
@@ -0,0 +1,46 @@
+"""
+Gunicorn production profile
+    cd backend && gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master (preload_app) and forked, so
+workers boot without re-importing pandas/NumPy/networkx and share those
+pages copy-on-write. Requests are served by threads (gthread): uploads,
+cache hits, job polling and graph lookups mostly wait on I/O or run in
+NumPy, while cycle/shell search runs in the ANALYSIS_WORKERS process
+pool and /api/jobs analyses in the JOB_WORKERS thread pool. That pool is
+started once per worker, on its first parallel search, from a forkserver
+rather than by forking the threaded worker (see parallel_analysis).
+
+Sessions, jobs and graph views live in worker memory, so the default is a
+single worker process. Raise WEB_CONCURRENCY only behind sticky routing;
+the result cache and snapshots can be shared through RESULT_CACHE_DIR and
+SNAPSHOT_DIR.
+"""
+
+import multiprocessing
+import os
+
+cpus = multiprocessing.cpu_count()
+
+# Process pool for cycle/shell search (0 = all CPUs); set before the app is preloaded
+os.environ.setdefault('ANALYSIS_WORKERS', '0')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', max(4, 2 * cpus)))
+preload_app = True
+
+# Large uploads are analyzed inside the request
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def worker_exit(server, worker):
+    # Stop this worker's analysis pool with it
+    from parallel_analysis import shutdown_pools
+    shutdown_pools()
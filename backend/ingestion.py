@@ -0,0 +1,427 @@
+"""
+Transaction Ingestion for Money Muling Detection
+CSV uploads are parsed in fixed-size chunks with pandas' C engine. The
+delimiter is sniffed once on a small prefix. Only the columns the
+detectors use are kept, and each chunk is encoded straight into compact
+columns: int32 account codes, float32 amounts and int64 epoch seconds.
+Peak memory is bounded by the chunk size plus those compact columns,
+whatever the size of the file.
+
+Parquet and Arrow IPC/Feather files are read with pyarrow, when it is
+installed, as the used columns only. Account ids are read
+dictionary-encoded and only the dictionary is mapped onto node ids, so
+no Python string is created per row. Timestamp columns are converted
+to epoch seconds as int64 arrays. A time range skips Parquet row groups
+whose timestamp statistics fall outside it.
+"""
+
+import csv
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from timestamps import NAT, to_epoch_seconds
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+REQUIRED_COLUMNS = ['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp']
+
+# Columns the detectors read (transaction_id is validated but not kept)
+USED_COLUMNS = ['sender_id', 'receiver_id', 'amount', 'timestamp']
+
+CHUNK_ROWS = 500_000
+SNIFF_BYTES = 64 * 1024
+DELIMITERS = ',;\t|'
+
+# Input format by file extension
+INPUT_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet',
+                 '.arrow': 'ipc', '.feather': 'ipc', '.ipc': 'ipc'}
+INPUT_EXTENSIONS = tuple(INPUT_FORMATS)
+
+
+class MissingColumnsError(ValueError):
+    """Upload header lacks one or more required columns"""
+
+    def __init__(self, missing):
+        self.missing = missing
+        super().__init__(f"Missing required columns: {', '.join(missing)}")
+
+
+class InputFormatError(ValueError):
+    """Unsupported or unreadable input file (or its reader is not installed)"""
+
+
+class TransactionColumns:
+    """
+    Transactions encoded as parallel arrays indexed by row position
+    Account ids are assigned dense int32 codes in first-appearance order
+    (sender before receiver), which is the node order of the graph.
+    With a time_range (start, end) in epoch seconds, either end None, only
+    rows with start <= timestamp < end are kept.
+    """
+
+    def __init__(self, amount_dtype=np.float32, time_range=None):
+        self.amount_dtype = amount_dtype
+        self.time_range = time_range
+        self._index = pd.Index([], dtype=object)
+        self._chunks = []
+        self.node_ids = None
+        self.src = self.dst = self.amounts = self.epoch = None
+        self.row_groups = None  # (read, total) for Parquet input
+
+    def __len__(self):
+        return 0 if self.src is None else len(self.src)
+
+    @property
+    def num_nodes(self):
+        return len(self._index)
+
+    def add_chunk(self, senders, receivers, amounts, timestamps):
+        """Encode one chunk of rows and append it"""
+        epoch = to_epoch_seconds(timestamps)
+        amounts = np.asarray(amounts, dtype=self.amount_dtype)
+        keep = self._in_range(epoch)
+        if keep is not None:
+            senders, receivers = np.asarray(senders)[keep], np.asarray(receivers)[keep]
+            amounts, epoch = amounts[keep], epoch[keep]
+        num_rows = len(senders)
+        endpoints = np.empty(2 * num_rows, dtype=object)
+        endpoints[0::2] = senders
+        endpoints[1::2] = receivers
+        codes, uniques = pd.factorize(endpoints, use_na_sentinel=False)
+        codes = self._global_ids(uniques)[codes]
+
+        self._chunks.append((codes[0::2], codes[1::2], amounts, epoch))
+
+    def add_encoded(self, senders, sender_values, receivers, receiver_values, amounts, epoch):
+        """
+        Append a chunk whose account ids are dictionary-encoded: integer
+        codes into per-column value arrays (e.g. Arrow dictionaries)
+        Only the values of codes in use are looked up, and new accounts get
+        ids in the same first-appearance order as add_chunk
+        """
+        amounts = np.asarray(amounts, dtype=self.amount_dtype)
+        keep = self._in_range(epoch)
+        if keep is not None:
+            senders, receivers = senders[keep], receivers[keep]
+            amounts, epoch = amounts[keep], epoch[keep]
+
+        # Dictionary entries (receiver entries offset past the sender ones) in
+        # the interleaved sender, receiver row order of add_chunk
+        offset = len(sender_values)
+        entries = np.empty(2 * len(senders), dtype=np.int64)
+        entries[0::2] = senders
+        entries[1::2] = receivers
+        entries[1::2] += offset
+        used = pd.unique(entries)
+        values = np.concatenate([sender_values, receiver_values])
+        codes, uniques = pd.factorize(values[used], use_na_sentinel=False)
+        ids = np.zeros(len(values), dtype=np.int32)
+        ids[used] = self._global_ids(uniques)[codes]
+
+        self._chunks.append((ids[:offset][senders], ids[offset:][receivers], amounts,
+                             np.asarray(epoch, dtype=np.int64)))
+
+    def add_columns(self, other):
+        """Append already encoded TransactionColumns (e.g. another file's)"""
+        mapped = self._global_ids(other.node_ids)
+        self._chunks.append((mapped[other.src], mapped[other.dst],
+                             np.asarray(other.amounts, dtype=self.amount_dtype), other.epoch))
+
+    def _global_ids(self, uniques):
+        """Global int32 ids of account ids, appending unseen accounts"""
+        mapped = self._index.get_indexer(uniques)
+        new = mapped < 0
+        mapped[new] = len(self._index) + np.arange(new.sum())
+        if new.any():
+            self._index = self._index.append(pd.Index(uniques[new], dtype=object))
+        return mapped.astype(np.int32)
+
+    def _in_range(self, epoch):
+        """Mask of rows inside time_range (unparseable timestamps are outside), or None"""
+        if self.time_range is None:
+            return None
+        start, end = self.time_range
+        keep = epoch != NAT
+        if start is not None:
+            keep &= epoch >= start
+        if end is not None:
+            keep &= epoch < end
+        return keep
+
+    def finish(self):
+        """Concatenate the encoded chunks into the final arrays"""
+        chunks = self._chunks or [(np.empty(0, np.int32), np.empty(0, np.int32),
+                                   np.empty(0, self.amount_dtype), np.empty(0, np.int64))]
+        self.src, self.dst, self.amounts, self.epoch = (
+            np.concatenate(parts) for parts in zip(*chunks))
+        self._chunks = []
+        self.node_ids = self._index.to_numpy()
+        return self
+
+
+def encode_frame(df, amount_dtype=np.float64):
+    """Encode an in-memory DataFrame in one chunk"""
+    columns = TransactionColumns(amount_dtype=amount_dtype)
+    columns.add_chunk(df['sender_id'].to_numpy(), df['receiver_id'].to_numpy(),
+                      df['amount'].to_numpy(), df['timestamp'])
+    return columns.finish()
+
+
+def sniff_header(stream, sample_bytes=SNIFF_BYTES):
+    """
+    Detect the delimiter and header from a prefix of a seekable binary stream
+    The stream is rewound afterwards
+    """
+    sample = stream.read(sample_bytes)
+    stream.seek(0)
+    if isinstance(sample, bytes):
+        sample = sample.decode('utf-8', errors='ignore')
+    sample = sample.lstrip('\ufeff')
+    if not sample.strip():
+        raise pd.errors.EmptyDataError('No columns to parse from file')
+
+    # Only sniff complete lines
+    lines = sample.splitlines()
+    if len(sample) >= sample_bytes and len(lines) > 1:
+        lines = lines[:-1]
+    try:
+        delimiter = csv.Sniffer().sniff('\n'.join(lines), delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        delimiter = ','
+
+    header = [name.strip() for name in next(csv.reader(lines[:1], delimiter=delimiter))]
+    return delimiter, header
+
+
+def read_transactions(stream, chunk_rows=CHUNK_ROWS, amount_dtype=np.float32, time_range=None):
+    """
+    Parse a CSV upload chunk by chunk into TransactionColumns
+    Raises MissingColumnsError when required columns are absent and
+    pandas.errors.EmptyDataError for an empty upload
+    """
+    if not hasattr(stream, 'seek') or not stream.seekable():
+        stream = io.BytesIO(stream.read())
+
+    delimiter, header = sniff_header(stream)
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing:
+        raise MissingColumnsError(missing)
+
+    reader = pd.read_csv(
+        stream,
+        sep=delimiter,
+        engine='c',
+        usecols=lambda name: name.strip() in USED_COLUMNS,
+        dtype={'sender_id': object, 'receiver_id': object, 'timestamp': object},
+        chunksize=chunk_rows,
+        on_bad_lines='skip',
+        encoding_errors='ignore',
+    )
+
+    columns = TransactionColumns(amount_dtype=amount_dtype, time_range=time_range)
+    with reader:
+        for chunk in reader:
+            chunk.columns = [name.strip() for name in chunk.columns]
+            columns.add_chunk(chunk['sender_id'].to_numpy(), chunk['receiver_id'].to_numpy(),
+                              pd.to_numeric(chunk['amount']).to_numpy(),
+                              chunk['timestamp'])
+    return columns.finish()
+
+
+def parse_time_range(start=None, end=None):
+    """
+    (start, end) epoch seconds from timestamps or epoch-second strings,
+    either may be None; None when neither is given
+    Raises ValueError for unparseable values or an empty range
+    """
+    if start in (None, '') and end in (None, ''):
+        return None
+    bounds = []
+    for value in (start, end):
+        if value in (None, ''):
+            bounds.append(None)
+        elif str(value).lstrip('-').isdigit():
+            bounds.append(int(value))
+        else:
+            epoch = int(to_epoch_seconds([value])[0])
+            if epoch == NAT:
+                raise ValueError(f"Unparseable timestamp '{value}'")
+            bounds.append(epoch)
+    if None not in bounds and bounds[0] >= bounds[1]:
+        raise ValueError('The time range start must be before its end')
+    return tuple(bounds)
+
+
+def input_format(filename):
+    """'csv', 'parquet' or 'ipc' from a file name's extension, None if unsupported"""
+    return INPUT_FORMATS.get(os.path.splitext(str(filename))[1].lower())
+
+
+def read_input(source, filename=None, chunk_rows=CHUNK_ROWS, amount_dtype=np.float32,
+               time_range=None):
+    """
+    Read a CSV, Parquet or Arrow IPC/Feather file (path or seekable binary
+    stream) into TransactionColumns; the format comes from the extension of
+    filename (default: the path)
+    """
+    name = source if filename is None else filename
+    input_type = input_format(name)
+    if input_type is None:
+        raise InputFormatError(f"Unsupported file type: {os.path.basename(str(name))}")
+    if input_type != 'csv':
+        return read_columnar(source, input_type, amount_dtype, time_range)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as stream:
+            return read_transactions(stream, chunk_rows, amount_dtype, time_range)
+    return read_transactions(source, chunk_rows, amount_dtype, time_range)
+
+
+def read_columnar(source, input_type='parquet', amount_dtype=np.float32, time_range=None):
+    """
+    Read a Parquet ('parquet') or Arrow IPC/Feather ('ipc') file into
+    TransactionColumns, reading only the used columns
+    Raises MissingColumnsError when required columns are absent and
+    InputFormatError for unreadable files or when pyarrow is missing
+    """
+    if pa is None:
+        raise InputFormatError('Parquet and Arrow files need pyarrow (pip install pyarrow)')
+    columns = TransactionColumns(amount_dtype=amount_dtype, time_range=time_range)
+    try:
+        if input_type == 'parquet':
+            table = _read_parquet(source, columns)
+        else:
+            table = _read_ipc(source)
+        # One dictionary per account column, so accounts are mapped to node ids once
+        table = _encode_accounts(table).unify_dictionaries()
+        columns.add_encoded(*_account_codes(table.column('sender_id')),
+                            *_account_codes(table.column('receiver_id')),
+                            table.column('amount').cast(pa.float64()).to_numpy(),
+                            _arrow_epoch(table.column('timestamp')))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError, OSError) as e:
+        raise InputFormatError(f'Unreadable {input_type} file: {e}') from e
+    return columns.finish()
+
+
+def _check_columns(names):
+    missing = [col for col in REQUIRED_COLUMNS if col not in names]
+    if missing:
+        raise MissingColumnsError(missing)
+
+
+def _read_parquet(source, columns):
+    """
+    Used columns of a Parquet file, account ids kept dictionary-encoded,
+    skipping row groups outside columns.time_range
+    """
+    parquet = pq.ParquetFile(source, read_dictionary=['sender_id', 'receiver_id'])
+    schema = parquet.schema_arrow
+    _check_columns(schema.names)
+    groups = list(range(parquet.num_row_groups))
+    if columns.time_range is not None:
+        field = schema.get_field_index('timestamp')
+        scale = _epoch_scale(schema.field(field).type)
+        if scale is not None:
+            # Statistics are indexed by leaf column, which matches a flat schema
+            leaf = parquet.schema.names.index('timestamp')
+            groups = [i for i in groups
+                      if _may_overlap(parquet.metadata.row_group(i).column(leaf).statistics,
+                                      scale, columns.time_range)]
+    columns.row_groups = (len(groups), parquet.num_row_groups)
+    return parquet.read_row_groups(groups, columns=USED_COLUMNS)
+
+
+def _read_ipc(source):
+    """
+    Used columns of an Arrow IPC file (Feather v2) or stream; paths are
+    memory-mapped, so the other columns are never read
+    """
+    if isinstance(source, (str, os.PathLike)):
+        source = pa.memory_map(str(source))
+    try:
+        reader = pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        source.seek(0)
+        reader = pa.ipc.open_stream(source)
+    _check_columns(reader.schema.names)
+    return reader.read_all().select(USED_COLUMNS)
+
+
+def _encode_accounts(table):
+    """Account id columns dictionary-encoded (nulls as an entry), with string values"""
+    for name in ('sender_id', 'receiver_id'):
+        column = table.column(name)
+        if pa.types.is_dictionary(column.type) and column.null_count:
+            column = column.cast(column.type.value_type)
+        if not pa.types.is_dictionary(column.type):
+            column = pc.dictionary_encode(column, null_encoding='encode')
+        value_type = column.type.value_type
+        if not (pa.types.is_string(value_type) or pa.types.is_large_string(value_type)):
+            column = column.cast(pa.dictionary(column.type.index_type, pa.string()))
+        table = table.set_column(table.schema.get_field_index(name), name, column)
+    return table
+
+
+# Epoch seconds per unit of Arrow timestamp types
+_SECONDS_PER_UNIT = {'s': 1, 'ms': 10**3, 'us': 10**6, 'ns': 10**9}
+
+
+def _epoch_scale(arrow_type):
+    """
+    (multiplier, divisor) from the integer values of a temporal Arrow type to
+    epoch seconds; integer columns are taken as epoch seconds. None for other
+    types (e.g. timestamp strings)
+    """
+    if pa.types.is_timestamp(arrow_type):
+        return 1, _SECONDS_PER_UNIT[arrow_type.unit]
+    if pa.types.is_date32(arrow_type):
+        return 86400, 1
+    if pa.types.is_date64(arrow_type):
+        return 1, 1000
+    if pa.types.is_integer(arrow_type):
+        return 1, 1
+    return None
+
+
+def _may_overlap(statistics, scale, time_range):
+    """Whether a row group's timestamp statistics allow rows inside time_range"""
+    if statistics is None or not statistics.has_min_max:
+        return True
+    if not isinstance(statistics.min_raw, int):
+        return True
+    multiplier, divisor = scale
+    low = statistics.min_raw * multiplier // divisor
+    high = statistics.max_raw * multiplier // divisor
+    start, end = time_range
+    return (start is None or high >= start) and (end is None or low < end)
+
+
+def _account_codes(column):
+    """(int codes, object values) of a column with one dictionary, without decoding its rows"""
+    if column.num_chunks == 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=object)
+    codes = pa.chunked_array([chunk.indices for chunk in column.chunks], column.type.index_type)
+    return codes.to_numpy(), column.chunk(0).dictionary.to_numpy(zero_copy_only=False)
+
+
+def _arrow_epoch(array):
+    """int64 epoch seconds of a timestamp column (NAT for nulls and unparseable values)"""
+    scale = _epoch_scale(array.type)
+    if scale is None:
+        return to_epoch_seconds(array.to_pandas())
+    if pa.types.is_date(array.type):
+        array = array.cast(pa.timestamp('s'))
+        multiplier, divisor = 1, 1
+    else:
+        multiplier, divisor = scale
+    values = pc.fill_null(array.cast(pa.int64()), NAT).to_numpy()
+    if multiplier == divisor == 1:
+        return values
+    return np.where(values != NAT, values * multiplier // divisor, NAT)
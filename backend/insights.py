@@ -0,0 +1,272 @@
+"""
+Background AI Insights for Money Muling Detection
+A short forensic summary of the detected rings is written by a pluggable
+provider (Gemini, or a local stub) on a small thread pool, off the
+analysis request: /api/analyze only returns an insight id and the text is
+fetched from /api/insights/<id> once ready. Insights are memoized on a
+digest of the ring/pattern facts in the prompt, so identical summaries
+share one model call. Each insight has a hard deadline, counted from
+when it was requested: past it the insight is reported as timed out,
+whether it was still queued or running, and a late result is discarded.
+Providers get the remaining time and pass it on as their request
+timeout, so a slow call frees its pool slot; a call keeps the slot until
+it actually returns, so at most max_concurrent provider calls are ever
+in flight.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+INSIGHT_TIMEOUT_SECONDS = 20
+MAX_CONCURRENT_CALLS = 2
+MAX_INSIGHTS = 256
+GEMINI_MODEL = 'gemini-1.5-flash'
+
+
+class InsightProvider(ABC):
+    """Writes insight text for a prompt"""
+
+    name = 'provider'
+
+    @abstractmethod
+    def generate(self, prompt, timeout):
+        """
+        Insight text; should give up (raise) after timeout seconds, the time
+        left before InsightService reports the insight as timed out
+        """
+
+
+class GeminiProvider(InsightProvider):
+    """
+    Google Gemini; google.generativeai is imported and configured on first
+    use, since it is the slowest import in the app and only needed once
+    rings are found
+    """
+
+    name = 'gemini'
+
+    def __init__(self, api_key, model=GEMINI_MODEL):
+        self.api_key = api_key
+        self.model = model
+        self._genai = None
+        self._lock = threading.Lock()
+
+    def _client(self):
+        with self._lock:
+            if self._genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                self._genai = genai
+        return self._genai
+
+    def generate(self, prompt, timeout):
+        model = self._client().GenerativeModel(self.model)
+        return model.generate_content(prompt, request_options={'timeout': timeout}).text
+
+
+class StaticProvider(InsightProvider):
+    """
+    Local stand-in for tests and offline use: returns text (or text(prompt)
+    when callable) after an optional delay, without any network call. Like
+    a real client, it raises TimeoutError when the delay exceeds the timeout
+    """
+
+    name = 'static'
+
+    def __init__(self, text='AI insight (local stub)', delay_seconds=0):
+        self.text = text
+        self.delay_seconds = delay_seconds
+
+    def generate(self, prompt, timeout):
+        if self.delay_seconds:
+            time.sleep(min(self.delay_seconds, timeout))
+            if self.delay_seconds > timeout:
+                raise TimeoutError(f'No response within {timeout:g}s')
+        return self.text(prompt) if callable(self.text) else self.text
+
+
+def provider_from_env(environ=None):
+    """
+    Provider named by INSIGHT_PROVIDER: 'gemini' (the default when
+    GOOGLE_API_KEY is set), 'static' or 'none'; None when insights are off
+    """
+    environ = os.environ if environ is None else environ
+    api_key = environ.get('GOOGLE_API_KEY')
+    name = environ.get('INSIGHT_PROVIDER', 'gemini' if api_key else 'none').lower()
+    if name == 'gemini' and api_key:
+        return GeminiProvider(api_key, environ.get('GEMINI_MODEL', GEMINI_MODEL))
+    if name == 'static':
+        return StaticProvider()
+    return None
+
+
+def insight_facts(rings, summary):
+    """The ring/pattern facts an insight is written from (and memoized by)"""
+    return {
+        'ring_count': len(rings),
+        'pattern_types': sorted({ring['pattern_type'] for ring in rings}),
+        'total_accounts': summary['total_accounts_analyzed'],
+        'suspicious_accounts': summary['suspicious_accounts_flagged']
+    }
+
+
+def insight_id(facts):
+    return hashlib.sha256(json.dumps(facts, sort_keys=True).encode()).hexdigest()
+
+
+def insight_prompt(facts):
+    patterns = ', '.join(facts['pattern_types'])
+    return f"""
+    As a Financial Forensics Expert, analyze these money muling detection results:
+    - Total rings detected: {facts['ring_count']}
+    - Pattern types found: {patterns}
+    - Total accounts analyzed: {facts['total_accounts']}
+    - Suspicious accounts flagged: {facts['suspicious_accounts']}
+
+    Provide a professional, brief (2-3 sentence) forensic summary of the risk levels and what these specific patterns (like {patterns}) usually indicate in a real-world money laundering context.
+    """
+
+
+class Insight:
+    def __init__(self, key, facts, timeout_seconds):
+        self.insight_id = key
+        self.facts = facts
+        self.status = 'queued'
+        self.text = None
+        self.error = None
+        self.created_at = time.time()
+        self.deadline = self.created_at + timeout_seconds
+        self.started_at = None
+        self.finished_at = None
+        # True until the pool task returns, even after the insight timed out
+        self.in_flight = True
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed', 'timeout')
+
+    def to_dict(self):
+        seconds = None
+        if self.finished_at is not None:
+            seconds = round(self.finished_at - self.created_at, 3)
+        return {
+            'insight_id': self.insight_id,
+            'status': self.status,
+            'insight': self.text,
+            'error': self.error,
+            'created_at': self.created_at,
+            'seconds': seconds
+        }
+
+
+class InsightService:
+    """
+    Memoized background insight generation
+    Provider calls run on a pool of max_concurrent threads; the max_entries
+    most recently requested insights are kept
+    """
+
+    def __init__(self, provider, timeout_seconds=INSIGHT_TIMEOUT_SECONDS,
+                 max_concurrent=MAX_CONCURRENT_CALLS, max_entries=MAX_INSIGHTS):
+        self.provider = provider
+        self.timeout_seconds = timeout_seconds
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent,
+                                            thread_name_prefix='ai-insight')
+        self._insights = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.provider is not None
+
+    def request(self, rings, summary):
+        """
+        Insight id for analysis results, starting generation unless the same
+        facts are already memoized (done or in progress); failed and timed
+        out insights are retried, once their previous call has returned.
+        None when no provider is configured
+        """
+        if not self.enabled:
+            return None
+        facts = insight_facts(rings, summary)
+        key = insight_id(facts)
+        with self._lock:
+            self._expire_calls()
+            insight = self._insights.get(key)
+            if insight is not None and (insight.in_flight or insight.status == 'done'):
+                self._insights.move_to_end(key)
+                return key
+            insight = self._insights[key] = Insight(key, facts, self.timeout_seconds)
+            self._insights.move_to_end(key)
+            self._evict()
+        self._executor.submit(self._run, insight, self.provider)
+        return key
+
+    def _run(self, insight, provider):
+        """Pool task: one provider call, given the time left before the deadline"""
+        try:
+            with self._lock:
+                self._expire_calls()
+                if insight.status != 'queued':
+                    return  # timed out while waiting for a slot
+                insight.status = 'running'
+                insight.started_at = time.time()
+            try:
+                timeout = max(0.0, insight.deadline - insight.started_at)
+                text, error = provider.generate(insight_prompt(insight.facts), timeout), None
+            except Exception as e:
+                traceback.print_exc()
+                text, error = None, str(e)
+            with self._lock:
+                self._expire_calls()
+                if insight.status != 'running':
+                    return  # a late result is dropped
+                insight.finished_at = time.time()
+                if error is not None:
+                    insight.status = 'failed'
+                    insight.error = error
+                else:
+                    insight.status = 'done'
+                    insight.text = text
+        finally:
+            insight.in_flight = False
+
+    def _expire_calls(self):
+        """Mark queued or running insights past their deadline as timed out (lock held)"""
+        now = time.time()
+        for insight in self._insights.values():
+            if not insight.finished and now > insight.deadline:
+                insight.status = 'timeout'
+                insight.finished_at = insight.deadline
+                insight.error = f'No response within {self.timeout_seconds:g}s'
+
+    def get(self, key):
+        with self._lock:
+            self._expire_calls()
+            return self._insights.get(key)
+
+    def stats(self):
+        with self._lock:
+            self._expire_calls()
+            counts = {}
+            for insight in self._insights.values():
+                counts[insight.status] = counts.get(insight.status, 0) + 1
+            return {'provider': self.provider.name if self.enabled else None,
+                    'timeout_seconds': self.timeout_seconds, 'insights': counts}
+
+    def _evict(self):
+        """Forget the least recently requested finished insights beyond max_entries"""
+        excess = len(self._insights) - self.max_entries
+        for key in [key for key, insight in self._insights.items() if insight.finished]:
+            if excess <= 0:
+                break
+            del self._insights[key]
+            excess -= 1
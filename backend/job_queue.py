@@ -0,0 +1,143 @@
+"""
+In-Process Job Queue for Money Muling Detection
+Long analyses run in a bounded background thread pool instead of inside
+the request. Each job records per-stage progress for polling. No external
+broker is needed. Jobs live in the memory of the process that accepted
+them.
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 2
+MAX_QUEUED = 16
+JOB_TTL_SECONDS = 3600
+
+
+class QueueFullError(RuntimeError):
+    """Too many jobs are queued or running"""
+
+
+class Job:
+    def __init__(self, stages):
+        self.job_id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.stage = None
+        self.stages = OrderedDict((name, {'status': 'pending', 'seconds': None})
+                                  for name in stages)
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._stage_started = None
+        self._lock = threading.Lock()
+
+    def advance(self, stage):
+        """Mark the current stage done and `stage` running (progress callback)"""
+        with self._lock:
+            self._close_stage()
+            self.stage = stage
+            self._stage_started = time.time()
+            self.stages.setdefault(stage, {'status': 'pending', 'seconds': None})
+            self.stages[stage]['status'] = 'running'
+
+    def _close_stage(self):
+        if self.stage is not None and self.stages[self.stage]['status'] == 'running':
+            self.stages[self.stage].update(
+                status='done', seconds=round(time.time() - self._stage_started, 3))
+
+    def finish(self, status, result=None, error=None):
+        with self._lock:
+            self._close_stage()
+            if status == 'done':
+                for info in self.stages.values():
+                    if info['status'] == 'pending':
+                        info['status'] = 'skipped'
+            self.status = status
+            self.result = result
+            self.error = error
+            self.stage = None
+            self.finished_at = time.time()
+
+    def to_dict(self, include_result=True):
+        with self._lock:
+            done = sum(info['status'] in ('done', 'skipped') for info in self.stages.values())
+            job = {
+                'job_id': self.job_id,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': round(done / len(self.stages), 3) if self.stages else 0.0,
+                'stages': [dict(name=name, **info) for name, info in self.stages.items()],
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'error': self.error
+            }
+            if include_result and self.status == 'done':
+                job['result'] = self.result
+            return job
+
+
+class JobQueue:
+    """Bounded thread pool plus a registry of recent jobs"""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_queued=MAX_QUEUED,
+                 ttl_seconds=JOB_TTL_SECONDS):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='analysis-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, stages=()):
+        """
+        Run fn(job, *args) in the background and return the Job
+        fn's return value becomes job.result; raises QueueFullError when
+        max_queued jobs are already waiting or running
+        """
+        job = Job(stages)
+        with self._lock:
+            self._expire()
+            if self.active() >= self.max_queued:
+                raise QueueFullError(f'Job queue is full ({self.max_queued} jobs pending)')
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.finish('done', result=fn(job, *args))
+        except Exception as e:
+            traceback.print_exc()
+            job.finish('failed', error=str(e))
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self):
+        return sum(job.status in ('queued', 'running') for job in self._jobs.values())
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {'max_workers': self.max_workers, 'max_queued': self.max_queued,
+                    'jobs': counts}
+
+    def _expire(self):
+        """Forget finished jobs older than ttl_seconds"""
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [jid for jid, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
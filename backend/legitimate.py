@@ -0,0 +1,98 @@
+"""
+Legitimate Account Heuristics for Money Muling Detection
+Merchant-, payroll- and business-like accounts are excluded from rings to
+reduce false positives. Every heuristic is evaluated for all accounts at
+once: degrees are counted per distinct edge, amount statistics come from
+grouped sums over the sender column, and names are matched with one
+compiled regex. Both graph backends share this code.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+LEGITIMATE_KEYWORDS = ('MERCHANT', 'PAYROLL', 'SALARY', 'CORP', 'INC', 'LLC')
+
+# Default thresholds (overridable per analysis, see detection_engine.DEFAULT_PARAMETERS)
+MERCHANT_IN_DEGREE = 20       # merchant: more distinct senders than this...
+MERCHANT_OUT_DEGREE = 2       # ...and at most this many distinct receivers
+PAYROLL_OUT_DEGREE = 10       # payroll: more distinct receivers than this...
+PAYROLL_MAX_VARIATION = 0.1   # ...and sent amounts' std below this fraction of their mean
+PAYROLL_MIN_TRANSACTIONS = 5  # (more sent transactions than this)
+
+
+def keyword_pattern(keywords=LEGITIMATE_KEYWORDS):
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+
+
+def degrees(store):
+    """(in_degree, out_degree): distinct senders and receivers per node"""
+    first_rows = store.edge_order[store.edge_offsets[:-1]]
+    return (np.bincount(store.dst[first_rows], minlength=store.num_nodes),
+            np.bincount(store.src[first_rows], minlength=store.num_nodes))
+
+
+def sent_amount_stats(store):
+    """(count, mean, population std) of the amounts each node sent"""
+    src, amounts = store.src, store.amounts
+    count = np.bincount(src, minlength=store.num_nodes)
+    mean = np.bincount(src, weights=amounts, minlength=store.num_nodes) / np.maximum(count, 1)
+    squares = np.bincount(src, weights=(amounts - mean[src]) ** 2, minlength=store.num_nodes)
+    return count, mean, np.sqrt(squares / np.maximum(count, 1))
+
+
+def account_stats(store, nodes):
+    """
+    degrees() and sent_amount_stats() for the node ids in `nodes` only,
+    read from their rows in the node index (cost follows their degree)
+    """
+    rows, owner = store.nodes_rows(nodes)
+    # A self-transfer is listed twice (as sender and receiver), next to itself
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (owner[1:] != owner[:-1])
+    rows, owner = rows[first], owner[first]
+    node = nodes[owner]
+    src, dst = store.src[rows], store.dst[rows]
+
+    def distinct(received, counterparty):
+        pairs = np.unique(owner[received] * np.int64(store.num_nodes) + counterparty[received])
+        return np.bincount(pairs // store.num_nodes, minlength=len(nodes))
+
+    sent = src == node
+    in_degree = distinct(dst == node, src)
+    out_degree = distinct(sent, dst)
+    amounts = store.amounts[rows[sent]]
+    count = np.bincount(owner[sent], minlength=len(nodes))
+    mean = np.bincount(owner[sent], weights=amounts, minlength=len(nodes)) / np.maximum(count, 1)
+    squares = np.bincount(owner[sent], weights=(amounts - mean[owner[sent]]) ** 2,
+                          minlength=len(nodes))
+    return in_degree, out_degree, count, mean, np.sqrt(squares / np.maximum(count, 1))
+
+
+def legitimate_mask(store, labels, nodes=None, merchant_in_degree=MERCHANT_IN_DEGREE,
+                    merchant_out_degree=MERCHANT_OUT_DEGREE,
+                    payroll_out_degree=PAYROLL_OUT_DEGREE,
+                    payroll_max_variation=PAYROLL_MAX_VARIATION,
+                    keywords=LEGITIMATE_KEYWORDS):
+    """
+    Boolean mask of legitimate-looking accounts, for all nodes or the
+    integer node ids in `nodes`; labels are the account ids of those nodes
+    """
+    if nodes is None:
+        in_degree, out_degree = degrees(store)
+        sent_count, mean, std = sent_amount_stats(store)
+    else:
+        in_degree, out_degree, sent_count, mean, std = account_stats(store, np.asarray(nodes))
+
+    # High in-degree but low out-degree suggests merchant
+    legitimate = (in_degree > merchant_in_degree) & (out_degree <= merchant_out_degree)
+
+    # Consistent amounts suggest payroll
+    legitimate |= ((out_degree > payroll_out_degree) & (sent_count > PAYROLL_MIN_TRANSACTIONS)
+                   & (std < payroll_max_variation * mean))
+
+    # Merchant-like naming patterns
+    names = pd.Series(np.asarray(labels, dtype=object), dtype=object).astype(str)
+    legitimate |= names.str.contains(keyword_pattern(keywords), regex=True).to_numpy(dtype=bool)
+    return legitimate
@@ -0,0 +1,152 @@
+"""
+Stage Metrics for Money Muling Detection
+StageRecorder times each pipeline stage of one request: wall time, RSS
+growth, peak-RSS growth and item counts. Every finished stage is also
+folded into a process-wide registry. The registry is exposed as
+Prometheus counters and histograms.
+"""
+
+import bisect
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+# Histogram bucket upper bounds in seconds
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def memory_usage():
+    """(current RSS, peak RSS) of this process in bytes; (0, 0) where unavailable"""
+    if resource is None:
+        return 0, 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        peak *= 1024  # Linux reports kilobytes
+    try:
+        with open('/proc/self/statm') as statm:
+            current = int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        current = peak
+    return current, peak
+
+
+class MetricsRegistry:
+    """Thread-safe per-stage histograms and item counters"""
+
+    def __init__(self, buckets=SECONDS_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._seconds = {}
+        self._items = {}
+        self._peak_rss = {}
+
+    def observe(self, stage, seconds, counts, peak_rss_delta):
+        with self._lock:
+            hist = self._seconds.setdefault(
+                stage, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                hist['buckets'][index] += 1
+            hist['sum'] += seconds
+            hist['count'] += 1
+            self._peak_rss[stage] = max(self._peak_rss.get(stage, 0), peak_rss_delta)
+            for item, value in counts.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    key = (stage, item)
+                    self._items[key] = self._items.get(key, 0) + value
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                stage: {
+                    'count': hist['count'],
+                    'seconds_sum': round(hist['sum'], 6),
+                    'max_peak_rss_delta_mb': round(self._peak_rss.get(stage, 0) / MB, 1),
+                    'items': {item: value for (s, item), value in self._items.items() if s == stage}
+                }
+                for stage, hist in self._seconds.items()
+            }
+
+    def render_prometheus(self, gauges=None):
+        """Prometheus text exposition; gauges adds {name: value} extras"""
+        lines = ['# HELP analysis_stage_seconds Wall time per analysis stage',
+                 '# TYPE analysis_stage_seconds histogram']
+        with self._lock:
+            for stage, hist in sorted(self._seconds.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, hist['buckets']):
+                    cumulative += count
+                    lines.append(f'analysis_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'analysis_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist["count"]}')
+                lines.append(f'analysis_stage_seconds_sum{{stage="{stage}"}} {hist["sum"]:.6f}')
+                lines.append(f'analysis_stage_seconds_count{{stage="{stage}"}} {hist["count"]}')
+
+            lines += ['# HELP analysis_stage_items_total Items processed per analysis stage',
+                      '# TYPE analysis_stage_items_total counter']
+            for (stage, item), value in sorted(self._items.items()):
+                lines.append(f'analysis_stage_items_total{{stage="{stage}",item="{item}"}} {value}')
+
+            lines += ['# HELP analysis_stage_peak_rss_delta_bytes Largest peak-RSS growth seen per stage',
+                      '# TYPE analysis_stage_peak_rss_delta_bytes gauge']
+            for stage, value in sorted(self._peak_rss.items()):
+                lines.append(f'analysis_stage_peak_rss_delta_bytes{{stage="{stage}"}} {value}')
+
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class StageRecorder:
+    """
+    Timings for one request
+    progress(stage) is called as each stage starts (see job_queue.Job.advance)
+    """
+
+    def __init__(self, progress=None, registry=registry):
+        self.progress = progress
+        self.registry = registry
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; the yielded dict collects item counts for the stage"""
+        if self.progress is not None:
+            self.progress(name)
+        counts = {}
+        rss_before, peak_before = memory_usage()
+        start = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            seconds = time.perf_counter() - start
+            rss_after, peak_after = memory_usage()
+            peak_delta = max(0, peak_after - peak_before)
+            self.stages.append({
+                'stage': name,
+                'seconds': round(seconds, 4),
+                'rss_delta_mb': round((rss_after - rss_before) / MB, 1),
+                'peak_rss_delta_mb': round(peak_delta / MB, 1),
+                'counts': counts
+            })
+            if self.registry is not None:
+                self.registry.observe(name, seconds, counts, peak_delta)
+
+    def total_seconds(self):
+        return round(sum(stage['seconds'] for stage in self.stages), 4)
+
+    def server_timing(self):
+        """Server-Timing header value (durations in milliseconds)"""
+        return ', '.join(f"{stage['stage']};dur={stage['seconds'] * 1000:.1f}"
+                         for stage in self.stages)
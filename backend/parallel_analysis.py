@@ -0,0 +1,284 @@
+"""
+Parallel Component Analysis for Money Muling Detection
+Cycle and shell-chain search never cross weakly connected components, so
+the graph is split into components, packed into balanced batches of
+compact int arrays and searched in a process pool. Results are merged by
+canonical start node, giving the same output (and ring ids) as the
+serial search.
+
+Pools are long-lived and shared by all analyses in the process, so
+requests do not pay pool startup. Their workers are started by a
+forkserver (spawn where unavailable), never by forking the caller. The
+web app is multi-threaded, and a forked worker could inherit locks held
+by other threads. As with spawn on macOS and Windows, scripts that run
+parallel searches need an `if __name__ == '__main__':` guard.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from cycle_search import cyclic_core, find_cycles
+from shell_chains import MAX_CHAIN_LENGTH, MAX_SHELL_CHAINS, find_shell_chains
+
+# Batches per worker; more batches balance better but cost more IPC
+BATCHES_PER_WORKER = 4
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def resolve_workers(workers):
+    """Worker count from an int, None/0 meaning all CPUs"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def weak_components(num_nodes, src, dst):
+    """
+    Weakly connected component label per node (label = smallest member id)
+    Vectorized hooking plus pointer jumping; isolated nodes keep their own id
+    """
+    labels = np.arange(num_nodes, dtype=np.int64)
+    while len(src):
+        lo = np.minimum(labels[src], labels[dst])
+        hi = np.maximum(labels[src], labels[dst])
+        changed = lo != hi
+        if not changed.any():
+            break
+        np.minimum.at(labels, hi[changed], lo[changed])
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    return labels
+
+
+def partition(src, dst, nodes, workers):
+    """
+    Split an edge list into per-component payloads packed into batches
+    Each payload is (sorted global node ids, local src, local dst) with
+    edges kept in their original order
+    """
+    num_nodes = int(max(src.max(initial=-1), dst.max(initial=-1), nodes.max(initial=-1))) + 1
+    labels = weak_components(num_nodes, src, dst)
+
+    # Nodes sorted by (component, id); local id = rank inside the component
+    node_order = np.lexsort((nodes, labels[nodes]))
+    sorted_nodes = nodes[node_order]
+    sorted_labels = labels[sorted_nodes]
+    local_of = np.empty(num_nodes, dtype=np.int64)
+    local_of[sorted_nodes] = (np.arange(len(sorted_nodes))
+                              - np.searchsorted(sorted_labels, sorted_labels, side='left'))
+
+    # Edges grouped by component, original order kept within a group
+    edge_label = labels[src]
+    edge_order = np.argsort(edge_label, kind='stable')
+    local_src = local_of[src[edge_order]].astype(np.int32)
+    local_dst = local_of[dst[edge_order]].astype(np.int32)
+
+    comp_ids, edge_counts = np.unique(edge_label, return_counts=True)
+    edge_bounds = np.concatenate(([0], np.cumsum(edge_counts))).tolist()
+    node_starts = np.searchsorted(sorted_labels, comp_ids, side='left').tolist()
+    node_ends = np.searchsorted(sorted_labels, comp_ids, side='right').tolist()
+
+    # Greedy largest-first packing by edge count
+    num_batches = max(1, min(len(comp_ids), workers * BATCHES_PER_WORKER))
+    batches = [[] for _ in range(num_batches)]
+    loads = [0] * num_batches
+    for k in np.argsort(-edge_counts, kind='stable').tolist():
+        target = loads.index(min(loads))
+        e0, e1 = edge_bounds[k], edge_bounds[k + 1]
+        batches[target].append((sorted_nodes[node_starts[k]:node_ends[k]],
+                                local_src[e0:e1], local_dst[e0:e1]))
+        loads[target] += e1 - e0
+
+    return [batch for batch in batches if batch]
+
+
+def _local_csr(num_nodes, src, dst):
+    order = np.argsort(src, kind='stable')
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+    return indptr, dst[order]
+
+
+def _cycle_batch(batch, min_length, max_length, deadline, max_cycles):
+    """
+    Worker: bounded cycle search over each component in a batch
+    Components are searched by smallest member id and each is capped at
+    max_cycles, keeping the batch's first max_cycles cycles by start; once
+    those all start before the next component's smallest id, no later
+    component can reach the merged first max_cycles. truncated is only
+    reported when the deadline stopped the batch.
+    """
+    cycles = []
+    stats = {'candidate_nodes': 0, 'components': 0, 'starts': 0,
+             'expansions': 0, 'truncated': False}
+    for members, src, dst in sorted(batch, key=lambda payload: payload[0][0]):
+        if (max_cycles is not None and len(cycles) >= max_cycles
+                and cycles[-1][0] < members[0]):
+            break
+        budget = None if deadline is None else max(0.0, deadline - time.time())
+        indptr, indices = _local_csr(len(members), src, dst)
+        found, part = find_cycles(indptr, indices, min_length, max_length,
+                                  time_budget=budget, max_cycles=max_cycles)
+        cycles.extend(members[cycle].tolist() for cycle in found)
+        for key in ('candidate_nodes', 'components', 'starts', 'expansions'):
+            stats[key] += part[key]
+        if part['truncated'] and (max_cycles is None or len(found) < max_cycles):
+            stats['truncated'] = True
+            break
+        if max_cycles is not None:
+            cycles.sort(key=lambda cycle: cycle[0])
+            del cycles[max_cycles:]
+    return cycles, stats
+
+
+def _shell_batch(batch, min_chain_length, max_chain_length, max_chains):
+    """Worker: shell-chain search over each component in a batch"""
+    chains = []
+    stats = {'low_edges': 0, 'back_edges': 0, 'sources': 0, 'sinks': 0, 'longest': 0,
+             'split': 0, 'truncated': False}
+    for members, src, dst in batch:
+        indptr, indices = _local_csr(len(members), src, dst)
+        low = np.ones(len(members), dtype=bool)
+        found, part = find_shell_chains(indptr, indices, low, min_chain_length,
+                                        max_chain_length, max_chains)
+        chains.extend(members[chain].tolist() for chain in found)
+        for key in ('low_edges', 'back_edges', 'sources', 'sinks', 'split'):
+            stats[key] += part[key]
+        stats['longest'] = max(stats['longest'], part['longest'])
+    # Keep only what can survive the global cap (chains sort by node ids)
+    chains.sort()
+    stats['truncated'] = len(chains) > max_chains
+    return chains[:max_chains], stats
+
+
+def _start_method():
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def get_pool(workers):
+    """The shared pool of `workers` processes, started on first use"""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            context = multiprocessing.get_context(_start_method())
+            if context.get_start_method() == 'forkserver':
+                # Workers fork from a server that already imported NumPy and the searches
+                context.set_forkserver_preload(['parallel_analysis'])
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                         mp_context=context)
+        return pool
+
+
+def shutdown_pools():
+    """Stop all shared pools (they are restarted on the next parallel search)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+def _run(worker, batches, workers, *args):
+    if workers == 1 or len(batches) == 1:
+        return [worker(batch, *args) for batch in batches]
+    pool = get_pool(workers)
+    try:
+        futures = [pool.submit(worker, batch, *args) for batch in batches]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        # A worker died; drop the pool so the next search starts a fresh one
+        with _pools_lock:
+            if _pools.get(workers) is pool:
+                del _pools[workers]
+        raise
+
+
+def parallel_find_cycles(indptr, indices, min_length=3, max_length=5,
+                         time_budget=None, max_cycles=None, workers=None):
+    """
+    Process-pool version of cycle_search.find_cycles (same output order)
+    max_cycles is applied to the merged cycles, so a capped search returns
+    the same cycles and truncated flag as the serial one. A search stopped
+    by time_budget is truncated in both, but which cycles were found by
+    then depends on scheduling.
+    """
+    workers = resolve_workers(workers)
+    alive, src, dst = cyclic_core(indptr, indices)
+    nodes = np.flatnonzero(alive)
+
+    stats = {'candidate_nodes': 0, 'components': 0, 'starts': 0, 'expansions': 0,
+             'truncated': False, 'workers': workers, 'batches': 0}
+    if not len(src):
+        stats['cycles'] = 0
+        return [], stats
+
+    batches = partition(src, dst, nodes, workers)
+    deadline = None if time_budget is None else time.time() + time_budget
+    results = _run(_cycle_batch, batches, workers, min_length, max_length, deadline, max_cycles)
+
+    cycles = []
+    for found, part in results:
+        cycles.extend(found)
+        for key in ('candidate_nodes', 'components', 'starts', 'expansions'):
+            stats[key] += part[key]
+        stats['truncated'] = stats['truncated'] or part['truncated']
+
+    # Deterministic merge: by canonical start, search order within a start
+    cycles.sort(key=lambda cycle: cycle[0])
+    if max_cycles is not None and len(cycles) >= max_cycles:
+        cycles = cycles[:max_cycles]
+        stats['truncated'] = True
+
+    stats.update(batches=len(batches), cycles=len(cycles))
+    return cycles, stats
+
+
+def parallel_find_shell_chains(indptr, indices, low, min_chain_length=3,
+                               max_chain_length=MAX_CHAIN_LENGTH, max_chains=MAX_SHELL_CHAINS,
+                               workers=None):
+    """Process-pool version of shell_chains.find_shell_chains (same output order)"""
+    workers = resolve_workers(workers)
+    num_nodes = len(indptr) - 1
+    src = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(indptr))
+    dst = np.asarray(indices, dtype=np.int64)
+
+    # Chains only walk edges between low-transaction nodes
+    keep = low[src] & low[dst] & (src != dst)
+    src, dst = src[keep], dst[keep]
+    stats = {'low_nodes': int(np.count_nonzero(low)), 'low_edges': 0, 'back_edges': 0,
+             'sources': 0, 'sinks': 0, 'longest': 0, 'split': 0, 'truncated': False,
+             'workers': workers, 'batches': 0}
+    if not len(src):
+        stats['chains'] = 0
+        return [], stats
+
+    nodes = np.unique(np.concatenate([src, dst]))
+    batches = partition(src, dst, nodes, workers)
+    results = _run(_shell_batch, batches, workers, min_chain_length, max_chain_length,
+                   max_chains)
+
+    chains = []
+    for found, part in results:
+        chains.extend(found)
+        for key in ('low_edges', 'back_edges', 'sources', 'sinks', 'split'):
+            stats[key] += part[key]
+        stats['longest'] = max(stats['longest'], part['longest'])
+        stats['truncated'] = stats['truncated'] or part['truncated']
+
+    chains.sort()
+    if len(chains) > max_chains:
+        chains = chains[:max_chains]
+        stats['truncated'] = True
+    stats.update(batches=len(batches), chains=len(chains))
+    return chains, stats
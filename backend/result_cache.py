@@ -0,0 +1,121 @@
+"""
+Result Cache for Money Muling Detection
+Serialized analysis results keyed by upload content hash. A byte-bounded
+in-memory LRU sits in front of an optional on-disk directory, so repeated
+uploads skip the pipeline and results survive restarts.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+MAX_MEMORY_BYTES = 256 * 1024 * 1024
+MAX_DISK_ENTRIES = 1000
+
+
+class ResultCache:
+    def __init__(self, max_bytes=MAX_MEMORY_BYTES, directory=None,
+                 max_disk_entries=MAX_DISK_ENTRIES):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        """Cached results dict for key, or None"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(payload)
+
+        payload = self._read_disk(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, payload)
+        return json.loads(payload)
+
+    def put(self, key, results):
+        payload = json.dumps(results, separators=(',', ':')).encode()
+        with self._lock:
+            self._remember(key, payload)
+        self._write_disk(key, payload)
+
+    def _remember(self, key, payload):
+        if len(payload) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = payload
+        self._bytes += len(payload)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+            os.utime(path)  # pruning keeps recently used files
+            return payload
+        except OSError:
+            return None
+
+    def _write_disk(self, key, payload):
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp, path)
+            self._prune_disk()
+        except OSError as e:
+            print(f"Result cache write failed: {e}")
+
+    def _prune_disk(self):
+        """Drop the oldest files beyond max_disk_entries"""
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'disk_directory': self.directory
+            }
@@ -0,0 +1,201 @@
+"""
+Rolling-Window Monitoring for Money Muling Detection
+A monitor keeps one graph over the transactions of the last window_hours
+(by transaction timestamp) instead of all history. Each ingested batch is
+appended in place; once the newest timestamp has moved expiry_interval_hours
+past the last expiry, older transactions are expired: node and edge
+aggregates are decremented, edges and accounts left without transactions
+are evicted and the transaction store is rebuilt over what remains. Memory
+follows the window, not the stream, and the graph never spans more than
+window + interval.
+
+Detection is re-run only where aggregates changed:
+- cycles through new edges; a cycle alert is retracted once one of its
+  edges is evicted
+- fan-in/fan-out for accounts that received/sent new transactions or lost
+  expired ones
+- shell chains in the low-transaction components of those accounts
+Fan alerts on re-checked accounts and shell alerts in re-searched
+components that are no longer found are retracted.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+from timestamps import NAT
+from detection_engine import (CYCLE_TIME_BUDGET_SECONDS, LEGITIMATE_PARAMETERS, MAX_CYCLES,
+                              pattern_paths, resolve_parameters)
+from graph_analyzer import GraphAnalyzer
+from ingestion import TransactionColumns
+from rings import ring_risk
+from sessions import _ring_key, check_incremental_parameters
+
+DEFAULT_WINDOW_HOURS = 30 * 24
+# Expiry rebuilds the store, so it runs at most once per interval of stream time
+DEFAULT_EXPIRY_INTERVAL_HOURS = 24
+
+
+class RollingWindowMonitor:
+    """
+    Incremental detection over a sliding window of transactions
+    parameters are the DEFAULT_PARAMETERS names, applied to every batch.
+    prune_legitimate and temporal_cycles have no incremental search and
+    raise ValueError. Alerts are one per detected pattern, so
+    consolidate_rings does not apply.
+    """
+
+    def __init__(self, window_hours=DEFAULT_WINDOW_HOURS,
+                 expiry_interval_hours=DEFAULT_EXPIRY_INTERVAL_HOURS, parameters=None):
+        if window_hours <= 0 or expiry_interval_hours < 0:
+            raise ValueError('window_hours must be positive and expiry_interval_hours '
+                             'non-negative')
+        self.window_seconds = int(window_hours * 3600)
+        self.interval_seconds = int(expiry_interval_hours * 3600)
+        self.parameters = resolve_parameters(parameters)
+        check_incremental_parameters(self.parameters)
+        empty = TransactionColumns(amount_dtype=np.float64).finish()
+        self.analyzer = GraphAnalyzer(empty, backend='networkx')
+        self.watermark = None  # newest transaction timestamp seen (epoch seconds)
+        self.cutoff = None     # transactions before this have been expired
+        self.alerts = {}       # ring key -> active alert
+        self._alerts_by_account = defaultdict(set)
+        self.totals = {'batches': 0, 'ingested_transactions': 0, 'expired_transactions': 0,
+                       'evicted_edges': 0, 'evicted_accounts': 0}
+
+    def ingest(self, transactions):
+        """
+        Add a batch (DataFrame or TransactionColumns), expire what left the
+        window and re-detect around the changed accounts. Returns the new
+        and retracted alerts plus the window's size
+        """
+        analyzer = self.analyzer
+        params = self.parameters
+        change = analyzer.append_transactions(transactions)
+        self._advance(analyzer.store.epoch[change['rows']])
+        expired = self._expire()
+
+        senders = set(change['senders'])
+        receivers = set(change['receivers'])
+        changed = set(expired['changed'])
+        evicted = set(expired['evicted_accounts'])
+        senders -= evicted
+        receivers -= evicted
+        rechecked = {'fan_in': receivers | changed, 'fan_out': senders | changed}
+        touched = rechecked['fan_in'] | rechecked['fan_out']
+        rechecked['shell_network'] = analyzer.low_transaction_component(
+            touched, params['max_transactions'])
+
+        cycles = analyzer.detect_cycles_through(
+            [(u, v) for u, v in change['new_edges'] if analyzer.G.has_edge(u, v)],
+            time_budget=CYCLE_TIME_BUDGET_SECONDS, max_cycles=MAX_CYCLES,
+            max_degree=params['max_search_degree'] or None)
+        fan_in = analyzer.detect_fan_patterns_for(rechecked['fan_in'], 'fan_in',
+                                                  params['threshold'],
+                                                  params['time_window_hours'])
+        fan_out = analyzer.detect_fan_patterns_for(rechecked['fan_out'], 'fan_out',
+                                                   params['threshold'],
+                                                   params['time_window_hours'])
+        shells = analyzer.detect_shell_networks_near(
+            touched, params['min_chain_length'], params['max_transactions'],
+            component=rechecked['shell_network'])
+
+        involved = {acc for path in cycles + shells for acc in path}
+        involved.update(p['account'] for p in fan_in + fan_out)
+        legitimate = analyzer.legitimate_subset(
+            involved, **{name: params[name] for name in LEGITIMATE_PARAMETERS})
+        found = {_ring_key(pattern_type, members): (pattern_type, members, patterns)
+                 for pattern_type, members, patterns in pattern_paths(
+                     legitimate, cycles, fan_in, fan_out, shells)}
+
+        # Only alerts with a changed or evicted member can stop holding
+        candidates = set()
+        for account in touched | rechecked['shell_network'] | evicted:
+            candidates.update(self._alerts_by_account.get(account, ()))
+        retracted = [self._remove(key) for key in sorted(candidates, key=str)
+                     if key not in found and self._retracted(self.alerts[key], rechecked,
+                                                             evicted)]
+        new_alerts = [self._add(key, *path) for key, path in found.items()
+                      if key not in self.alerts]
+
+        self.totals['batches'] += 1
+        self.totals['ingested_transactions'] += len(change['rows'])
+        return {
+            'transactions_added': len(change['rows']),
+            'transactions_expired': expired['rows'],
+            'accounts_rechecked': len(touched),
+            'new_alerts': new_alerts,
+            'retracted_alerts': retracted,
+            'window': self.summary()
+        }
+
+    def _advance(self, epoch):
+        """Move the watermark to the newest parseable timestamp in a batch"""
+        valid = epoch[epoch != NAT]
+        if len(valid):
+            newest = int(valid.max())
+            self.watermark = newest if self.watermark is None else max(self.watermark, newest)
+
+    def _expire(self):
+        if self.watermark is None:
+            return {'rows': 0, 'evicted_edges': [], 'evicted_accounts': [], 'changed': []}
+        cutoff = self.watermark - self.window_seconds
+        if self.cutoff is not None and cutoff < self.cutoff + self.interval_seconds:
+            return {'rows': 0, 'evicted_edges': [], 'evicted_accounts': [], 'changed': []}
+        self.cutoff = cutoff
+        expired = self.analyzer.expire_transactions(cutoff)
+        self.totals['expired_transactions'] += expired['rows']
+        self.totals['evicted_edges'] += len(expired['evicted_edges'])
+        self.totals['evicted_accounts'] += len(expired['evicted_accounts'])
+        return expired
+
+    def _retracted(self, alert, rechecked, evicted):
+        """
+        Whether an active alert that was not re-found no longer holds: a
+        cycle lost an edge, or the search that would have found it again
+        covered its account (fan) or the component of its members (shell
+        chain)
+        """
+        pattern_type = alert['pattern_type']
+        members = alert['member_accounts']
+        if pattern_type == 'cycle':
+            edges = zip(members, members[1:] + members[:1])
+            return not all(self.analyzer.G.has_edge(u, v) for u, v in edges)
+        if pattern_type in ('fan_in', 'fan_out'):
+            members = members[:1]
+        return any(acc in rechecked[pattern_type] or acc in evicted for acc in members)
+
+    def _add(self, key, pattern_type, members, patterns):
+        alert = self.alerts[key] = {
+            'pattern_type': pattern_type,
+            'member_accounts': list(members),
+            'patterns': patterns,
+            'risk_score': ring_risk(pattern_type, len(members)),
+            'detected_at': self.watermark
+        }
+        for account in members:
+            self._alerts_by_account[account].add(key)
+        return alert
+
+    def _remove(self, key):
+        alert = self.alerts.pop(key)
+        for account in alert['member_accounts']:
+            keys = self._alerts_by_account[account]
+            keys.discard(key)
+            if not keys:
+                del self._alerts_by_account[account]
+        return alert
+
+    def summary(self):
+        analyzer = self.analyzer
+        return {
+            'window_hours': self.window_seconds / 3600,
+            'window_start': self.cutoff,
+            'window_end': self.watermark,
+            'transactions': len(analyzer.store),
+            'accounts': analyzer.G.number_of_nodes(),
+            'edges': analyzer.G.number_of_edges(),
+            'store_bytes': analyzer.store.nbytes(),
+            'active_alerts': len(self.alerts),
+            **self.totals
+        }
@@ -0,0 +1,88 @@
+"""
+Response Serialization for Money Muling Detection
+Analysis results are encoded with orjson when it is installed, which is
+several times faster than the standard library encoder, and compressed
+with brotli or gzip when the client's Accept-Encoding allows it.
+columnar() is an opt-in compact form of a result: graph nodes and
+suspicious accounts become parallel arrays, and edges become index pairs
+into the node arrays.
+"""
+
+import gzip
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this go out uncompressed (the headers would dominate)
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+NODE_COLUMNS = ('id', 'total_sent', 'total_received', 'transaction_count', 'is_suspicious',
+                'suspicion_score', 'ring_ids', 'is_group', 'member_count')
+EDGE_COLUMNS = ('weight', 'count', 'aggregated')
+ACCOUNT_COLUMNS = ('account_id', 'suspicion_score', 'detected_patterns', 'ring_id')
+
+# Defaults for keys that only some rows carry
+COLUMN_DEFAULTS = {'is_group': False, 'member_count': 0, 'aggregated': False}
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(obj):
+    """Compact JSON as bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, separators=(',', ':')).encode()
+
+
+def encodings():
+    """Content encodings this process can produce, preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def _columns(rows, keys):
+    return {key: [row.get(key, COLUMN_DEFAULTS.get(key)) for row in rows] for key in keys}
+
+
+def columnar_graph(graph_data):
+    """graph_data with node columns and edges as source/target node indexes"""
+    nodes = graph_data['nodes']
+    index = {node['id']: i for i, node in enumerate(nodes)}
+    edges = graph_data['edges']
+    edge_columns = _columns(edges, EDGE_COLUMNS)
+    edge_columns['source'] = [index[edge['source']] for edge in edges]
+    edge_columns['target'] = [index[edge['target']] for edge in edges]
+    return dict(graph_data, format='columnar', nodes=_columns(nodes, NODE_COLUMNS),
+                edges=edge_columns)
+
+
+def columnar(results):
+    """Copy of an analysis result in the columnar format (the input is not modified)"""
+    return dict(results, format='columnar',
+                suspicious_accounts=_columns(results['suspicious_accounts'], ACCOUNT_COLUMNS),
+                graph_data=columnar_graph(results['graph_data']))
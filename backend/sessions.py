@@ -0,0 +1,178 @@
+"""
+Append-Only Analysis Sessions for Money Muling Detection
+A session keeps one detector and its graph in memory across uploads.
+Each appended batch updates aggregates in place. Detection is then re-run
+only around the touched accounts:
+- new cycles must use a new edge
+- fan-in/fan-out can only change for endpoints of new transactions
+- shell chains are re-searched in the low-transaction components of
+  those endpoints
+New rings are merged into the existing results. Rings are never
+retracted by later batches. The session's detection parameters apply to
+every batch, and MAX_CYCLES caps the cycles found over the whole session.
+prune_legitimate and temporal_cycles have no incremental search and are
+rejected.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from detection_engine import (CYCLE_TIME_BUDGET_SECONDS, LEGITIMATE_PARAMETERS, MAX_CYCLES,
+                              MoneyMulingDetector, resolve_parameters)
+
+SESSION_TTL_SECONDS = 24 * 3600
+MAX_SESSIONS = 32
+
+# Parameters the incremental searches cannot honour (no incremental
+# temporal cycle search; shell search near new batches cannot prune)
+INCREMENTAL_UNSUPPORTED_PARAMETERS = ('prune_legitimate', 'temporal_cycles')
+
+
+def check_incremental_parameters(parameters):
+    """Raises ValueError if parameters enable an INCREMENTAL_UNSUPPORTED_PARAMETERS option"""
+    enabled = [name for name in INCREMENTAL_UNSUPPORTED_PARAMETERS if parameters.get(name)]
+    if enabled:
+        raise ValueError(f"{', '.join(enabled)} cannot be used with incremental detection")
+
+
+def _ring_key(pattern_type, members):
+    """Identity of a detected pattern (fan rings are one per account)"""
+    if pattern_type in ('fan_in', 'fan_out'):
+        return (pattern_type, members[0])
+    return (pattern_type, tuple(members))
+
+
+class AnalysisSession:
+    def __init__(self, session_id, transactions, parameters=None):
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        parameters = resolve_parameters(parameters)
+        check_incremental_parameters(parameters)
+        # Rings are never retracted, so overlapping ones are not merged either
+        parameters['consolidate_rings'] = 0
+        self.detector = MoneyMulingDetector(transactions, parameters=parameters)
+        self.detector.analyze()
+        self.batches = 1
+        cycle_stats = self.detector.analyzer.cycle_stats
+        self.cycle_search_truncated = cycle_stats.get('truncated', False)
+        # Cycles found so far, against the session-wide MAX_CYCLES cap
+        self.cycles_found = cycle_stats.get('cycles', 0)
+        self.last_used = time.time()
+        self._seen = {_ring_key(ring['pattern_type'], ring['member_accounts'])
+                      for ring in self.detector.fraud_rings}
+
+    def append(self, transactions):
+        """Add a batch, re-detect around it and merge any new rings"""
+        analyzer = self.detector.analyzer
+        params = self.detector.parameters
+        change = analyzer.append_transactions(transactions)
+        touched = set(change['senders']) | set(change['receivers'])
+
+        remaining = MAX_CYCLES - self.cycles_found
+        if remaining > 0:
+            cycles = analyzer.detect_cycles_through(change['new_edges'],
+                                                    time_budget=CYCLE_TIME_BUDGET_SECONDS,
+                                                    max_cycles=remaining,
+                                                    max_degree=params['max_search_degree'])
+            self.cycles_found += len(cycles)
+            self.cycle_search_truncated |= analyzer.cycle_stats['truncated']
+        else:
+            cycles = []
+            self.cycle_search_truncated = True
+        fan_in_patterns = analyzer.detect_fan_patterns_for(change['receivers'], 'fan_in',
+                                                           params['threshold'],
+                                                           params['time_window_hours'])
+        fan_out_patterns = analyzer.detect_fan_patterns_for(change['senders'], 'fan_out',
+                                                            params['threshold'],
+                                                            params['time_window_hours'])
+        shell_networks = analyzer.detect_shell_networks_near(touched, params['min_chain_length'],
+                                                             params['max_transactions'])
+
+        # Drop patterns that already have a ring
+        cycles = [c for c in cycles if _ring_key('cycle', c) not in self._seen]
+        fan_in_patterns = [p for p in fan_in_patterns
+                           if ('fan_in', p['account']) not in self._seen]
+        fan_out_patterns = [p for p in fan_out_patterns
+                            if ('fan_out', p['account']) not in self._seen]
+        shell_networks = [c for c in shell_networks
+                          if _ring_key('shell_network', c) not in self._seen]
+
+        # Legitimacy only matters for accounts that could join a new ring
+        involved = {acc for path in cycles + shell_networks for acc in path}
+        involved.update(p['account'] for p in fan_in_patterns + fan_out_patterns)
+        legitimate_accounts = analyzer.legitimate_subset(
+            involved, **{name: params[name] for name in LEGITIMATE_PARAMETERS})
+
+        first_new = len(self.detector.fraud_rings)
+        self.detector.add_patterns(legitimate_accounts, cycles, fan_in_patterns,
+                                   fan_out_patterns, shell_networks)
+        new_rings = self.detector.fraud_rings[first_new:]
+        self._seen.update(_ring_key(ring['pattern_type'], ring['member_accounts'])
+                          for ring in new_rings)
+        self.batches += 1
+
+        return {
+            'session_id': self.session_id,
+            'transactions_added': len(change['rows']),
+            'accounts_touched': len(touched),
+            'new_fraud_rings': new_rings,
+            'summary': self.summary()
+        }
+
+    def summary(self):
+        analyzer = self.detector.analyzer
+        return {
+            'session_id': self.session_id,
+            'batches': self.batches,
+            'total_transactions': len(analyzer.store),
+            'total_accounts_analyzed': analyzer.G.number_of_nodes(),
+            'suspicious_accounts_flagged': len(self.detector.suspicious_accounts),
+            'fraud_rings_detected': len(self.detector.fraud_rings),
+            'cycle_search_truncated': self.cycle_search_truncated
+        }
+
+    def results(self):
+        """Full results in the /api/analyze format"""
+        results = self.detector._build_output()
+        results['summary'].update(self.summary())
+        return results
+
+
+class SessionStore:
+    """In-process sessions with LRU eviction and an idle timeout"""
+
+    def __init__(self, max_sessions=MAX_SESSIONS, ttl_seconds=SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, transactions, parameters=None):
+        """New session; raises ValueError for bad or unsupported parameters"""
+        session = AnalysisSession(uuid.uuid4().hex, transactions, parameters)
+        with self._lock:
+            self._expire()
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.time()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        for session_id in [sid for sid, s in self._sessions.items() if s.last_used < cutoff]:
+            del self._sessions[session_id]
@@ -0,0 +1,205 @@
+"""
+Maximal Shell-Chain Search for Money Muling Detection
+Chains of low-transaction accounts found in near-linear time. Enumerating
+every path copies the path at each step and reports every prefix, so a
+chain of k shells turned into O(k^2) overlapping rings and branching
+shell trees grew exponentially. This search does not enumerate paths.
+
+The subgraph induced by low-transaction nodes is made acyclic by dropping
+DFS back edges. Longest-path DP over that DAG then gives each node one
+best predecessor and one best successor. Every source (DAG in-degree 0)
+walks forward and every sink (out-degree 0) walks backward. Each emitted
+chain therefore cannot be extended at either end. Pass-through runs
+(in = out = 1) are followed whole and never reported prefix by prefix.
+Walks stop shortly after joining an earlier walk, and chains longer than
+max_chain_length are split into overlapping segments, so total work is
+linear in the subgraph plus a constant per source and sink. Chains that
+lie inside another chain (say a short tail segment another walk passed
+through) are dropped, so no reported chain is a sub-chain of another.
+"""
+
+import itertools
+
+import numpy as np
+
+MAX_CHAIN_LENGTH = 12
+MAX_SHELL_CHAINS = 5000
+
+
+def _segments(path, min_chain_length, max_chain_length):
+    """Split a long path into segments sharing one node (every hop kept)"""
+    if len(path) <= max_chain_length:
+        return [path]
+    step = max_chain_length - 1
+    segments = [path[i:i + max_chain_length] for i in range(0, len(path) - 1, step)]
+    if len(segments[-1]) < min_chain_length:
+        segments[-1] = path[-max_chain_length:]
+    return segments
+
+
+def _walk(start, following, walked, max_chain_length):
+    """
+    Follow best-path pointers from start until they end
+    After reaching a node an earlier walk already covered, go at most
+    max_chain_length - 1 further (that part was emitted before)
+    """
+    path = [start]
+    remaining = None
+    node = following[start]
+    while node >= 0 and remaining != 0:
+        if remaining is None and walked[node]:
+            remaining = max_chain_length - 1
+        path.append(node)
+        walked[node] = True
+        if remaining is not None:
+            remaining -= 1
+        node = following[node]
+    walked[start] = True
+    return path
+
+
+def _drop_inner_chains(chains):
+    """
+    Chains (tuples of local ids) minus those lying inside a longer one,
+    which add no hop the longer one lacks. Candidates are the places a
+    chain's first hop occurs in a longer chain; all are then checked at
+    the chain's last node and node by node, at once.
+    """
+    if not chains:
+        return []
+    lengths = np.fromiter(map(len, chains), dtype=np.int64, count=len(chains))
+    width = int(lengths.max())
+    nodes = np.full((len(chains), width), -1, dtype=np.int64)
+    nodes[np.arange(width) < lengths[:, None]] = np.fromiter(
+        itertools.chain.from_iterable(chains), dtype=np.int64, count=int(lengths.sum()))
+
+    # Every hop as one key, grouped; a chain's first hop is looked up among them
+    base = int(nodes.max()) + 1
+    hops = nodes[:, :-1] * base + nodes[:, 1:]
+    hop_rows, hop_starts = np.nonzero(nodes[:, 1:] >= 0)
+    hops = hops[hop_rows, hop_starts]
+    order = np.argsort(hops, kind='stable')
+    hops = hops[order]
+    first = np.searchsorted(hops, nodes[:, 0] * base + nodes[:, 1], side='left')
+    counts = np.searchsorted(hops, nodes[:, 0] * base + nodes[:, 1], side='right') - first
+    inner = np.repeat(np.arange(len(chains)), counts)
+    found = order[np.arange(counts.sum()) + np.repeat(first - np.cumsum(counts) + counts, counts)]
+    outer, start = hop_rows[found], hop_starts[found]
+    size = lengths[inner]
+
+    keep = (lengths[outer] > size) & (start + size <= lengths[outer])
+    inner, outer, start, size = inner[keep], outer[keep], start[keep], size[keep]
+    keep = nodes[outer, start + size - 1] == nodes[inner, size - 1]
+    inner, outer, start, size = inner[keep], outer[keep], start[keep], size[keep]
+    offsets = np.arange(width)
+    positions = np.minimum(start[:, None] + offsets, width - 1)
+    same = (nodes[outer[:, None], positions] == nodes[inner]) | (offsets >= size[:, None])
+    dropped = set(inner[same.all(axis=1)].tolist())
+    return [chain for row, chain in enumerate(chains) if row not in dropped]
+
+
+def find_shell_chains(indptr, indices, low, min_chain_length=3,
+                      max_chain_length=MAX_CHAIN_LENGTH, max_chains=MAX_SHELL_CHAINS):
+    """
+    Maximal chains through low-transaction nodes (integer ids)
+    Returns (chains sorted by node ids, stats); at most max_chains are kept
+    """
+    num_nodes = len(indptr) - 1
+    low = np.asarray(low, dtype=bool)
+    stats = {'low_nodes': int(low.sum()), 'low_edges': 0, 'back_edges': 0,
+             'sources': 0, 'sinks': 0, 'longest': 0, 'split': 0, 'truncated': False}
+
+    # Induced subgraph in local ids (rank among low nodes keeps id order)
+    members = np.flatnonzero(low)
+    local = np.cumsum(low) - 1
+    src = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(indptr))
+    dst = np.asarray(indices, dtype=np.int64)
+    keep = low[src] & low[dst] & (src != dst)
+    src, dst = local[src[keep]], local[dst[keep]]
+    stats['low_edges'] = len(src)
+    if not len(src):
+        stats['chains'] = 0
+        return [], stats
+
+    count = len(members)
+    ptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=count), out=ptr[1:])
+    ptr = ptr.tolist()
+    adj = dst.tolist()
+
+    # Iterative DFS in id order: back edges are dropped, postorder is kept
+    state = [0] * count  # 0 unseen, 1 on the DFS stack, 2 finished
+    position = ptr[:-1]
+    dag = [False] * len(adj)
+    postorder = []
+    for root in range(count):
+        if state[root] or ptr[root] == ptr[root + 1]:
+            continue
+        state[root] = 1
+        stack = [root]
+        while stack:
+            u = stack[-1]
+            p = position[u]
+            if p == ptr[u + 1]:
+                state[u] = 2
+                postorder.append(u)
+                stack.pop()
+                continue
+            position[u] = p + 1
+            v = adj[p]
+            if state[v] == 1:
+                stats['back_edges'] += 1
+                continue
+            dag[p] = True
+            if state[v] == 0:
+                state[v] = 1
+                stack.append(v)
+
+    # Longest path ending at / starting from each node, ties to the first edge
+    in_degree = [0] * count
+    out_degree = [0] * count
+    end_len, end_prev = [1] * count, [-1] * count
+    start_len, start_next = [1] * count, [-1] * count
+    for u in reversed(postorder):
+        for p in range(ptr[u], ptr[u + 1]):
+            if dag[p]:
+                v = adj[p]
+                out_degree[u] += 1
+                in_degree[v] += 1
+                if end_len[u] + 1 > end_len[v]:
+                    end_len[v] = end_len[u] + 1
+                    end_prev[v] = u
+    for u in postorder:
+        for p in range(ptr[u], ptr[u + 1]):
+            if dag[p]:
+                v = adj[p]
+                if start_len[v] + 1 > start_len[u]:
+                    start_len[u] = start_len[v] + 1
+                    start_next[u] = v
+
+    sources = [u for u in range(count) if in_degree[u] == 0 and out_degree[u]]
+    sinks = [u for u in range(count) if out_degree[u] == 0 and in_degree[u]]
+    stats.update(sources=len(sources), sinks=len(sinks), longest=max(end_len))
+
+    paths = []
+    walked = [False] * count
+    for source in sources:
+        paths.append(_walk(source, start_next, walked, max_chain_length))
+    walked = [False] * count
+    for sink in sinks:
+        paths.append(_walk(sink, end_prev, walked, max_chain_length)[::-1])
+
+    chains = set()
+    for path in paths:
+        if len(path) < min_chain_length:
+            continue
+        segments = _segments(path, min_chain_length, max_chain_length)
+        stats['split'] += len(segments) > 1
+        chains.update(tuple(segment) for segment in segments)
+
+    chains = _drop_inner_chains(sorted(chains))
+    if len(chains) > max_chains:
+        chains = chains[:max_chains]
+        stats['truncated'] = True
+    stats['chains'] = len(chains)
+    return [members[list(chain)].tolist() for chain in chains], stats
@@ -0,0 +1,144 @@
+"""
+Memory-Mapped Graph Snapshots for Money Muling Detection
+A built graph is written once as a directory of .npy files:
+- the account id dictionary
+- CSR/CSC adjacency
+- node and edge aggregates
+- the transaction store columns and indexes
+Opening a snapshot maps those files read-only (numpy.memmap). A
+re-analysis with new parameters therefore skips parsing and graph
+building, and worker processes share the same page-cache pages.
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from graph_analyzer import GraphAnalyzer
+from transaction_store import TransactionStore
+
+SNAPSHOT_FORMAT = 1
+META_FILE = 'meta.json'
+SNAPSHOT_ID = re.compile(r'[0-9a-f]{32}')
+
+
+class SnapshotError(ValueError):
+    """Missing, unreadable or incompatible snapshot"""
+
+
+def _csr_for(analyzer):
+    """CSR arrays for a networkx-backed analyzer, from its transaction store"""
+    store = analyzer.store
+    first_rows = store.edge_order[store.edge_offsets[:-1]]
+    return CSRGraph(np.asarray(analyzer._node_labels(), dtype=object), store,
+                    store.src[first_rows], store.dst[first_rows])
+
+
+def save_snapshot(analyzer, path):
+    """Write a built GraphAnalyzer to directory `path`; returns its metadata"""
+    csr = analyzer.csr if analyzer.csr is not None else _csr_for(analyzer)
+    arrays = {'node_ids': np.asarray(csr.node_ids).astype(str)}
+    arrays.update((f'store.{name}', value) for name, value in analyzer.store.arrays().items())
+    arrays.update((f'graph.{name}', value) for name, value in csr.arrays().items())
+
+    # Written next to the target and renamed, so readers never see a partial snapshot
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    os.makedirs(tmp)
+    try:
+        for name, value in arrays.items():
+            np.save(os.path.join(tmp, f'{name}.npy'), np.ascontiguousarray(value))
+        meta = dict(analyzer.graph_size(), format=SNAPSHOT_FORMAT, created_at=time.time(),
+                    bytes=sum(value.nbytes for value in arrays.values()),
+                    arrays=sorted(arrays))
+        with open(os.path.join(tmp, META_FILE), 'w') as f:
+            json.dump(meta, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return meta
+
+
+def read_meta(path):
+    try:
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f'Cannot read snapshot at {path}: {e}') from e
+    if meta.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Unsupported snapshot format {meta.get('format')}")
+    return meta
+
+
+def load_snapshot(path, mmap=True):
+    """
+    Open a snapshot as a csr-backed GraphAnalyzer; returns (analyzer, meta)
+    With mmap the arrays are read-only views of the files, paged in on use
+    """
+    meta = read_meta(path)
+    mode = 'r' if mmap else None
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode)
+              for name in meta['arrays']}
+    store = TransactionStore.from_arrays(
+        {name[len('store.'):]: value for name, value in arrays.items() if name.startswith('store.')})
+    csr = CSRGraph.from_arrays(
+        arrays['node_ids'], store,
+        {name[len('graph.'):]: value for name, value in arrays.items() if name.startswith('graph.')})
+    return GraphAnalyzer(None, csr=csr), meta
+
+
+class SnapshotStore:
+    """Snapshots kept as subdirectories of one directory, keyed by random id"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, snapshot_id):
+        if not SNAPSHOT_ID.fullmatch(snapshot_id or ''):
+            raise SnapshotError(f'Invalid snapshot id: {snapshot_id!r}')
+        return os.path.join(self.directory, snapshot_id)
+
+    def create(self, analyzer):
+        snapshot_id = uuid.uuid4().hex
+        meta = save_snapshot(analyzer, self._path(snapshot_id))
+        return dict(meta, snapshot_id=snapshot_id)
+
+    def open(self, snapshot_id):
+        """Fresh analyzer over the mapped arrays (analyzers are not shared between requests)"""
+        path = self._path(snapshot_id)
+        if not os.path.isdir(path):
+            raise KeyError(snapshot_id)
+        return load_snapshot(path)
+
+    def info(self, snapshot_id):
+        path = self._path(snapshot_id)
+        if not os.path.isdir(path):
+            raise KeyError(snapshot_id)
+        return dict(read_meta(path), snapshot_id=snapshot_id)
+
+    def list(self):
+        snapshots = []
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and SNAPSHOT_ID.fullmatch(entry.name):
+                try:
+                    snapshots.append(self.info(entry.name))
+                except SnapshotError:
+                    continue
+        return sorted(snapshots, key=lambda meta: meta['created_at'])
+
+    def delete(self, snapshot_id):
+        path = self._path(snapshot_id)
+        if not os.path.isdir(path):
+            return False
+        shutil.rmtree(path)
+        return True
@@ -0,0 +1,34 @@
+"""
+Timestamp Parsing for Money Muling Detection
+Transaction timestamps are kept as int64 epoch seconds by every reader
+(CSV, Parquet, Arrow) and graph backend, with NAT marking unparseable ones.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Epoch value used for timestamps that could not be parsed
+NAT = np.iinfo(np.int64).min
+
+
+def to_epoch_seconds(timestamps):
+    """
+    Parse a timestamp column once into int64 epoch seconds (NAT if unparseable)
+    The format is inferred from the first value; distinct values in another
+    format are parsed again one by one
+    """
+    timestamps = pd.Series(timestamps)
+    epoch = _epoch(pd.to_datetime(timestamps, errors='coerce', utc=True))
+    retry = (epoch == NAT) & timestamps.notna().to_numpy()
+    if retry.any():
+        codes, values = pd.factorize(timestamps[retry])
+        mixed = pd.to_datetime(pd.Series(values), errors='coerce', utc=True, format='mixed')
+        epoch[retry] = _epoch(mixed)[codes]
+    return epoch
+
+
+def _epoch(parsed):
+    """int64 epoch seconds of a parsed UTC datetime Series (NAT where NaT)"""
+    epoch = parsed.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]').astype(np.int64) // 10**9
+    epoch[parsed.isna().to_numpy()] = NAT
+    return epoch
@@ -0,0 +1,240 @@
+"""
+Columnar Transaction Store for Money Muling Detection
+Each transaction is stored once, as one position in a set of NumPy
+columns: sender id, receiver id, amount and epoch seconds. Two offset
+indexes group row numbers by edge and by node (appended rows are merged
+into them lazily). Detectors and the visualization read zero-copy slices
+of them instead of per-node and per-edge Python lists of rows.
+"""
+
+import numpy as np
+
+COLUMN_ARRAYS = ('src', 'dst', 'amounts', 'epoch', 'edge_codes')
+INDEX_ARRAYS = ('edge_order', 'edge_offsets', 'node_order', 'node_offsets')
+
+
+def _group(codes, num_groups):
+    """Row numbers sorted (stably) by group code, plus group offsets"""
+    order = np.argsort(codes, kind='stable')
+    offsets = np.zeros(num_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=num_groups), out=offsets[1:])
+    return order, offsets
+
+
+def _rows(order, offsets, group, pending):
+    """Indexed rows of a group (a zero-copy slice) plus any pending ones"""
+    rows = order[offsets[group]:offsets[group + 1]] if group < len(offsets) - 1 else order[:0]
+    if group in pending:
+        rows = np.concatenate([rows] + pending[group])
+    return rows
+
+
+def _add_pending(pending, codes, rows):
+    """List rows under their group codes, in row order"""
+    by_code = np.argsort(codes, kind='stable')
+    groups, starts = np.unique(codes[by_code], return_index=True)
+    for group, chunk in zip(groups.tolist(), np.split(rows[by_code], starts[1:])):
+        pending.setdefault(group, []).append(chunk)
+
+
+def _merge(order, offsets, codes, rows, num_groups):
+    """
+    Add rows to a grouped index, after the existing rows of each group
+    One vectorized insert: cost is a copy of the index, no re-sort
+    """
+    if len(offsets) - 1 < num_groups:
+        offsets = np.concatenate([offsets, np.full(num_groups + 1 - len(offsets), offsets[-1])])
+    by_code = np.argsort(codes, kind='stable')
+    order = np.insert(order, offsets[codes[by_code] + 1], rows[by_code])
+    counts = np.bincount(codes, minlength=num_groups)
+    offsets = offsets.copy()
+    offsets[1:] += np.cumsum(counts)
+    return order, offsets
+
+
+class TransactionStore:
+    """
+    Transactions as parallel column arrays (indexed by row number)
+    edge_order[edge_offsets[e]:edge_offsets[e + 1]] are the rows of edge e;
+    node_order[node_offsets[n]:node_offsets[n + 1]] the rows touching node n
+    (as sender or receiver), both in row order. Appended rows are kept in
+    small per-group lists until they reach half the indexed rows (or a
+    whole index is read), then merged in one pass, so appends cost follows
+    the batch size, amortized.
+    """
+
+    def __init__(self, src, dst, amounts, epoch, edge_codes, num_nodes, num_edges):
+        self.src = src.astype(np.int32, copy=False)
+        self.dst = dst.astype(np.int32, copy=False)
+        self.amounts = amounts
+        self.epoch = epoch
+        self.edge_codes = np.asarray(edge_codes).astype(np.int32, copy=False)
+        self._edge_order, self._edge_offsets = _group(self.edge_codes, num_edges)
+        self._node_order, self._node_offsets = _group(self._endpoint_codes(self.src, self.dst),
+                                                      num_nodes)
+        self._node_order //= 2
+        self._init_pending(num_nodes, num_edges)
+        self._buffers = {}
+
+    def _init_pending(self, num_nodes, num_edges):
+        self._num_nodes = num_nodes
+        self._num_edges = num_edges
+        self._indexed_rows = len(self.src)
+        # group -> [row arrays] appended since the last merge
+        self._pending_edges = {}
+        self._pending_nodes = {}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Store over existing arrays (see arrays()), without re-indexing"""
+        store = cls.__new__(cls)
+        for name, value in arrays.items():
+            setattr(store, f'_{name}' if name in INDEX_ARRAYS else name, value)
+        store._init_pending(len(store._node_offsets) - 1, len(store._edge_offsets) - 1)
+        store._buffers = {}
+        return store
+
+    def arrays(self):
+        """Columns and indexes by attribute name"""
+        return {name: getattr(self, name) for name in COLUMN_ARRAYS + INDEX_ARRAYS}
+
+    @staticmethod
+    def _endpoint_codes(src, dst):
+        """Sender and receiver of every row, interleaved"""
+        codes = np.empty(2 * len(src), dtype=np.int64)
+        codes[0::2] = src
+        codes[1::2] = dst
+        return codes
+
+    def __len__(self):
+        return len(self.src)
+
+    @property
+    def num_nodes(self):
+        return self._num_nodes
+
+    @property
+    def num_edges(self):
+        return self._num_edges
+
+    @property
+    def edge_order(self):
+        self._merge_pending()
+        return self._edge_order
+
+    @property
+    def edge_offsets(self):
+        self._merge_pending()
+        return self._edge_offsets
+
+    @property
+    def node_order(self):
+        self._merge_pending()
+        return self._node_order
+
+    @property
+    def node_offsets(self):
+        self._merge_pending()
+        return self._node_offsets
+
+    def edge_rows(self, edge):
+        return _rows(self._edge_order, self._edge_offsets, edge, self._pending_edges)
+
+    def node_rows(self, node):
+        return _rows(self._node_order, self._node_offsets, node, self._pending_nodes)
+
+    def sent_rows(self, node):
+        rows = self.node_rows(node)
+        return rows[self.src[rows] == node]
+
+    def received_rows(self, node):
+        rows = self.node_rows(node)
+        return rows[self.dst[rows] == node]
+
+    def nodes_rows(self, nodes):
+        """
+        node_rows() of every node id in `nodes`, concatenated, and the
+        position in `nodes` each row belongs to (grouped by position)
+        """
+        offsets = self._node_offsets
+        indexed = nodes < len(offsets) - 1
+        starts = np.where(indexed, offsets[np.minimum(nodes, len(offsets) - 2)], 0)
+        lengths = np.where(indexed, offsets[np.minimum(nodes + 1, len(offsets) - 1)] - starts, 0)
+        owner = np.repeat(np.arange(len(nodes)), lengths)
+        ends = np.cumsum(lengths)
+        positions = np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - ends + lengths,
+                                                                        lengths)
+        rows = self._node_order[positions]
+        pending = [(i, np.concatenate(self._pending_nodes[node]))
+                   for i, node in enumerate(nodes.tolist()) if node in self._pending_nodes]
+        if pending:
+            rows = np.concatenate([rows] + [chunk for _, chunk in pending])
+            owner = np.concatenate([owner] + [np.full(len(chunk), i) for i, chunk in pending])
+            by_owner = np.argsort(owner, kind='stable')
+            rows, owner = rows[by_owner], owner[by_owner]
+        return rows, owner
+
+    def edge_counts(self):
+        return np.diff(self.edge_offsets)
+
+    def append(self, src, dst, amounts, epoch, edge_codes, num_nodes, num_edges):
+        """
+        Add rows (ids already mapped to this store) and list them under their
+        edge and nodes; returns the new row numbers
+        """
+        first_row = len(self.src)
+        rows = np.arange(first_row, first_row + len(src))
+        self._append_columns(src=src, dst=dst, amounts=amounts, epoch=epoch,
+                             edge_codes=edge_codes)
+        self._num_nodes, self._num_edges = num_nodes, num_edges
+        _add_pending(self._pending_edges, np.asarray(edge_codes, dtype=np.int64), rows)
+        _add_pending(self._pending_nodes, self._endpoint_codes(src, dst), np.repeat(rows, 2))
+        if len(self.src) - self._indexed_rows > self._indexed_rows // 2:
+            self._merge_pending()
+        return rows
+
+    def _merge_pending(self):
+        """Merge the appended rows into both indexes (one vectorized insert each)"""
+        first_row = self._indexed_rows
+        if first_row == len(self.src):
+            return
+        rows = np.arange(first_row, len(self.src))
+        self._edge_order, self._edge_offsets = _merge(
+            self._edge_order, self._edge_offsets, self.edge_codes[first_row:].astype(np.int64),
+            rows, self._num_edges)
+        self._node_order, self._node_offsets = _merge(
+            self._node_order, self._node_offsets,
+            self._endpoint_codes(self.src[first_row:], self.dst[first_row:]),
+            np.repeat(rows, 2), self._num_nodes)
+        self._init_pending(self._num_nodes, self._num_edges)
+
+    def subset(self, rows, node_map, num_nodes, edge_map, num_edges):
+        """
+        New store over `rows` (kept in order), with node and edge ids
+        renumbered through node_map/edge_map (old id -> new id)
+        """
+        return TransactionStore(node_map[self.src[rows]], node_map[self.dst[rows]],
+                                self.amounts[rows], self.epoch[rows],
+                                edge_map[self.edge_codes[rows]], num_nodes, num_edges)
+
+    def _append_columns(self, **columns):
+        """Append to the column arrays, growing buffers geometrically"""
+        start = len(self.src)
+        for name, values in columns.items():
+            current = getattr(self, name)
+            end = start + len(values)
+            buffer = self._buffers.get(name)
+            if buffer is None or len(buffer) < end:
+                buffer = np.empty(max(2 * end, 1024), dtype=current.dtype)
+                buffer[:start] = current
+                self._buffers[name] = buffer
+            buffer[start:end] = values
+            setattr(self, name, buffer[:end])
+
+    def nbytes(self):
+        """Bytes held by the columns and indexes (excluding spare buffer space)"""
+        pending = [chunk for chunks in (*self._pending_edges.values(),
+                                        *self._pending_nodes.values()) for chunk in chunks]
+        return sum(getattr(self, name).nbytes for name in COLUMN_ARRAYS) + sum(
+            getattr(self, f'_{name}').nbytes for name in INDEX_ARRAYS) + sum(
+            chunk.nbytes for chunk in pending)
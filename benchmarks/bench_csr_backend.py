@@ -0,0 +1,100 @@
+"""
+CSR backend benchmark
+Builds the same synthetic transaction graph with the networkx and CSR
+backends and reports retained memory, build time and per-detector runtime
+
+Usage:
+    python benchmarks/bench_csr_backend.py --accounts 1000000 --rows 2000000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from graph_analyzer import GraphAnalyzer
+
+DETECTORS = [
+    'identify_legitimate_patterns',
+    'detect_fan_in_patterns',
+    'detect_fan_out_patterns',
+    'detect_cycles',
+    'detect_shell_networks',
+]
+
+
+def make_transactions(rows, accounts, seed=7):
+    """Sparse random transfer graph with a few hub accounts"""
+    rng = np.random.default_rng(seed)
+    senders = rng.integers(0, accounts, size=rows)
+    # A Zipf-ish receiver distribution gives some high in-degree hubs
+    receivers = np.minimum(rng.zipf(1.6, size=rows) - 1, accounts - 1)
+    receivers = (receivers * 7919 + rng.integers(0, 2, size=rows)) % accounts
+    base = np.datetime64('2024-01-01T00:00:00')
+    offsets = rng.integers(0, 30 * 24 * 3600, size=rows).astype('timedelta64[s]')
+    ids = np.array([f'ACC_{i:07d}' for i in range(accounts)], dtype=object)
+    return pd.DataFrame({
+        'transaction_id': np.arange(rows),
+        'sender_id': ids[senders],
+        'receiver_id': ids[receivers],
+        'amount': np.round(rng.uniform(10, 10000, size=rows), 2),
+        'timestamp': pd.Series(base + offsets).dt.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+
+def measure_memory(df, backend):
+    """Retained and peak traced allocations of one build (tracing skews timings)"""
+    gc.collect()
+    tracemalloc.start()
+    analyzer = GraphAnalyzer(df, backend=backend)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del analyzer
+    gc.collect()
+    return retained, peak
+
+
+def run_backend(df, backend, detectors):
+    retained, peak = measure_memory(df, backend)
+
+    start = time.perf_counter()
+    analyzer = GraphAnalyzer(df, backend=backend)
+    build_time = time.perf_counter() - start
+
+    print(f'\n[{backend}]')
+    print(f'  build               {build_time:8.2f}s')
+    print(f'  graph memory        {retained / 2**20:8.1f} MiB (peak {peak / 2**20:.1f} MiB)')
+
+    for name in detectors:
+        start = time.perf_counter()
+        result = getattr(analyzer, name)()
+        print(f'  {name:<30}{time.perf_counter() - start:8.2f}s  ({len(result):,} results)')
+
+    del analyzer
+    gc.collect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=1_000_000)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--backends', nargs='+', default=['csr', 'networkx'])
+    parser.add_argument('--detectors', nargs='+', default=DETECTORS)
+    args = parser.parse_args()
+
+    df = make_transactions(args.rows, args.accounts)
+    print(f'{args.rows:,} transactions, {args.accounts:,} accounts')
+
+    for backend in args.backends:
+        run_backend(df, backend, args.detectors)
+
+
+if __name__ == '__main__':
+    main()
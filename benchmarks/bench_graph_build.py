@@ -0,0 +1,116 @@
+"""
+Graph construction benchmark
+Compares the columnar GraphAnalyzer._build_graph against the original
+iterrows-based builder and reports rows/sec for both
+
+Usage:
+    python benchmarks/bench_graph_build.py --rows 1000000 --accounts 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from graph_analyzer import GraphAnalyzer
+
+
+def legacy_build_graph(df):
+    """Reference copy of the original row-by-row builder"""
+    G = nx.DiGraph()
+    node_transactions = defaultdict(list)
+    edge_transactions = defaultdict(list)
+
+    for _, row in df.iterrows():
+        sender = row['sender_id']
+        receiver = row['receiver_id']
+        amount = float(row['amount'])
+        timestamp = row['timestamp']
+
+        if sender not in G:
+            G.add_node(sender, total_sent=0, total_received=0,
+                       transaction_count=0, timestamps=[])
+        if receiver not in G:
+            G.add_node(receiver, total_sent=0, total_received=0,
+                       transaction_count=0, timestamps=[])
+
+        G.nodes[sender]['total_sent'] += amount
+        G.nodes[sender]['transaction_count'] += 1
+        G.nodes[sender]['timestamps'].append(timestamp)
+
+        G.nodes[receiver]['total_received'] += amount
+        G.nodes[receiver]['transaction_count'] += 1
+        G.nodes[receiver]['timestamps'].append(timestamp)
+
+        if G.has_edge(sender, receiver):
+            G[sender][receiver]['weight'] += amount
+            G[sender][receiver]['count'] += 1
+            G[sender][receiver]['transactions'].append({
+                'amount': amount, 'timestamp': timestamp
+            })
+        else:
+            G.add_edge(sender, receiver, weight=amount, count=1,
+                       transactions=[{'amount': amount, 'timestamp': timestamp}])
+
+        node_transactions[sender].append(row.to_dict())
+        node_transactions[receiver].append(row.to_dict())
+        edge_transactions[(sender, receiver)].append(row.to_dict())
+
+    return G
+
+
+def make_transactions(rows, accounts, seed=42):
+    """Random transaction frame with the five required columns"""
+    rng = np.random.default_rng(seed)
+    base = np.datetime64('2024-01-01T00:00:00')
+    offsets = rng.integers(0, 30 * 24 * 3600, size=rows).astype('timedelta64[s]')
+    return pd.DataFrame({
+        'transaction_id': [f'TX_{i}' for i in range(rows)],
+        'sender_id': [f'ACC_{i}' for i in rng.integers(0, accounts, size=rows)],
+        'receiver_id': [f'ACC_{i}' for i in rng.integers(0, accounts, size=rows)],
+        'amount': np.round(rng.uniform(10, 10000, size=rows), 2),
+        'timestamp': pd.Series(base + offsets).dt.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+
+def time_builder(build, df, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--accounts', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--legacy-max-rows', type=int, default=200_000,
+                        help='Skip the legacy builder above this size (it takes minutes)')
+    args = parser.parse_args()
+
+    df = make_transactions(args.rows, args.accounts)
+    print(f'{args.rows:,} rows, {args.accounts:,} accounts')
+
+    columnar = time_builder(GraphAnalyzer, df, args.repeat)
+    print(f'columnar  {columnar:8.3f}s  {args.rows / columnar:14,.0f} rows/sec')
+
+    if args.rows <= args.legacy_max_rows:
+        legacy = time_builder(legacy_build_graph, df, 1)
+        print(f'iterrows  {legacy:8.3f}s  {args.rows / legacy:14,.0f} rows/sec')
+        print(f'speedup   {legacy / columnar:8.1f}x')
+    else:
+        print('iterrows  skipped (--legacy-max-rows)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Ingestion benchmark
+Writes a synthetic CSV, then parses it in a fresh subprocess per mode
+('python' is the old sniffing read_csv, 'stream' is chunked ingestion)
+and reports rows/sec and peak RSS. The columnar modes read the same rows
+from Parquet ('parquet'; timestamps as a timestamp column, sorted, in
+row groups of --row-group rows) and Arrow IPC/Feather ('feather');
+'parquet_day' reads one day of the 30 through row-group pushdown.
+
+Usage:
+    python benchmarks/bench_ingestion.py --rows 5000000 --accounts 500000
+    python benchmarks/bench_ingestion.py --modes stream,parquet,feather,parquet_day
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+
+def write_csv(path, rows, accounts, seed=5, chunk_rows=1_000_000):
+    rng = np.random.default_rng(seed)
+    base = np.datetime64('2024-01-01T00:00:00', 's')
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        pd.DataFrame({
+            'transaction_id': [f'TX_{i}' for i in range(start, start + n)],
+            'sender_id': [f'ACC_{i}' for i in rng.integers(0, accounts, size=n)],
+            'receiver_id': [f'ACC_{i}' for i in rng.integers(0, accounts, size=n)],
+            'amount': np.round(rng.uniform(10, 5000, size=n), 2),
+            'timestamp': (base + rng.integers(0, 30 * 86400, size=n)).astype(str),
+        }).to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def write_columnar(csv_path, tmp, row_group_rows):
+    """The CSV as Parquet (sorted by timestamp) and Feather, timestamps typed"""
+    import pyarrow as pa
+    import pyarrow.csv
+    import pyarrow.feather
+    import pyarrow.parquet
+
+    table = pyarrow.csv.read_csv(csv_path, convert_options=pyarrow.csv.ConvertOptions(
+        column_types={'timestamp': pa.timestamp('s')}))
+    table = table.sort_by('timestamp')
+    pyarrow.parquet.write_table(table, os.path.join(tmp, 'transactions.parquet'),
+                                row_group_size=row_group_rows)
+    pyarrow.feather.write_feather(table, os.path.join(tmp, 'transactions.feather'))
+
+
+def peak_rss_mb():
+    """Peak RSS of this process; VmHWM resets on exec, ru_maxrss may not"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, path):
+    """Child process: parse the file and print seconds, row count and peak RSS"""
+    from ingestion import parse_time_range, read_input, read_transactions
+    start = time.perf_counter()
+    stem = os.path.splitext(path)[0]
+    if mode == 'parquet':
+        rows = len(read_input(stem + '.parquet'))
+    elif mode == 'parquet_day':
+        rows = len(read_input(stem + '.parquet',
+                              time_range=parse_time_range('2024-01-15', '2024-01-16')))
+    elif mode == 'feather':
+        rows = len(read_input(stem + '.feather'))
+    else:
+        with open(path, 'rb') as stream:
+            if mode == 'python':
+                rows = len(pd.read_csv(stream, sep=None, engine='python',
+                                       on_bad_lines='skip', encoding_errors='ignore'))
+            else:
+                rows = len(read_transactions(stream))
+    seconds = time.perf_counter() - start
+    print(seconds, rows, peak_rss_mb())
+
+
+def measure(mode, path):
+    output = subprocess.run([sys.executable, __file__, '--child', mode, path],
+                            check=True, capture_output=True, text=True).stdout.split()
+    return float(output[0]), int(output[1]), float(output[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--accounts', type=int, default=500_000)
+    parser.add_argument('--modes', default='python,stream')
+    parser.add_argument('--row-group', type=int, default=1_000_000,
+                        help='Parquet row group size')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'transactions.csv')
+        write_csv(path, args.rows, args.accounts)
+        size_mb = os.path.getsize(path) / 2**20
+        print(f'{args.rows:,} rows, {size_mb:,.0f} MB on disk')
+        modes = args.modes.split(',')
+        if any(mode.startswith(('parquet', 'feather')) for mode in modes):
+            write_columnar(path, tmp, args.row_group)
+            for ext in ('parquet', 'feather'):
+                size_mb = os.path.getsize(os.path.join(tmp, f'transactions.{ext}')) / 2**20
+                print(f'{ext}: {size_mb:,.0f} MB on disk')
+
+        for mode in modes:
+            seconds, rows, peak_mb = measure(mode, path)
+            print(f'{mode:>11}: {seconds:7.2f}s  {rows / seconds:>12,.0f} rows/s  '
+                  f'peak RSS {peak_mb:,.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
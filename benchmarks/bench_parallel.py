@@ -0,0 +1,85 @@
+"""
+Parallel detection benchmark
+Times cycle and shell-chain search from 1 to N workers on a synthetic graph
+made of many medium-size components
+
+Usage:
+    python benchmarks/bench_parallel.py --components 2000 --size 300 --max-workers 32
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from graph_analyzer import GraphAnalyzer
+
+
+def make_transactions(components, size, degree, seed=3):
+    """Disjoint random components; ids are offset so components never touch"""
+    rng = np.random.default_rng(seed)
+    rows = components * size * degree
+    comp = np.repeat(np.arange(components), size * degree)
+    senders = comp * size + rng.integers(0, size, size=rows)
+    receivers = comp * size + rng.integers(0, size, size=rows)
+    ids = np.array([f'ACC_{i}' for i in range(components * size)], dtype=object)
+    return pd.DataFrame({
+        'transaction_id': np.arange(rows),
+        'sender_id': ids[senders],
+        'receiver_id': ids[receivers],
+        'amount': np.round(rng.uniform(10, 5000, size=rows), 2),
+        'timestamp': '2024-01-01 00:00:00',
+    })
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--components', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=300, help='Accounts per component')
+    parser.add_argument('--degree', type=int, default=2, help='Transactions per account')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--backend', default='csr')
+    args = parser.parse_args()
+
+    df = make_transactions(args.components, args.size, args.degree)
+    analyzer = GraphAnalyzer(df, backend=args.backend)
+    print(f'{args.components:,} components x {args.size} accounts, {len(df):,} transactions')
+    print(f'{"workers":>8} {"cycles":>10} {"speedup":>8} {"shells":>10} {"speedup":>8}')
+
+    baseline = None
+    for workers in worker_counts(args.max_workers):
+        start = time.perf_counter()
+        cycles = analyzer.detect_cycles(workers=workers)
+        cycle_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        chains = analyzer.detect_shell_networks(workers=workers)
+        shell_time = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = (cycle_time, shell_time, cycles, chains)
+        elif (cycles, chains) != baseline[2:]:
+            raise SystemExit(f'result mismatch at {workers} workers')
+
+        print(f'{workers:>8} {cycle_time:>9.2f}s {baseline[0] / cycle_time:>7.1f}x '
+              f'{shell_time:>9.2f}s {baseline[1] / shell_time:>7.1f}x')
+
+    print(f'{len(baseline[2]):,} cycles, {len(baseline[3]):,} shell chains (identical across runs)')
+
+
+if __name__ == '__main__':
+    main()
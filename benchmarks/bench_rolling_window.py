@@ -0,0 +1,93 @@
+"""
+Rolling-window monitoring benchmark
+Replays a synthetic mule network (see synthetic.py) in timestamp order
+through a RollingWindowMonitor, batch by batch, and reports ingest
+throughput in transactions/sec, per-batch latency and the size of the
+window graph. The same stream is replayed without expiry (an unbounded
+window, like an append-only session) for comparison.
+
+Usage:
+    python benchmarks/bench_rolling_window.py --accounts 100000 --transactions 500000 --window-days 7
+    python benchmarks/bench_rolling_window.py --max-search-degree 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rolling_window import RollingWindowMonitor
+from synthetic import generate
+
+UNBOUNDED_HOURS = 100 * 365 * 24
+
+
+def replay(stream, batch_rows, window_hours, interval_hours, parameters):
+    monitor = RollingWindowMonitor(window_hours, interval_hours, parameters)
+    latencies = []
+    peak = {'transactions': 0, 'accounts': 0, 'edges': 0, 'store_bytes': 0}
+    new_alerts = retracted = 0
+    started = time.perf_counter()
+    for start in range(0, len(stream), batch_rows):
+        batch_started = time.perf_counter()
+        change = monitor.ingest(stream.iloc[start:start + batch_rows])
+        latencies.append(time.perf_counter() - batch_started)
+        new_alerts += len(change['new_alerts'])
+        retracted += len(change['retracted_alerts'])
+        for name in peak:
+            peak[name] = max(peak[name], change['window'][name])
+    elapsed = time.perf_counter() - started
+    latencies = np.array(latencies) * 1000
+    return {
+        'rate': len(stream) / elapsed,
+        'seconds': elapsed,
+        'p50': np.percentile(latencies, 50),
+        'p95': np.percentile(latencies, 95),
+        'peak': peak,
+        'final': monitor.summary(),
+        'new_alerts': new_alerts,
+        'retracted': retracted
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=100_000)
+    parser.add_argument('--transactions', type=int, default=500_000)
+    parser.add_argument('--batch', type=int, default=5_000, help='Rows per ingested batch')
+    parser.add_argument('--window-days', type=float, default=7)
+    parser.add_argument('--interval-hours', type=float, default=24,
+                        help='Expiry interval (stream time)')
+    parser.add_argument('--max-search-degree', type=int, default=0,
+                        help='Cycle search skips accounts with more counterparties (0 = off)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-unbounded', action='store_true',
+                        help='Do not replay without expiry')
+    args = parser.parse_args()
+
+    df, _ = generate(accounts=args.accounts, transactions=args.transactions, seed=args.seed)
+    stream = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    print(f'stream: {len(stream):,} transactions over 30 days, batches of {args.batch:,}')
+
+    runs = [(f'{args.window_days:g}-day window', args.window_days * 24)]
+    if not args.skip_unbounded:
+        runs.append(('unbounded', UNBOUNDED_HOURS))
+    print(f'{"mode":16} {"tx/s":>9} {"total s":>8} {"p50 ms":>8} {"p95 ms":>8} '
+          f'{"peak tx":>9} {"peak edges":>10} {"peak MB":>8} {"alerts":>7} {"retracted":>9}')
+    for label, hours in runs:
+        result = replay(stream, args.batch, hours, args.interval_hours,
+                        {'max_search_degree': args.max_search_degree})
+        peak = result['peak']
+        print(f'{label:16} {result["rate"]:9.0f} {result["seconds"]:8.2f} {result["p50"]:8.1f} '
+              f'{result["p95"]:8.1f} {peak["transactions"]:9,} {peak["edges"]:10,} '
+              f'{peak["store_bytes"] / 2**20:8.1f} {result["new_alerts"]:7,} '
+              f'{result["retracted"]:9,}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Response serialization benchmark
+Bytes on the wire and encode time of one analysis result: Flask's
+jsonify encoder vs the fast encoder, row vs columnar format, each
+uncompressed, gzip and (if installed) brotli. "full graph" is the result
+with the unreduced graph_data the API returned before level-of-detail.
+
+Usage:
+    python benchmarks/bench_serialization.py --transactions 500000 --accounts 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from detection_engine import MoneyMulingDetector
+from serialization import columnar, compress, dumps, encodings
+from synthetic import generate
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--transactions', type=int, default=500_000)
+    parser.add_argument('--accounts', type=int, default=100_000)
+    parser.add_argument('--backend', default='csr')
+    args = parser.parse_args()
+
+    df, _ = generate(accounts=args.accounts, transactions=args.transactions)
+    detector = MoneyMulingDetector(df, backend=args.backend)
+    results = detector.analyze()
+    full = dict(results, graph_data=detector.analyzer.get_graph_data())
+    flask_dumps = Flask(__name__).json.dumps
+
+    cases = [
+        ('jsonify, full graph', lambda: flask_dumps(full).encode()),
+        ('jsonify', lambda: flask_dumps(results).encode()),
+        ('fast', lambda: dumps(results)),
+        ('fast, columnar', lambda: dumps(columnar(results))),
+    ]
+    print(f'{len(df):,} transactions, {len(results["suspicious_accounts"]):,} suspicious, '
+          f'{len(results["graph_data"]["nodes"]):,} graph nodes '
+          f'(full graph {len(full["graph_data"]["nodes"]):,})')
+    print(f'{"format":22} {"encode":>9} {"raw":>10}' +
+          ''.join(f' {name:>10} {name + " time":>10}' for name in encodings()))
+    for name, encode in cases:
+        body, seconds = timed(encode)
+        line = f'{name:22} {seconds * 1000:7.1f}ms {len(body) / 1e6:8.2f}MB'
+        for encoding in encodings():
+            packed, packing = timed(compress, body, encoding)
+            line += f' {len(packed) / 1e6:8.2f}MB {packing * 1000:8.1f}ms'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Server start-up and throughput benchmark
+Starts the API under each serving mode and measures:
+- cold start: time from process spawn to the first healthy /api/health
+- requests/sec and latency with concurrent clients for each scenario:
+  - health: GET /api/health
+  - analyze-cached: the same CSV every time (result-cache hits)
+  - analyze: a CSV that differs on every request (full analysis)
+  - mixed: half the clients run analyze, the others health; only the
+    health requests are reported (responsiveness while analyses run)
+
+Modes: the Flask development server, gunicorn with its defaults (one sync
+worker, the previous deployment) and the gunicorn.conf.py profile.
+
+Usage:
+    python benchmarks/bench_server.py --clients 8 --seconds 10
+"""
+
+import argparse
+import http.client
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+SAMPLE_CSV = os.path.join(ROOT_DIR, 'sample_data', 'sample_transactions.csv')
+
+MODES = {
+    'flask-dev': [sys.executable, 'app.py'],
+    'gunicorn-default': [sys.executable, '-m', 'gunicorn', '-c', '/dev/null', '-b', '{bind}', 'app:app'],
+    'gunicorn-profile': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+}
+SCENARIOS = ('health', 'analyze-cached', 'analyze', 'mixed')
+START_TIMEOUT = 60
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def multipart(csv):
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="t.csv"\r\n'
+            f'Content-Type: text/csv\r\n\r\n').encode() + csv + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def request(port, scenario, csv):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        if scenario == 'health':
+            conn.request('GET', '/api/health')
+        else:
+            if scenario == 'analyze':
+                csv += f'TX_{uuid.uuid4().hex},BENCH_A,BENCH_B,1.00,2024-01-01 00:00:00\n'.encode()
+            body, content_type = multipart(csv)
+            conn.request('POST', '/api/analyze', body=body, headers={'Content-Type': content_type})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def start(mode, port, env):
+    command = [arg.format(bind=f'127.0.0.1:{port}') for arg in MODES[mode]]
+    started = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while time.perf_counter() - started < START_TIMEOUT:
+        if proc.poll() is not None:
+            raise RuntimeError(f'{mode} exited with {proc.returncode}')
+        try:
+            if request(port, 'health', b'') == 200:
+                return proc, time.perf_counter() - started
+        except OSError:
+            time.sleep(0.02)
+    proc.kill()
+    raise RuntimeError(f'{mode} did not start within {START_TIMEOUT}s')
+
+
+def load(port, scenario, csv, clients, seconds):
+    """(requests/sec, median latency, p95 latency, errors) over `seconds`"""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+
+    def client(scenario, measured):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = request(port, scenario, csv) == 200
+            except OSError:
+                ok = False
+            if measured:
+                (latencies if ok else errors).append(time.perf_counter() - started)
+
+    if scenario == 'mixed':
+        background = clients // 2
+        plan = [('analyze', False)] * background + [('health', True)] * (clients - background)
+    else:
+        plan = [(scenario, True)] * clients
+    threads = [threading.Thread(target=client, args=args) for args in plan]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    pick = (lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+            if latencies else float('nan'))
+    return len(latencies) / elapsed, pick(0.5), pick(0.95), len(errors)
+
+
+def import_seconds(env, repeat=3):
+    """Best wall time of a fresh interpreter importing the app module"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import app'], cwd=BACKEND_DIR, env=env,
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    args = parser.parse_args()
+
+    with open(SAMPLE_CSV, 'rb') as f:
+        csv = f.read()
+    if not csv.endswith(b'\n'):
+        csv += b'\n'
+
+    state = tempfile.mkdtemp(prefix='bench-server-')
+    env = dict(os.environ, SNAPSHOT_DIR=os.path.join(state, 'snapshots'), FLASK_DEBUG='0',
+               GUNICORN_ACCESS_LOG='/dev/null')
+    try:
+        print(f'import app: {import_seconds(env):.2f}s')
+        print(f'{"mode":18} {"scenario":15} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"errors":>7}')
+        for mode in args.modes.split(','):
+            port = free_port()
+            proc, startup = start(mode, port, dict(env, PORT=str(port)))
+            try:
+                print(f'{mode:18} {"cold start":15} {startup:7.2f}s')
+                for scenario in args.scenarios.split(','):
+                    rate, p50, p95, errors = load(port, scenario, csv, args.clients, args.seconds)
+                    print(f'{mode:18} {scenario:15} {rate:8.1f} {p50:8.1f} {p95:8.1f} {errors:7}')
+            finally:
+                proc.terminate()
+                proc.wait()
+    finally:
+        shutil.rmtree(state, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Incremental session benchmark
+Seeds a session with a history of transactions, then times appending
+hourly-sized deltas against re-running the full analysis on history + delta
+
+Usage:
+    python benchmarks/bench_sessions.py --history 1000000 --delta 5000 --batches 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from detection_engine import MoneyMulingDetector
+from sessions import SessionStore
+
+
+def make_transactions(rows, accounts, start_row=0, seed=7):
+    rng = np.random.default_rng(seed + start_row)
+    base = np.datetime64('2024-01-01T00:00:00', 's')
+    ids = np.array([f'ACC_{i}' for i in range(accounts)], dtype=object)
+    return pd.DataFrame({
+        'transaction_id': np.arange(start_row, start_row + rows),
+        'sender_id': ids[rng.integers(0, accounts, size=rows)],
+        'receiver_id': ids[rng.integers(0, accounts, size=rows)],
+        'amount': np.round(rng.uniform(10, 5000, size=rows), 2),
+        'timestamp': (base + rng.integers(0, 30 * 86400, size=rows)).astype(str),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--history', type=int, default=1_000_000)
+    parser.add_argument('--accounts', type=int, default=500_000)
+    parser.add_argument('--delta', type=int, default=5_000)
+    parser.add_argument('--batches', type=int, default=5)
+    parser.add_argument('--skip-full', action='store_true', help='Do not time the full re-run')
+    args = parser.parse_args()
+
+    history = make_transactions(args.history, args.accounts)
+    start = time.perf_counter()
+    session = SessionStore().create(history)
+    print(f'seeded session with {args.history:,} transactions in {time.perf_counter() - start:.2f}s')
+
+    frames = [history]
+    for batch in range(args.batches):
+        delta = make_transactions(args.delta, args.accounts,
+                                  start_row=args.history + batch * args.delta)
+        frames.append(delta)
+
+        start = time.perf_counter()
+        change = session.append(delta)
+        append_time = time.perf_counter() - start
+        line = (f'batch {batch + 1}: append {args.delta:,} rows in {append_time:.3f}s '
+                f'({len(change["new_fraud_rings"])} new rings)')
+
+        if not args.skip_full:
+            start = time.perf_counter()
+            MoneyMulingDetector(pd.concat(frames, ignore_index=True)).analyze()
+            line += f', full re-run {time.perf_counter() - start:.2f}s'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Graph snapshot benchmark
+Compares re-analysis from CSV (parse + build + detect) with opening a
+memory-mapped snapshot and running detection with new parameters
+
+Usage:
+    python benchmarks/bench_snapshots.py --rows 1000000 --accounts 200000
+"""
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from bench_graph_build import make_transactions
+from detection_engine import MoneyMulingDetector
+from graph_analyzer import GraphAnalyzer
+from ingestion import read_transactions
+from snapshots import load_snapshot, save_snapshot
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--accounts', type=int, default=100_000)
+    parser.add_argument('--threshold', type=int, default=8,
+                        help='Fan threshold for the re-analysis')
+    args = parser.parse_args()
+
+    csv = make_transactions(args.rows, args.accounts).to_csv(index=False).encode()
+    print(f'{args.rows:,} rows, {args.accounts:,} accounts, {len(csv) / 1e6:.0f} MB CSV')
+    parameters = {'threshold': args.threshold}
+
+    transactions, parse = timed(read_transactions, io.BytesIO(csv))
+    analyzer, build = timed(GraphAnalyzer, transactions, backend='csr')
+    directory = tempfile.mkdtemp(prefix='snapshot-bench-')
+    try:
+        path = os.path.join(directory, 'snapshot')
+        meta, save = timed(save_snapshot, analyzer, path)
+        del analyzer, transactions
+
+        (opened, _), open_time = timed(load_snapshot, path)
+        _, detect = timed(MoneyMulingDetector(None, analyzer=opened, parameters=parameters).analyze)
+
+        print(f'snapshot  {meta["bytes"] / 1e6:8.1f} MB written in {save:.2f}s')
+        print(f'from CSV  parse {parse:.2f}s + build {build:.2f}s')
+        print(f'snapshot  open {open_time * 1000:.1f}ms')
+        print(f'startup   {(parse + build) / open_time:8.0f}x faster (detection itself {detect:.2f}s)')
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Benchmark harness
+Generates a synthetic mule network (see synthetic.py). For each backend it
+times GraphAnalyzer construction, every detector and
+MoneyMulingDetector.analyze end to end. It also records peak RSS and
+planted-pattern recall. Each backend runs in its own subprocess so peak
+memory is not shared. Results are written as JSON; --compare prints the
+speedup against an earlier run.
+
+Usage:
+    python benchmarks/run_benchmarks.py --accounts 1000000 --transactions 5000000
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<earlier>.json
+    python benchmarks/run_benchmarks.py --max-search-degree 50 --prune-legitimate --label pruned
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+DETECTORS = [
+    'identify_legitimate_patterns',
+    'detect_cycles',
+    'detect_fan_in_patterns',
+    'detect_fan_out_patterns',
+    'detect_shell_networks',
+    'get_graph_data',
+]
+
+GENERATOR_ARGS = ['accounts', 'transactions', 'alpha', 'cycles', 'fan_in', 'fan_out',
+                  'fan_size', 'shells', 'merchants', 'payrolls', 'seed']
+
+# Detection parameters passed through to the detectors and analyze()
+DETECTION_ARGS = ['prune_legitimate', 'max_search_degree']
+
+
+def peak_rss_mb():
+    """Peak RSS of this process in MiB (VmHWM on Linux)"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    import resource
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round(time.perf_counter() - start, 4)
+
+
+def run_backend(params, backend, skip, detection):
+    """Child process body: returns the result dict for one backend"""
+    from detection_engine import CYCLE_TIME_BUDGET_SECONDS, MAX_CYCLES, MoneyMulingDetector
+    from graph_analyzer import GraphAnalyzer
+    from synthetic import decoy_false_positives, generate, recall
+
+    (df, truth), generate_time = timed(generate, **params)
+    result = {'rows': len(df), 'generate_seconds': generate_time,
+              'peak_rss_mb': {'generated': peak_rss_mb()}, 'seconds': {}}
+
+    analyzer, result['seconds']['build'] = timed(GraphAnalyzer, df, backend=backend)
+    result['peak_rss_mb']['build'] = peak_rss_mb()
+    result['graph'] = analyzer.graph_size()
+
+    outputs = {}
+    for name in DETECTORS:
+        if name in skip:
+            continue
+        legitimate = outputs.get('identify_legitimate_patterns')
+        exclude = legitimate if detection['prune_legitimate'] else None
+        kwargs = {}
+        if name == 'detect_cycles':
+            kwargs = {'time_budget': CYCLE_TIME_BUDGET_SECONDS, 'max_cycles': MAX_CYCLES,
+                      'exclude': exclude, 'max_degree': detection['max_search_degree']}
+        elif name == 'detect_shell_networks':
+            kwargs = {'exclude': exclude}
+        outputs[name], result['seconds'][name] = timed(getattr(analyzer, name), **kwargs)
+        result['peak_rss_mb'][name] = peak_rss_mb()
+    result['cycle_stats'] = analyzer.cycle_stats
+    result['recall'] = recall(truth, cycles=outputs.get('detect_cycles'),
+                              fan_in=outputs.get('detect_fan_in_patterns'),
+                              fan_out=outputs.get('detect_fan_out_patterns'),
+                              shells=outputs.get('detect_shell_networks'))
+    result['counts'] = {name: len(output) for name, output in outputs.items()
+                        if name != 'get_graph_data'}
+    del analyzer, outputs
+
+    if 'analyze' not in skip:
+        detector = MoneyMulingDetector(df, backend=backend, parameters=detection)
+        output, result['seconds']['analyze'] = timed(detector.analyze)
+        result['peak_rss_mb']['analyze'] = peak_rss_mb()
+        result['stage_seconds'] = {stage['stage']: stage['seconds']
+                                   for stage in output['summary']['timings']}
+        flagged = {acc['account_id'] for acc in output['suspicious_accounts']}
+        result['fraud_rings'] = len(output['fraud_rings'])
+        result['decoy_false_positives'] = decoy_false_positives(truth, flagged)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    """Print per-step speedups (previous / current) for shared backends"""
+    print(f"\ncompared with {previous['meta'].get('label') or previous['meta']['timestamp']}")
+    for backend, result in current['results'].items():
+        before = previous['results'].get(backend)
+        if not before:
+            continue
+        print(f'[{backend}]')
+        for step, seconds in result['seconds'].items():
+            old = before['seconds'].get(step)
+            if old and seconds:
+                print(f'  {step:<30}{old:9.2f}s -> {seconds:9.2f}s  {old / seconds:6.2f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=100_000)
+    parser.add_argument('--transactions', type=int, default=500_000)
+    parser.add_argument('--alpha', type=float, default=1.1, help='Power-law exponent')
+    parser.add_argument('--cycles', type=int, default=100)
+    parser.add_argument('--fan-in', type=int, default=20)
+    parser.add_argument('--fan-out', type=int, default=20)
+    parser.add_argument('--fan-size', type=int, default=12)
+    parser.add_argument('--shells', type=int, default=50)
+    parser.add_argument('--merchants', type=int, default=10)
+    parser.add_argument('--payrolls', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--backends', default='networkx,csr')
+    parser.add_argument('--skip', default='', help='Comma-separated detectors (or analyze) to skip')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results'))
+    parser.add_argument('--label', default='')
+    parser.add_argument('--prune-legitimate', type=int, nargs='?', const=1, default=0,
+                        help='Cycle/shell search skips legitimate accounts')
+    parser.add_argument('--max-search-degree', type=int, default=0,
+                        help='Cycle search skips nodes above this degree (0 = no cap)')
+    parser.add_argument('--compare', help='Earlier result JSON to compare against')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    params = {name: getattr(args, name) for name in GENERATOR_ARGS}
+    detection = {name: getattr(args, name) for name in DETECTION_ARGS}
+    skip = set(filter(None, args.skip.split(',')))
+
+    if args.child:
+        print(json.dumps(run_backend(params, args.child, skip, detection)))
+        return
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'label': args.label,
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'params': params,
+            'detection': detection,
+            'skip': sorted(skip),
+        },
+        'results': {}
+    }
+
+    child_args = [arg for arg in sys.argv[1:] if not arg.startswith('--compare')]
+    for backend in args.backends.split(','):
+        print(f'[{backend}] running ...', flush=True)
+        proc = subprocess.run([sys.executable, __file__, *child_args, '--child', backend],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            report['results'][backend] = {'error': proc.stderr.strip().splitlines()[-1:]}
+            continue
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        report['results'][backend] = result
+        steps = ', '.join(f'{k} {v:.2f}s' for k, v in result['seconds'].items())
+        print(f'  {steps}')
+        print(f"  peak RSS {max(result['peak_rss_mb'].values()):,.0f} MiB, recall {result['recall']}")
+
+    os.makedirs(args.output, exist_ok=True)
+    name = f"bench-{report['meta']['timestamp'].replace(':', '')}"
+    if args.label:
+        name += f'-{args.label}'
+    path = os.path.join(args.output, f'{name}.json')
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'wrote {path}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
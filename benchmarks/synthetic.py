@@ -0,0 +1,167 @@
+"""
+Synthetic mule-network generator
+Power-law background transfers with planted laundering patterns and
+legitimate decoys, plus the ground truth needed to score recall.
+
+Planted patterns use their own account ids, so the background cannot hide
+or break them:
+- cycles of length 3-5
+- fan-in/fan-out bursts inside one 72h window
+- shell chains of low-activity accounts
+Merchant decoys (many payers, no payouts) and payroll decoys (many
+near-identical payouts) check false positives.
+"""
+
+import numpy as np
+import pandas as pd
+
+BASE_TIME = np.datetime64('2024-01-01T00:00:00', 's')
+HISTORY_SECONDS = 30 * 24 * 3600
+
+
+def _power_law_weights(count, alpha, rng):
+    """Zipf-like sampling weights over `count` accounts (shuffled ranks)"""
+    weights = np.arange(1, count + 1, dtype=np.float64) ** -alpha
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+class _Builder:
+    def __init__(self, rng):
+        self.rng = rng
+        self.parts = []
+
+    def add(self, senders, receivers, amounts, offsets):
+        self.parts.append((np.asarray(senders, dtype=object), np.asarray(receivers, dtype=object),
+                           np.asarray(amounts, dtype=np.float64),
+                           np.asarray(offsets, dtype=np.int64)))
+
+    def frame(self, shuffle=True):
+        senders, receivers, amounts, offsets = (np.concatenate(cols) for cols in zip(*self.parts))
+        order = self.rng.permutation(len(senders)) if shuffle else np.arange(len(senders))
+        return pd.DataFrame({
+            'transaction_id': [f'TX_{i}' for i in range(len(order))],
+            'sender_id': senders[order],
+            'receiver_id': receivers[order],
+            'amount': np.round(amounts[order], 2),
+            'timestamp': (BASE_TIME + offsets[order]).astype(str),
+        })
+
+
+def generate(accounts=100_000, transactions=500_000, alpha=1.1, cycles=100,
+             fan_in=20, fan_out=20, fan_size=12, shells=50, shell_length=(3, 6),
+             merchants=10, payrolls=10, seed=42):
+    """
+    Build a transaction DataFrame and its ground truth
+    Returns (df, truth) where truth holds the planted 'cycles',
+    'fan_in'/'fan_out' hubs, 'shell_chains', and the 'merchants'/'payroll'
+    decoy accounts
+    """
+    rng = np.random.default_rng(seed)
+    builder = _Builder(rng)
+    truth = {'cycles': [], 'fan_in': [], 'fan_out': [], 'shell_chains': [],
+             'merchants': [], 'payroll': []}
+
+    # Background: power-law senders and receivers (heavy-tailed degrees)
+    ids = np.array([f'ACC_{i}' for i in range(accounts)], dtype=object)
+    weights = _power_law_weights(accounts, alpha, rng)
+    senders = rng.choice(accounts, size=transactions, p=weights)
+    receivers = rng.choice(accounts, size=transactions, p=weights)
+    keep = senders != receivers
+    builder.add(ids[senders[keep]], ids[receivers[keep]],
+                rng.lognormal(5, 1.2, size=keep.sum()),
+                rng.integers(0, HISTORY_SECONDS, size=keep.sum()))
+
+    # Cycles of length 3-5, each hop a few hours apart
+    for c in range(cycles):
+        length = 3 + c % 3
+        members = [f'CYC_{c}_{i}' for i in range(length)]
+        start = rng.integers(0, HISTORY_SECONDS - 86400)
+        builder.add(members, members[1:] + members[:1],
+                    rng.uniform(5000, 10000) * (0.97 ** np.arange(length)),
+                    start + np.arange(length) * 3600)
+        truth['cycles'].append(members)
+
+    # Fan-in/fan-out bursts: fan_size counterparties inside 72 hours
+    for kind, count in (('fan_in', fan_in), ('fan_out', fan_out)):
+        for f in range(count):
+            hub = f'{kind.upper()}_{f}'
+            others = [f'{kind.upper()}_{f}_{i}' for i in range(fan_size)]
+            start = rng.integers(0, HISTORY_SECONDS - 3 * 86400)
+            offsets = start + np.sort(rng.integers(0, 72 * 3600, size=fan_size))
+            amounts = rng.uniform(500, 2000, size=fan_size)
+            if kind == 'fan_in':
+                builder.add(others, [hub] * fan_size, amounts, offsets)
+            else:
+                builder.add([hub] * fan_size, others, amounts, offsets)
+            truth[kind].append(hub)
+
+    # Shell chains: every intermediary only passes money along once
+    for s in range(shells):
+        length = int(rng.integers(shell_length[0], shell_length[1] + 1))
+        members = [f'SHELL_{s}_{i}' for i in range(length)]
+        start = rng.integers(0, HISTORY_SECONDS - 86400)
+        builder.add(members[:-1], members[1:],
+                    rng.uniform(8000, 15000) * (0.98 ** np.arange(length - 1)),
+                    start + np.arange(length - 1) * 7200)
+        truth['shell_chains'].append(members)
+
+    # Merchant decoys: many background payers, at most one payout
+    for m in range(merchants):
+        merchant = f'SHOP_{m}'
+        payers = ids[rng.choice(accounts, size=40, replace=False, p=weights)]
+        builder.add(payers, [merchant] * len(payers), rng.uniform(20, 300, size=len(payers)),
+                    rng.integers(0, HISTORY_SECONDS, size=len(payers)))
+        truth['merchants'].append(merchant)
+
+    # Payroll decoys: near-identical monthly salaries to many employees
+    for p in range(payrolls):
+        employer = f'EMPLOYER_{p}'
+        staff = ids[rng.choice(accounts, size=25, replace=False)]
+        builder.add([employer] * len(staff), staff, rng.normal(3000, 30, size=len(staff)),
+                    np.full(len(staff), 25 * 86400) + rng.integers(0, 3600, size=len(staff)))
+        truth['payroll'].append(employer)
+
+    return builder.frame(), truth
+
+
+def _rotate(cycle):
+    start = cycle.index(min(cycle))
+    return tuple(cycle[start:] + cycle[:start])
+
+
+def _contains_path(chain, path):
+    n = len(path)
+    return any(chain[i:i + n] == path for i in range(len(chain) - n + 1))
+
+
+def _fraction(hits):
+    return round(sum(hits) / len(hits), 4) if hits else None
+
+
+def recall(truth, cycles=None, fan_in=None, fan_out=None, shells=None):
+    """Fraction of planted patterns recovered by each detector's output"""
+    scores = {}
+    if cycles is not None:
+        found = {_rotate(list(c)) for c in cycles}
+        scores['cycles'] = _fraction([_rotate(c) in found for c in truth['cycles']])
+    if fan_in is not None:
+        hubs = {p['account'] for p in fan_in}
+        scores['fan_in'] = _fraction([hub in hubs for hub in truth['fan_in']])
+    if fan_out is not None:
+        hubs = {p['account'] for p in fan_out}
+        scores['fan_out'] = _fraction([hub in hubs for hub in truth['fan_out']])
+    if shells is not None:
+        # Planted chains have no predecessor, so a match starts at their head
+        by_start = {}
+        for chain in shells:
+            by_start.setdefault(chain[0], []).append(list(chain))
+        scores['shell_chains'] = _fraction([
+            any(_contains_path(chain, planted) for chain in by_start.get(planted[0], []))
+            for planted in truth['shell_chains']])
+    return scores
+
+
+def decoy_false_positives(truth, flagged):
+    """Decoy accounts that ended up flagged as suspicious"""
+    return sorted(acc for acc in truth['merchants'] + truth['payroll'] if acc in flagged)
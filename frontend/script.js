@@ -111,9 +111,12 @@ function initUpload() {
   $('runBtn').addEventListener('click', () => runAnalysis(selectedFile));
 }
 
+const INPUT_EXTENSIONS = ['.csv', '.parquet', '.pq', '.arrow', '.feather', '.ipc'];
+
 function handleFile(file) {
-  if (!file.name.toLowerCase().endsWith('.csv')) {
-    toast('error', 'Invalid file', 'Upload a .csv file.');
+  const name = file.name.toLowerCase();
+  if (!INPUT_EXTENSIONS.some(ext => name.endsWith(ext))) {
+    toast('error', 'Invalid file', 'Upload a .csv, .parquet or .arrow/.feather file.');
     return;
   }
   selectedFile = file;
@@ -155,19 +158,19 @@ async function runAnalysis(file) {
   if (!file) return;
 
   $('runBtn').disabled = true;
-  toast('info', 'Analysis started', 'Uploading CSV and detecting patterns…');
+  toast('info', 'Analysis started', 'Uploading file and detecting patterns…');
 
   try {
     const fd = new FormData();
     fd.append('file', file);
 
-    const res = await fetch('/api/analyze', { method: 'POST', body: fd });
+    const res = await fetch('/api/analyze?format=columnar', { method: 'POST', body: fd });
     if (!res.ok) {
       const err = await res.json().catch(() => ({}));
       throw new Error(err.error || 'Analysis failed');
     }
 
-    analysisResults = await res.json();
+    analysisResults = fromColumnar(await res.json());
     enableExports(true);
 
     fillDashboard();
@@ -175,6 +178,7 @@ async function runAnalysis(file) {
     buildCharts();
     buildTimeline();
     buildGraph();
+    graphLodNote();
 
     fillHomeSnapshot();
 
@@ -187,6 +191,26 @@ async function runAnalysis(file) {
   }
 }
 
+/* ?format=columnar responses: parallel arrays back to row objects (edges are node indexes) */
+function columnsToRows(cols) {
+  const keys = Object.keys(cols);
+  const n = keys.length ? cols[keys[0]].length : 0;
+  return Array.from({ length: n }, (_, i) => Object.fromEntries(keys.map(k => [k, cols[k][i]])));
+}
+
+function fromColumnar(data) {
+  if (data.format !== 'columnar') return data;
+  const { format, ...rest } = data;
+  const { format: graphFormat, ...graph } = data.graph_data;
+  const nodes = columnsToRows(graph.nodes);
+  const edges = columnsToRows(graph.edges).map(e => ({ ...e, source: nodes[e.source].id, target: nodes[e.target].id }));
+  return {
+    ...rest,
+    suspicious_accounts: columnsToRows(data.suspicious_accounts),
+    graph_data: { ...graph, nodes, edges }
+  };
+}
+
 function enableExports(on) {
   $('downloadJsonBtn').disabled = !on;
   $('downloadJsonBtn2').disabled = !on;
@@ -323,11 +347,38 @@ function fillDashboard() {
   if (s.ai_insight) {
     aiBox.classList.remove('hidden');
     aiText.textContent = s.ai_insight;
+  } else if (s.ai_insight_id) {
+    aiBox.classList.remove('hidden');
+    aiText.textContent = 'Generating AI insight…';
+    pollInsight(s.ai_insight_id, analysisResults);
   } else {
     aiBox.classList.add('hidden');
   }
 }
 
+// The AI insight is written in the background; poll until it is done
+async function pollInsight(insightId, results, tries = 40) {
+  for (let i = 0; i < tries; i++) {
+    await new Promise(resolve => setTimeout(resolve, 1500));
+    if (analysisResults !== results) return;
+    let insight;
+    try {
+      const res = await fetch(`/api/insights/${encodeURIComponent(insightId)}`);
+      if (!res.ok) break;
+      insight = await res.json();
+    } catch (e) {
+      continue;
+    }
+    if (analysisResults !== results) return;
+    if (insight.status === 'done') {
+      $('aiInsightText').textContent = insight.insight;
+      return;
+    }
+    if (insight.status === 'failed' || insight.status === 'timeout') break;
+  }
+  if (analysisResults === results) $('aiInsightBox').classList.add('hidden');
+}
+
 function fillTables() {
   fillRings();
   fillAccounts();
@@ -400,7 +451,7 @@ function fillRings() {
     tr.innerHTML = `
       <td><strong>${r.ring_id}</strong></td>
       <td>${badge(r.pattern_type)}</td>
-      <td>${r.member_accounts.length}</td>
+      <td>${r.member_accounts.length}${(r.path_count || 1) > 1 ? ` <span class="muted small">(${r.path_count} paths)</span>` : ''}</td>
       <td>${riskChip(r.risk_score)}</td>
       <td class="muted small">${r.member_accounts.join(', ')}</td>
       <td style="text-align:right">
@@ -574,7 +625,7 @@ function buildGraph() {
   s.attr('width', w).attr('height', h);
 
   const nodes = (analysisResults.graph_data?.nodes || []).map(n => ({ ...n }));
-  const links = (analysisResults.graph_data?.edges || []).map(e => ({ source: e.source, target: e.target, weight: Number(e.weight || 0) }));
+  const links = (analysisResults.graph_data?.edges || []).map(e => ({ source: e.source, target: e.target, weight: Number(e.weight || 0), aggregated: !!e.aggregated }));
 
   const linkColor = cssVar('--link') || 'rgba(15,23,42,0.22)';
   const labelColor = cssVar('--muted') || 'rgba(15,23,42,0.62)';
@@ -604,14 +655,16 @@ function buildGraph() {
     .attr('stroke', linkColor)
     .attr('stroke-opacity', 0.8)
     .attr('stroke-width', d => Math.min(3, 0.6 + Math.sqrt(d.weight / 2000)))
+    .attr('stroke-dasharray', d => d.aggregated ? '4 3' : null)
     .attr('marker-end', 'url(#arrow)');
 
   nodeSel = root.append('g')
     .selectAll('circle')
     .data(nodes)
     .join('circle')
-    .attr('r', d => d.is_suspicious ? 9 : 6)
+    .attr('r', d => d.is_group ? Math.min(22, 10 + 2 * Math.log10(d.member_count || 1)) : (d.is_suspicious ? 9 : 6))
     .attr('fill', d => {
+      if (d.is_group) return '#e2e8f0';
       if (!d.is_suspicious) return '#94a3b8';
       return (Number(d.suspicion_score || 0) >= 70) ? '#ef4444' : '#f59e0b';
     })
@@ -631,7 +684,7 @@ function buildGraph() {
     .selectAll('text')
     .data(nodes)
     .join('text')
-    .text(d => d.id.length > 12 ? d.id.slice(0, 12) + '…' : d.id)
+    .text(d => d.is_group ? `${d.id} (${d.member_count})` : (d.id.length > 12 ? d.id.slice(0, 12) + '…' : d.id))
     .attr('font-size', 9)
     .attr('fill', labelColor)
     .attr('dx', 10)
@@ -654,6 +707,48 @@ function buildGraph() {
   applyGraphFilters();
 }
 
+/* Large graphs arrive reduced: suspicious neighborhoods plus grouped "other" accounts */
+function graphLodNote() {
+  const lod = analysisResults.graph_data?.lod;
+  if (!lod || lod.mode === 'full') return;
+  toast('info', 'Reduced graph',
+    `Showing ${lod.shown_nodes.toLocaleString()} of ${lod.total_nodes.toLocaleString()} accounts; ` +
+    `${lod.grouped_accounts.toLocaleString()} grouped. Click an account to expand its neighborhood.`);
+}
+
+async function expandNode(accId) {
+  const lod = analysisResults.graph_data?.lod;
+  const analysisId = analysisResults.summary?.analysis_id;
+  if (!lod || lod.mode === 'full' || !analysisId) return;
+
+  try {
+    const res = await fetch(`/api/graph/${encodeURIComponent(accId)}?analysis=${encodeURIComponent(analysisId)}&hops=2`);
+    if (!res.ok) {
+      const err = await res.json().catch(() => ({}));
+      throw new Error(err.error || 'Could not load neighborhood');
+    }
+    const hood = await res.json();
+
+    // Merge real accounts and edges; group totals stay those of the overview
+    const graph = analysisResults.graph_data;
+    const known = new Set(graph.nodes.map(n => n.id));
+    const added = hood.nodes.filter(n => !n.is_group && !known.has(n.id));
+    const edgeKeys = new Set(graph.edges.map(e => `${e.source}|${e.target}`));
+    const newEdges = hood.edges.filter(e => !e.aggregated && !edgeKeys.has(`${e.source}|${e.target}`));
+    if (!added.length && !newEdges.length) return;
+
+    graph.nodes.push(...added);
+    graph.edges.push(...newEdges);
+    graph.lod.shown_nodes += added.length;
+    buildGraph();
+    nodeSel.attr('stroke', n => n.id === accId ? 'rgba(22,163,74,0.9)' : 'rgba(0,0,0,0.25)')
+      .attr('stroke-width', n => n.id === accId ? 3 : 1.5);
+    toast('success', 'Neighborhood expanded', `${added.length} accounts added around ${accId}.`);
+  } catch (e) {
+    toast('error', 'Expand failed', e.message);
+  }
+}
+
 function showTip(event, d) {
   const tip = $('nodeTip');
   tip.innerHTML = `
@@ -662,6 +757,7 @@ function showTip(event, d) {
       <div><span class="muted">Sent:</span> $${fmtMoney(d.total_sent)}</div>
       <div><span class="muted">Received:</span> $${fmtMoney(d.total_received)}</div>
       <div><span class="muted">Tx count:</span> ${d.transaction_count}</div>
+      ${d.is_group ? `<div><span class="muted">Grouped accounts:</span> ${d.member_count}</div>` : ''}
       <div><span class="muted">Score:</span> ${(Number(d.suspicion_score || 0)).toFixed(1)}</div>
     </div>
   `;
@@ -684,8 +780,14 @@ function selectNode(d) {
     <div><span class="muted">Patterns:</span> ${pStr}</div>
   `;
 
+  if (d.is_group) {
+    $('selectedNode').innerHTML += `<div><span class="muted">Grouped accounts:</span> ${d.member_count}</div>`;
+  }
+
   nodeSel.attr('stroke', n => n.id === d.id ? 'rgba(22,163,74,0.9)' : 'rgba(0,0,0,0.25)')
     .attr('stroke-width', n => n.id === d.id ? 3 : 1.5);
+
+  if (!d.is_group) expandNode(d.id);
 }
 
 function applyGraphFilters() {
@@ -0,0 +1,47 @@
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+SAMPLE_FILES = sorted(glob.glob(os.path.join(ROOT, 'sample_data', '*.csv')))
+
+
+def csr_arrays(src, dst, num_nodes):
+    """(indptr, indices) adjacency of an edge list"""
+    src, dst = np.asarray(src), np.asarray(dst)
+    order = np.argsort(src, kind='stable')
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+    return indptr, dst[order]
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The Flask app module, imported in a scratch directory with AI insights off"""
+    directory = tmp_path_factory.mktemp('app')
+    os.environ['SNAPSHOT_DIR'] = str(directory / 'snapshots')
+    os.environ['INSIGHT_PROVIDER'] = 'none'
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture(params=SAMPLE_FILES, ids=os.path.basename)
+def sample_df(request):
+    """Each sample_data/ CSV as a DataFrame"""
+    return pd.read_csv(request.param)
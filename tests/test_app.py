@@ -0,0 +1,51 @@
+import io
+
+from conftest import SAMPLE_FILES
+from graph_view import GraphViewCache
+
+
+def upload(client, path, url='/api/analyze'):
+    with open(path, 'rb') as f:
+        return client.post(url, data={'file': (io.BytesIO(f.read()), 'upload.csv')})
+
+
+def test_graph_view_is_rebuilt_on_cache_hit(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'graph_views', GraphViewCache(1))
+    first, other = SAMPLE_FILES
+    results = upload(client, first).get_json()
+    analysis_id = results['summary']['analysis_id']
+    account = results['suspicious_accounts'][0]['account_id']
+    url = f'/api/graph/{account}?analysis={analysis_id}'
+    expected = client.get(url).get_json()
+
+    upload(client, other)
+    assert client.get(url).status_code == 404
+
+    again = upload(client, first).get_json()
+    assert again['summary']['cache_hit']
+    assert 'graph_view' in [stage['stage'] for stage in again['summary']['timings']]
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_json() == expected
+
+
+def test_snapshot_cache_hit_after_graph_view_eviction(client, app_module, monkeypatch):
+    snapshot_id = upload(client, SAMPLE_FILES[0], '/api/snapshots').get_json()['snapshot_id']
+    url = f'/api/snapshots/{snapshot_id}/analyze'
+    results = client.post(url).get_json()
+    monkeypatch.setattr(app_module, 'graph_views', GraphViewCache())
+
+    response = client.post(url)
+    assert response.status_code == 200
+    again = response.get_json()
+    assert again['summary']['cache_hit']
+    assert again['fraud_rings'] == results['fraud_rings']
+    account = results['suspicious_accounts'][0]['account_id']
+    neighborhood = client.get(f'/api/graph/{account}?analysis={again["summary"]["analysis_id"]}')
+    assert neighborhood.status_code == 200
+
+def test_upload_errors_are_format_neutral(client, tmp_path):
+    for name in ('empty.csv', 'empty.parquet', 'empty.feather'):
+        response = client.post('/api/analyze', data={'file': (io.BytesIO(b''), name)})
+        assert response.status_code == 400
+        assert 'CSV' not in response.get_json()['error']
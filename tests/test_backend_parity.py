@@ -0,0 +1,57 @@
+"""
+The networkx and CSR backends must agree on every detector and on the
+final rings and scores
+"""
+
+import pytest
+
+from detection_engine import MoneyMulingDetector
+from graph_analyzer import GraphAnalyzer
+
+DETECTORS = [
+    ('detect_cycles', {}),
+    ('detect_temporal_cycles', {'max_duration_hours': 168}),
+    ('detect_fan_in_patterns', {}),
+    ('detect_fan_out_patterns', {}),
+    ('detect_shell_networks', {}),
+    ('identify_legitimate_patterns', {}),
+    ('get_graph_data', {}),
+]
+
+
+@pytest.fixture
+def analyzers(sample_df):
+    return (GraphAnalyzer(sample_df, backend='networkx'),
+            GraphAnalyzer(sample_df, backend='csr'))
+
+
+@pytest.mark.parametrize('name, kwargs', DETECTORS, ids=[name for name, _ in DETECTORS])
+def test_detector_parity(analyzers, name, kwargs):
+    reference, candidate = analyzers
+    assert getattr(candidate, name)(**kwargs) == getattr(reference, name)(**kwargs)
+
+
+def test_sample_data_has_every_pattern(analyzers):
+    reference, _ = analyzers
+    assert reference.detect_cycles()
+    assert reference.detect_fan_in_patterns()
+    assert reference.detect_fan_out_patterns()
+    assert reference.detect_shell_networks()
+
+
+def _results(df, backend, parameters=None):
+    results = MoneyMulingDetector(df, backend=backend, parameters=parameters).analyze()
+    del results['summary']['timings']
+    return results
+
+
+@pytest.mark.parametrize('parameters', [None, {'consolidate_rings': 0},
+                                        {'temporal_cycles': 1}, {'prune_legitimate': 1}],
+                         ids=['default', 'unconsolidated', 'temporal', 'pruned'])
+def test_analysis_parity(sample_df, parameters):
+    reference = _results(sample_df, 'networkx', parameters)
+    candidate = _results(sample_df, 'csr', parameters)
+    assert candidate['fraud_rings'] == reference['fraud_rings']
+    assert candidate['suspicious_accounts'] == reference['suspicious_accounts']
+    assert candidate['summary'] == reference['summary']
+    assert candidate['graph_data'] == reference['graph_data']
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import batch
+from conftest import SAMPLE_FILES
+
+BAD_AMOUNT = ('transaction_id,sender_id,receiver_id,amount,timestamp\n'
+              'T1,A,B,abc,2024-01-01 00:00:00\n')
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    good = tmp_path / 'good.csv'
+    good.write_bytes(open(SAMPLE_FILES[0], 'rb').read())
+    bad = tmp_path / 'bad.csv'
+    bad.write_text(BAD_AMOUNT)
+    return [str(bad), str(good)]
+
+
+def test_bad_file_is_recorded_and_the_batch_continues(inputs, tmp_path):
+    output = tmp_path / 'results.jsonl'
+    summary = batch.run_batch(inputs, str(output), workers=1)
+    assert summary['failed'] == 1
+    bad, good = summary['per_file']
+    assert bad['error'].startswith('ValueError')
+    assert good['error'] is None and good['fraud_rings'] > 0
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record['file'] for record in records] == [inputs[1]]
+
+
+def test_detection_errors_are_recorded(inputs, tmp_path, monkeypatch):
+    def fail(self):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(batch.MoneyMulingDetector, 'analyze', fail)
+    record = batch.analyze_file(inputs[1])
+    assert record['error'] == 'Analysis failed: RuntimeError: boom'
+
+
+def test_merged_batch_skips_bad_files(inputs, tmp_path):
+    summary = batch.run_batch(inputs, str(tmp_path / 'merged.jsonl'), workers=1, merge=True)
+    assert summary['failed'] == 1
+    assert summary['merged']['fraud_rings'] > 0
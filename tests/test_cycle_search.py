@@ -0,0 +1,64 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from conftest import csr_arrays
+from cycle_search import find_cycles
+
+
+def random_graph(num_nodes, num_edges, seed):
+    """Distinct edges without self-loops, as the analyzer's adjacency has"""
+    rng = np.random.default_rng(seed)
+    src, dst = rng.integers(0, num_nodes, size=(2, num_edges))
+    pairs = np.unique(src[src != dst] * num_nodes + dst[src != dst])
+    return pairs // num_nodes, pairs % num_nodes
+
+
+def brute_force(src, dst, min_length=3, max_length=5):
+    """Bounded simple cycles from networkx, rotated to their smallest node"""
+    graph = nx.DiGraph(zip(src.tolist(), dst.tolist()))
+    cycles = set()
+    for cycle in nx.simple_cycles(graph, length_bound=max_length):
+        if len(cycle) >= min_length:
+            first = cycle.index(min(cycle))
+            cycles.add(tuple(cycle[first:] + cycle[:first]))
+    return cycles
+
+
+def test_distinct_cycles_over_the_same_accounts():
+    # 0->1->2->3->0 and 0->2->1->3->0 visit the same four accounts
+    indptr, indices = csr_arrays([0, 1, 2, 3, 0, 2, 1], [1, 2, 3, 0, 2, 1, 3], 4)
+    cycles, stats = find_cycles(indptr, indices, min_length=4)
+    assert sorted(cycles) == [[0, 1, 2, 3], [0, 2, 1, 3]]
+    assert stats['cycles'] == 2 and not stats['truncated']
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_cycles_match_brute_force_in_canonical_order(seed):
+    src, dst = random_graph(40, 120, seed)
+    indptr, indices = csr_arrays(src, dst, 40)
+    cycles, _ = find_cycles(indptr, indices)
+    assert all(cycle[0] == min(cycle) for cycle in cycles)
+    assert [cycle[0] for cycle in cycles] == sorted(cycle[0] for cycle in cycles)
+    assert len(cycles) == len({tuple(cycle) for cycle in cycles})
+    assert {tuple(cycle) for cycle in cycles} == brute_force(src, dst)
+
+
+def test_max_cycles_keeps_the_first_cycles_and_flags_truncation():
+    indptr, indices = csr_arrays(*random_graph(40, 120, seed=0), 40)
+    everything, _ = find_cycles(indptr, indices)
+    total = len(everything)
+    for max_cycles in (1, 10, total - 1, total):
+        cycles, stats = find_cycles(indptr, indices, max_cycles=max_cycles)
+        assert cycles == everything[:max_cycles]
+        assert stats['truncated']
+    cycles, stats = find_cycles(indptr, indices, max_cycles=total + 1)
+    assert cycles == everything and not stats['truncated']
+
+
+def test_time_budget_stops_the_search():
+    indptr, indices = csr_arrays(*random_graph(300, 3000, seed=1), 300)
+    cycles, stats = find_cycles(indptr, indices, time_budget=0)
+    assert stats['truncated']
+    everything, _ = find_cycles(indptr, indices, max_cycles=len(cycles) + 1)
+    assert cycles == everything[:len(cycles)]
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from fan_patterns import account_window, densest_windows
+from timestamps import NAT
+
+HOUR = 3600
+
+
+def windows_for(times, senders, threshold=3, time_window_hours=2):
+    """densest_windows for one receiver (node 0) of senders at the given epoch seconds"""
+    epoch = np.asarray(times, dtype=np.int64)
+    receivers = np.zeros(len(epoch), dtype=np.int64)
+    amounts = np.full(len(epoch), 100.0)
+    windows = densest_windows(receivers, np.asarray(senders), epoch, amounts,
+                              np.ones(1, dtype=bool), threshold, time_window_hours)
+    single = account_window(np.arange(len(epoch)), np.asarray(senders), epoch, amounts,
+                            threshold, time_window_hours)
+    assert windows.get(0) == single
+    return single
+
+
+def test_window_includes_its_exact_end():
+    window = windows_for([0, HOUR, 2 * HOUR], [1, 2, 3])
+    assert window['counterparty_count'] == 3
+    assert (window['start'], window['end']) == ('1970-01-01 00:00:00', '1970-01-01 02:00:00')
+    assert windows_for([0, HOUR, 2 * HOUR + 1], [1, 2, 3]) is None
+
+
+def test_duplicate_timestamps_count_each_counterparty_once():
+    window = windows_for([5 * HOUR] * 5, [1, 2, 2, 3, 1])
+    assert window['counterparty_count'] == 3
+    assert window['counterparties'] == [1, 2, 3]
+    assert window['transaction_count'] == 5
+    assert window['total_amount'] == 500.0
+    assert windows_for([5 * HOUR] * 4, [1, 2, 2, 1]) is None
+
+
+def test_unparseable_timestamps_are_skipped():
+    assert windows_for([0, NAT, HOUR], [1, 2, 3]) is None
+    assert windows_for([0, NAT, HOUR, HOUR], [1, 2, 3, 4])['counterparties'] == [1, 3, 4]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_densest_window_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    times = rng.integers(0, 48, 60) * HOUR // 2
+    senders = rng.integers(0, 25, 60)
+    best = max(len(set(senders[(times >= t) & (times <= t + 6 * HOUR)].tolist()))
+               for t in times.tolist())
+    window = windows_for(times, senders, threshold=1, time_window_hours=6)
+    assert window['counterparty_count'] == best
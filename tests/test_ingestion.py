@@ -0,0 +1,153 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SAMPLE_FILES
+from detection_engine import MoneyMulingDetector
+from ingestion import (InputFormatError, MissingColumnsError, encode_frame, parse_time_range,
+                       read_input, read_transactions)
+from timestamps import NAT, to_epoch_seconds
+
+CSV = '''transaction_id,sender_id,receiver_id,amount,timestamp
+T1,A,B,100.5,2024-01-01 00:00:00
+T2,B,C,200,2024-01-01 01:00:00
+T3,C,A,300,not a date
+T4,A,C,400,2024-01-01 02:00:00
+'''
+
+
+def read(text, **kwargs):
+    return read_transactions(io.BytesIO(text.encode()), **kwargs)
+
+
+def same_columns(a, b):
+    assert a.node_ids.tolist() == b.node_ids.tolist()
+    for name in ('src', 'dst', 'amounts', 'epoch'):
+        assert getattr(a, name).tolist() == getattr(b, name).tolist()
+
+
+@pytest.mark.parametrize('delimiter', [';', '\t', '|'])
+def test_delimiter_is_sniffed(delimiter):
+    same_columns(read(CSV.replace(',', delimiter)), read(CSV))
+
+
+def test_header_bom_and_padding_are_ignored():
+    text = '\ufeff' + CSV.replace('sender_id,receiver_id', ' sender_id , receiver_id ')
+    same_columns(read(text), read(CSV))
+
+
+@pytest.mark.parametrize('path', SAMPLE_FILES)
+def test_chunked_reads_match_one_chunk(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    whole = read_transactions(io.BytesIO(data), amount_dtype=np.float64)
+    same_columns(read_transactions(io.BytesIO(data), chunk_rows=7, amount_dtype=np.float64),
+                 whole)
+    same_columns(whole, encode_frame(pd.read_csv(path)))
+
+
+def test_unparseable_timestamps_are_kept_as_nat():
+    columns = read(CSV)
+    assert len(columns) == 4
+    assert columns.epoch[2] == NAT
+    assert columns.epoch[0] == 1704067200
+    assert columns.node_ids.tolist() == ['A', 'B', 'C']
+
+
+def test_time_range_keeps_start_and_drops_end():
+    start, end = parse_time_range('2024-01-01 01:00:00', '2024-01-01T02:00:00')
+    columns = read(CSV, chunk_rows=2, time_range=(start, end))
+    assert columns.epoch.tolist() == [start]
+    assert columns.node_ids.tolist() == ['B', 'C']
+    # Unparseable timestamps are outside any range
+    assert NAT not in read(CSV, time_range=(None, end)).epoch.tolist()
+
+
+def test_parse_time_range():
+    assert parse_time_range() is None
+    assert parse_time_range('', None) is None
+    assert parse_time_range('1704067200', None) == (1704067200, None)
+    assert parse_time_range(None, '2024-01-01') == (None, 1704067200)
+    with pytest.raises(ValueError):
+        parse_time_range('yesterday')
+    with pytest.raises(ValueError):
+        parse_time_range('2024-01-02', '2024-01-01')
+
+
+def test_missing_columns_and_empty_uploads():
+    with pytest.raises(MissingColumnsError) as error:
+        read(CSV.replace('amount', 'value'))
+    assert error.value.missing == ['amount']
+    with pytest.raises(pd.errors.EmptyDataError):
+        read('')
+    with pytest.raises(InputFormatError):
+        read_input(io.BytesIO(CSV.encode()), 'transactions.xlsx')
+
+
+def detection_results(path):
+    results = MoneyMulingDetector(read_input(path, amount_dtype=np.float64)).analyze()
+    return results['fraud_rings'], results['suspicious_accounts']
+
+
+@pytest.mark.parametrize('suffix', ['.parquet', '.feather'])
+@pytest.mark.parametrize('typed_timestamps', [False, True], ids=['string', 'timestamp'])
+def test_columnar_files_give_the_csv_results(sample_df, tmp_path, suffix, typed_timestamps):
+    pytest.importorskip('pyarrow')
+    csv_path = tmp_path / 'transactions.csv'
+    sample_df.to_csv(csv_path, index=False)
+    df = sample_df.copy()
+    if typed_timestamps:
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+    path = tmp_path / f'transactions{suffix}'
+    if suffix == '.parquet':
+        df.to_parquet(path, row_group_size=17)
+    else:
+        df.to_feather(path)
+    same_columns(read_input(path, amount_dtype=np.float64),
+                 read_input(csv_path, amount_dtype=np.float64))
+    assert detection_results(path) == detection_results(csv_path)
+
+
+def test_parquet_row_groups_outside_the_time_range_are_skipped(sample_df, tmp_path):
+    pytest.importorskip('pyarrow')
+    df = sample_df.assign(timestamp=pd.to_datetime(sample_df['timestamp']))
+    df = df.sort_values('timestamp', kind='stable')
+    path = tmp_path / 'transactions.parquet'
+    df.to_parquet(path, row_group_size=10)
+    times = df['timestamp'].astype(str).tolist()
+    time_range = parse_time_range(times[len(times) // 3], times[2 * len(times) // 3])
+
+    columns = read_input(path, time_range=time_range)
+    read, total = columns.row_groups
+    assert read < total
+    csv_path = tmp_path / 'transactions.csv'
+    df.to_csv(csv_path, index=False)
+    same_columns(columns, read_input(csv_path, time_range=time_range))
+
+
+def test_timestamps_parse_to_epoch_seconds():
+    epoch = to_epoch_seconds(['2024-01-01 00:00:00', '2024-01-01T01:00:00+01:00',
+                              '2024-01-01', None, 'soon'])
+    assert epoch.tolist() == [1704067200, 1704067200, 1704067200, NAT, NAT]
+
+
+def test_unreadable_inputs_have_format_neutral_errors(tmp_path):
+    pytest.importorskip('pyarrow')
+    df = pd.read_csv(io.StringIO(CSV)).drop(columns='amount')
+    messages = set()
+    for suffix in ('.csv', '.parquet', '.feather'):
+        path = tmp_path / f'missing{suffix}'
+        getattr(df, {'.csv': 'to_csv', '.parquet': 'to_parquet',
+                     '.feather': 'to_feather'}[suffix])(path, **({'index': False}
+                                                                if suffix == '.csv' else {}))
+        with pytest.raises(MissingColumnsError) as error:
+            read_input(path)
+        messages.add(str(error.value))
+    assert messages == {'Missing required columns: amount'}
+
+    path = tmp_path / 'broken.parquet'
+    path.write_bytes(b'not a parquet file')
+    with pytest.raises(InputFormatError, match='Unreadable parquet file'):
+        read_input(path)
@@ -0,0 +1,144 @@
+import io
+import threading
+import time
+
+import pytest
+
+from conftest import SAMPLE_FILES
+from insights import InsightProvider, InsightService, StaticProvider, provider_from_env
+from result_cache import ResultCache
+
+RINGS = [{'pattern_type': 'cycle'}, {'pattern_type': 'fan_in'}]
+SUMMARY = {'total_accounts_analyzed': 100, 'suspicious_accounts_flagged': 7}
+
+
+def summary(flagged):
+    return dict(SUMMARY, suspicious_accounts_flagged=flagged)
+
+
+def wait_for(predicate, seconds=5):
+    deadline = time.time() + seconds
+    while not predicate():
+        assert time.time() < deadline, 'timed out waiting'
+        time.sleep(0.01)
+
+
+class Recorder:
+    """Provider text that counts calls and can block until released"""
+
+    def __init__(self, block=False, error=None):
+        self.calls = 0
+        self.error = error
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, prompt):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise RuntimeError(self.error)
+        return f'insight {self.calls}'
+
+
+def test_provider_interface_is_abstract():
+    with pytest.raises(TypeError):
+        InsightProvider()
+
+
+def test_provider_from_env():
+    assert provider_from_env({}) is None
+    assert provider_from_env({'INSIGHT_PROVIDER': 'static'}).name == 'static'
+    assert provider_from_env({'INSIGHT_PROVIDER': 'none', 'GOOGLE_API_KEY': 'k'}) is None
+    assert InsightService(None).request(RINGS, SUMMARY) is None
+
+
+def test_insights_are_memoized_on_the_facts():
+    text = Recorder()
+    service = InsightService(StaticProvider(text))
+    key = service.request(RINGS, SUMMARY)
+    wait_for(lambda: service.get(key).status == 'done')
+    assert service.request(list(reversed(RINGS)), dict(SUMMARY)) == key
+    assert service.get(key).text == 'insight 1'
+    assert text.calls == 1
+
+    other = service.request(RINGS, summary(8))
+    assert other != key
+    wait_for(lambda: service.get(other).status == 'done')
+    assert text.calls == 2
+
+
+def test_failed_insights_are_retried():
+    text = Recorder(error='quota exceeded')
+    service = InsightService(StaticProvider(text))
+    key = service.request(RINGS, SUMMARY)
+    wait_for(lambda: service.get(key).status == 'failed')
+    assert service.get(key).error == 'quota exceeded'
+
+    text.error = None
+    assert service.request(RINGS, SUMMARY) == key
+    wait_for(lambda: service.get(key).status == 'done')
+    assert text.calls == 2
+
+
+def test_slow_calls_time_out_and_their_late_result_is_dropped():
+    text = Recorder(block=True)
+    service = InsightService(StaticProvider(text), timeout_seconds=0.1)
+    key = service.request(RINGS, SUMMARY)
+    wait_for(lambda: service.get(key).status == 'timeout')
+    insight = service.get(key)
+    assert insight.text is None and insight.to_dict()['seconds'] == 0.1
+
+    text.release.set()
+    time.sleep(0.1)
+    assert service.get(key).status == 'timeout'
+    assert service.stats()['insights'] == {'timeout': 1}
+
+
+def test_a_stuck_provider_does_not_leave_later_insights_queued():
+    text = Recorder(block=True)
+    service = InsightService(StaticProvider(text), timeout_seconds=0.05, max_concurrent=1)
+    first = service.request(RINGS, summary(1))
+    second = service.request(RINGS, summary(2))
+    wait_for(lambda: service.get(second).status == 'timeout')
+    assert service.get(first).status == 'timeout'
+    assert service.get(second).started_at is None
+
+    # no retry is piled onto the pool while the stuck call holds its slot
+    assert service.request(RINGS, summary(1)) == first
+    assert service.get(first).status == 'timeout'
+    text.release.set()
+    wait_for(lambda: not service.get(second).in_flight)
+    assert text.calls == 1
+
+    service.timeout_seconds = 5
+    service.request(RINGS, summary(2))
+    wait_for(lambda: service.get(second).status == 'done')
+    assert text.calls == 2
+
+
+def test_providers_get_the_time_left_before_the_deadline():
+    service = InsightService(StaticProvider('late', delay_seconds=1), timeout_seconds=0.05)
+    key = service.request(RINGS, SUMMARY)
+    started = time.time()
+    wait_for(lambda: not service.get(key).in_flight)
+    assert time.time() - started < 0.5
+    assert service.get(key).status == 'timeout'
+
+
+def test_analysis_returns_an_insight_id(client, app_module, monkeypatch):
+    text = Recorder()
+    monkeypatch.setattr(app_module, 'insights', InsightService(StaticProvider(text)))
+    monkeypatch.setattr(app_module, 'result_cache', ResultCache(max_bytes=1 << 20))
+    with open(SAMPLE_FILES[0], 'rb') as f:
+        data = f.read()
+
+    results = client.post('/api/analyze', data={'file': (io.BytesIO(data), 'a.csv')}).get_json()
+    key = results['summary']['ai_insight_id']
+    wait_for(lambda: client.get(f'/api/insights/{key}').get_json()['status'] == 'done')
+    assert client.get(f'/api/insights/{key}').get_json()['insight'] == 'insight 1'
+
+    again = client.post('/api/analyze', data={'file': (io.BytesIO(data), 'a.csv')}).get_json()
+    assert again['summary']['cache_hit'] and again['summary']['ai_insight_id'] == key
+    assert text.calls == 1
+    assert client.get('/api/insights/unknown').status_code == 404
@@ -0,0 +1,98 @@
+import io
+import threading
+import time
+
+import pytest
+
+from conftest import SAMPLE_FILES
+from job_queue import JobQueue, QueueFullError
+
+
+def wait_for(predicate, seconds=10):
+    deadline = time.time() + seconds
+    while not predicate():
+        assert time.time() < deadline, 'timed out waiting'
+        time.sleep(0.01)
+
+
+def staged(release):
+    """Job function that enters two stages, waiting for `release` in the first"""
+    def run(job, value):
+        job.advance('parse')
+        release.wait(5)
+        job.advance('detect')
+        return {'value': value}
+    return run
+
+
+def test_job_lifecycle():
+    release = threading.Event()
+    queue = JobQueue(max_workers=1)
+    first = queue.submit(staged(release), 1, stages=('parse', 'detect', 'output'))
+    second = queue.submit(staged(release), 2, stages=('parse', 'detect', 'output'))
+    wait_for(lambda: first.to_dict()['stage'] == 'parse')
+    assert first.status == 'running' and second.status == 'queued'
+    assert first.to_dict()['progress'] == 0.0
+    assert 'result' not in first.to_dict()
+
+    release.set()
+    wait_for(lambda: second.status == 'done')
+    job = queue.get(first.job_id).to_dict()
+    assert job['result'] == {'value': 1}
+    assert [stage['status'] for stage in job['stages']] == ['done', 'done', 'skipped']
+    assert job['progress'] == 1.0 and job['stage'] is None
+    assert job['started_at'] <= job['finished_at']
+    assert 'result' not in first.to_dict(include_result=False)
+    assert queue.stats()['jobs'] == {'done': 2}
+
+
+def test_failed_jobs_keep_their_error():
+    def fail(job):
+        job.advance('parse')
+        raise ValueError('bad upload')
+
+    queue = JobQueue()
+    job = queue.submit(fail, stages=('parse', 'detect'))
+    wait_for(lambda: job.status == 'failed')
+    payload = job.to_dict()
+    assert payload['error'] == 'bad upload' and 'result' not in payload
+    assert [stage['status'] for stage in payload['stages']] == ['done', 'pending']
+
+
+def test_queue_is_bounded_and_finished_jobs_expire():
+    release = threading.Event()
+    queue = JobQueue(max_workers=1, max_queued=2, ttl_seconds=0)
+    jobs = [queue.submit(staged(release), i) for i in range(2)]
+    with pytest.raises(QueueFullError):
+        queue.submit(staged(release), 3)
+
+    release.set()
+    wait_for(lambda: all(job.status == 'done' for job in jobs))
+    time.sleep(0.01)
+    later = queue.submit(staged(release), 4)
+    assert [queue.get(job.job_id) for job in jobs] == [None, None]
+    assert queue.get(later.job_id) is later
+
+
+def test_job_endpoint_runs_an_analysis(client):
+    with open(SAMPLE_FILES[0], 'rb') as f:
+        data = f.read()
+    response = client.post('/api/jobs', data={'file': (io.BytesIO(data), 'upload.csv')})
+    assert response.status_code == 202
+    url = response.get_json()['status_url']
+    wait_for(lambda: client.get(url).get_json()['status'] in ('done', 'failed'))
+    job = client.get(url).get_json()
+    assert job['status'] == 'done' and job['progress'] == 1.0
+
+    direct = client.post('/api/analyze', data={'file': (io.BytesIO(data), 'upload.csv')})
+    assert job['result']['fraud_rings'] == direct.get_json()['fraud_rings']
+    assert client.get('/api/jobs/unknown').status_code == 404
+
+
+def test_failed_job_reports_the_input_error(client):
+    response = client.post('/api/jobs', data={'file': (io.BytesIO(b''), 'empty.csv')})
+    url = response.get_json()['status_url']
+    wait_for(lambda: client.get(url).get_json()['status'] in ('done', 'failed'))
+    job = client.get(url).get_json()
+    assert job['status'] == 'failed'
+    assert job['error'] == 'The uploaded file is empty'
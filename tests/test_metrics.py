@@ -0,0 +1,22 @@
+import metrics
+from metrics import MetricsRegistry, StageRecorder
+
+
+def test_stages_are_timed_and_counted():
+    registry = MetricsRegistry()
+    recorder = StageRecorder(registry=registry)
+    with recorder.stage('parse') as counts:
+        counts['rows'] = 10
+    stage, = recorder.stages
+    assert stage['stage'] == 'parse' and stage['counts'] == {'rows': 10}
+    assert registry.as_dict()['parse']['count'] == 1
+
+
+def test_memory_usage_without_resource(monkeypatch):
+    # Windows has no resource module; stages still record, with no RSS
+    monkeypatch.setattr(metrics, 'resource', None)
+    assert metrics.memory_usage() == (0, 0)
+    recorder = StageRecorder()
+    with recorder.stage('parse'):
+        pass
+    assert recorder.stages[0]['rss_delta_mb'] == 0
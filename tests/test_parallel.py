@@ -0,0 +1,42 @@
+import numpy as np
+
+import parallel_analysis
+from conftest import csr_arrays
+from cycle_search import find_cycles
+from graph_analyzer import GraphAnalyzer
+
+
+def test_parallel_search_matches_serial(sample_df):
+    serial = GraphAnalyzer(sample_df, backend='csr')
+    parallel = GraphAnalyzer(sample_df, backend='csr')
+    assert parallel.detect_cycles(workers=2) == serial.detect_cycles(workers=1)
+    assert parallel.detect_shell_networks(workers=2) == serial.detect_shell_networks(workers=1)
+
+
+def test_pool_is_reused_across_searches(sample_df):
+    analyzer = GraphAnalyzer(sample_df, backend='csr')
+    analyzer.detect_cycles(workers=2)
+    pool = parallel_analysis.get_pool(2)
+    analyzer.detect_cycles(workers=2)
+    assert parallel_analysis.get_pool(2) is pool
+    assert pool._mp_context.get_start_method() != 'fork'
+    parallel_analysis.shutdown_pools()
+    assert parallel_analysis.get_pool(2) is not pool
+    parallel_analysis.shutdown_pools()
+
+
+def test_capped_parallel_search_matches_serial():
+    # Interleaved components (id % 20), so batches mix their start orders
+    rng = np.random.default_rng(0)
+    u = rng.integers(0, 300, 1500)
+    v = rng.integers(0, 15, 1500) * 20 + u % 20
+    indptr, indices = csr_arrays(u[u != v], v[u != v], 300)
+    everything, _ = find_cycles(indptr, indices)
+    for max_cycles in (1, 5, 40, len(everything) - 1, len(everything), len(everything) + 1):
+        serial = find_cycles(indptr, indices, max_cycles=max_cycles)
+        for workers in (1, 2):
+            cycles, stats = parallel_analysis.parallel_find_cycles(
+                indptr, indices, max_cycles=max_cycles, workers=workers)
+            assert cycles == serial[0]
+            assert stats['truncated'] == serial[1]['truncated']
+    parallel_analysis.shutdown_pools()
@@ -0,0 +1,72 @@
+import io
+import json
+import os
+
+from detection_engine import analysis_cache_key
+from result_cache import ResultCache
+
+RESULTS = {'fraud_rings': [{'ring_id': 'RING_001', 'member_accounts': ['A', 'B', 'C']}],
+           'summary': {'fraud_rings_detected': 1}}
+
+
+def size(results):
+    return len(json.dumps(results, separators=(',', ':')).encode())
+
+
+def test_misses_then_hits_return_independent_copies():
+    cache = ResultCache()
+    assert cache.get('k') is None
+    cache.put('k', RESULTS)
+    hit = cache.get('k')
+    assert hit == RESULTS
+    hit['summary']['fraud_rings_detected'] = 99
+    assert cache.get('k') == RESULTS
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+    assert cache.stats()['bytes'] == size(RESULTS)
+
+
+def test_memory_is_bounded_least_recently_used_first():
+    cache = ResultCache(max_bytes=2 * size(RESULTS))
+    cache.put('a', RESULTS)
+    cache.put('b', RESULTS)
+    cache.get('a')
+    cache.put('c', RESULTS)
+    assert cache.get('b') is None
+    assert cache.get('a') == RESULTS and cache.get('c') == RESULTS
+    assert cache.stats()['entries'] == 2
+
+
+def test_results_persist_on_disk(tmp_path):
+    ResultCache(directory=str(tmp_path)).put('k', RESULTS)
+    # An entry too large for memory is still written to disk
+    ResultCache(max_bytes=1, directory=str(tmp_path)).put('big', RESULTS)
+
+    restarted = ResultCache(directory=str(tmp_path))
+    assert restarted.get('k') == RESULTS
+    assert restarted.get('k') == RESULTS
+    assert restarted.get('big') == RESULTS
+    stats = restarted.stats()
+    assert stats['hits'] == 3 and stats['disk_hits'] == 2
+    assert restarted.get('other') is None
+
+
+def test_disk_entries_are_pruned(tmp_path):
+    cache = ResultCache(max_bytes=0, directory=str(tmp_path), max_disk_entries=2)
+    for key in 'abc':
+        cache.put(key, RESULTS)
+        os.utime(tmp_path / f'{key}.json', ('abc'.index(key) + 1, 'abc'.index(key) + 1))
+    cache.put('d', RESULTS)
+    assert sorted(os.listdir(tmp_path)) == ['c.json', 'd.json']
+
+
+def test_cache_key_covers_content_and_parameters():
+    def key(data=b'rows', **kwargs):
+        stream = io.BytesIO(data)
+        result = analysis_cache_key(stream, **kwargs)
+        assert stream.tell() == 0
+        return result
+
+    assert key() == key()
+    assert len({key(), key(b'other rows'), key(backend='csr'),
+                key(parameters={'threshold': 5}), key(time_range=(0, None))}) == 5
+    assert key(parameters={'threshold': 10}) == key()
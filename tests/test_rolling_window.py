@@ -0,0 +1,20 @@
+import pytest
+
+from detection_engine import MoneyMulingDetector
+from rolling_window import RollingWindowMonitor
+from sessions import INCREMENTAL_UNSUPPORTED_PARAMETERS, _ring_key
+
+
+def test_alerts_match_full_analysis_of_the_window(sample_df):
+    monitor = RollingWindowMonitor(window_hours=24 * 365)
+    for start in range(0, len(sample_df), 10):
+        monitor.ingest(sample_df.iloc[start:start + 10])
+    full = MoneyMulingDetector(sample_df, parameters={'consolidate_rings': 0}).analyze()
+    assert set(monitor.alerts) == {_ring_key(ring['pattern_type'], ring['member_accounts'])
+                                   for ring in full['fraud_rings']}
+
+
+@pytest.mark.parametrize('name', INCREMENTAL_UNSUPPORTED_PARAMETERS)
+def test_unsupported_parameters_are_rejected(name):
+    with pytest.raises(ValueError, match=name):
+        RollingWindowMonitor(parameters={name: 1})
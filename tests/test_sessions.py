@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import detection_engine
+import sessions
+from detection_engine import MoneyMulingDetector
+from sessions import AnalysisSession, _ring_key
+
+
+def transactions(edges, start_row=0, start_hour=0):
+    """DataFrame of (sender, receiver) transfers one hour apart"""
+    base = np.datetime64('2024-01-01T00:00:00', 's')
+    return pd.DataFrame({
+        'transaction_id': [f'T{start_row + i}' for i in range(len(edges))],
+        'sender_id': [u for u, _ in edges],
+        'receiver_id': [v for _, v in edges],
+        'amount': 500.0,
+        'timestamp': [str(base + np.timedelta64((start_hour + i) * 3600, 's'))
+                      for i in range(len(edges))],
+    })
+
+
+def random_edges(rows, accounts, seed):
+    rng = np.random.default_rng(seed)
+    return [(f'ACC_{u}', f'ACC_{v}') for u, v in rng.integers(0, accounts, size=(rows, 2))
+            if u != v]
+
+
+def ring_keys(rings):
+    return {_ring_key(ring['pattern_type'], ring['member_accounts']) for ring in rings}
+
+
+def test_appends_find_every_full_analysis_ring(sample_df):
+    # Rings are never retracted, so the session may also keep earlier ones
+    half = len(sample_df) // 2
+    session = AnalysisSession('s', sample_df.iloc[:half])
+    session.append(sample_df.iloc[half:])
+    full = MoneyMulingDetector(sample_df, parameters={'consolidate_rings': 0}).analyze()
+    assert ring_keys(full['fraud_rings']) <= ring_keys(session.results()['fraud_rings'])
+
+
+def test_cycle_cap_applies_across_the_session(monkeypatch):
+    monkeypatch.setattr(detection_engine, 'MAX_CYCLES', 40)
+    monkeypatch.setattr(sessions, 'MAX_CYCLES', 40)
+    session = AnalysisSession('s', transactions(random_edges(300, 60, seed=1)))
+    for batch in range(4):
+        session.append(transactions(random_edges(300, 60, seed=batch + 2),
+                                    start_row=(batch + 1) * 1000))
+    cycle_rings = [ring for ring in session.detector.fraud_rings
+                   if ring['pattern_type'] == 'cycle']
+    assert session.cycles_found <= 40
+    assert len(cycle_rings) <= 40
+    assert session.summary()['cycle_search_truncated']
+
+
+def test_appends_use_session_parameters():
+    seed = transactions([('X', 'Y')])
+    burst = transactions([(f'S{i}', 'HUB') for i in range(4)], start_row=10, start_hour=1)
+
+    default = AnalysisSession('a', seed)
+    assert not default.append(burst)['new_fraud_rings']
+
+    tuned = AnalysisSession('b', seed, parameters={'threshold': 4})
+    new_rings = tuned.append(burst)['new_fraud_rings']
+    assert [(ring['pattern_type'], ring['member_accounts'][0]) for ring in new_rings] == [
+        ('fan_in', 'HUB')]
+
+
+@pytest.mark.parametrize('name', sessions.INCREMENTAL_UNSUPPORTED_PARAMETERS)
+def test_unsupported_parameters_are_rejected(name):
+    with pytest.raises(ValueError, match=name):
+        AnalysisSession('s', transactions([('X', 'Y')]), parameters={name: 1})
+
+
+def test_appended_rows_are_indexed_before_and_after_the_merge():
+    session = AnalysisSession('s', transactions(random_edges(400, 50, seed=3)))
+    store = session.detector.analyzer.store
+    for batch in range(3):
+        session.append(transactions(random_edges(20, 60, seed=batch + 4),
+                                    start_row=(batch + 1) * 1000))
+    assert store._pending_nodes  # small batches stay out of the indexes
+    nodes = np.arange(store.num_nodes)
+    pending = ([store.node_rows(node) for node in nodes],
+               [store.edge_rows(edge) for edge in range(store.num_edges)],
+               store.nodes_rows(nodes))
+
+    merged = store.arrays()
+    assert not store._pending_nodes
+    for node, rows in zip(nodes, pending[0]):
+        assert rows.tolist() == store.node_rows(node).tolist()
+    for edge, rows in enumerate(pending[1]):
+        assert rows.tolist() == store.edge_rows(edge).tolist()
+    assert [a.tolist() for a in pending[2]] == [a.tolist() for a in store.nodes_rows(nodes)]
+    assert len(merged['node_offsets']) == store.num_nodes + 1
+
+
+def test_appends_only_rescore_accounts_in_new_rings(sample_df):
+    half = len(sample_df) // 2
+    session = AnalysisSession('s', sample_df.iloc[:half])
+    session.append(sample_df.iloc[half:])
+    accounts = session.detector.suspicious_accounts
+    scores = {account: data['suspicion_score'] for account, data in accounts.items()}
+    session.detector._score_accounts()
+    assert scores == {account: data['suspicion_score'] for account, data in accounts.items()}
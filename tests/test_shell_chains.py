@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from conftest import csr_arrays
+from shell_chains import find_shell_chains
+
+
+def path_edges(nodes):
+    return list(zip(nodes[:-1], nodes[1:]))
+
+
+def chains_of(edges, num_nodes, high=(), **kwargs):
+    src, dst = zip(*edges)
+    low = np.ones(num_nodes, dtype=bool)
+    low[list(high)] = False
+    chains, stats = find_shell_chains(*csr_arrays(src, dst, num_nodes), low, **kwargs)
+    return chains, stats
+
+
+def contains(chain, part):
+    return any(chain[i:i + len(part)] == part for i in range(len(chain) - len(part) + 1))
+
+
+def test_a_chain_is_reported_once_without_its_prefixes():
+    chains, stats = chains_of(path_edges(list(range(8))), 8)
+    assert chains == [list(range(8))]
+    assert stats['chains'] == 1 and stats['split'] == 0
+
+
+def test_chains_stop_at_high_activity_accounts():
+    chains, _ = chains_of(path_edges(list(range(9))), 9, high=[3])
+    assert chains == [[0, 1, 2], [4, 5, 6, 7, 8]]
+    # Too short on one side of the hub: nothing is reported there
+    chains, _ = chains_of(path_edges(list(range(9))), 9, high=[2])
+    assert chains == [[3, 4, 5, 6, 7, 8]]
+
+
+def test_long_chains_are_split_into_overlapping_segments():
+    chains, stats = chains_of(path_edges(list(range(20))), 20, max_chain_length=8)
+    assert chains == [list(range(0, 8)), list(range(7, 15)), list(range(14, 20))]
+    assert stats['split']
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_no_chain_is_a_sub_chain_of_another(seed):
+    rng = np.random.default_rng(seed)
+    src, dst = rng.integers(0, 200, size=(2, 260))
+    edges = [(u, v) for u, v in zip(src.tolist(), dst.tolist()) if u != v]
+    high = rng.choice(200, 20, replace=False)
+    chains, _ = chains_of(edges, 200, high=high)
+    assert chains
+    assert len(chains) == len({tuple(chain) for chain in chains})
+    edge_set = set(edges)
+    for chain in chains:
+        assert len(set(chain)) == len(chain) >= 3
+        assert set(path_edges(chain)) <= edge_set
+        assert not set(chain) & set(high.tolist())
+        assert not any(other != chain and contains(other, chain) for other in chains)
@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pytest
+
+from detection_engine import MoneyMulingDetector
+from graph_analyzer import GraphAnalyzer
+from snapshots import SnapshotError, SnapshotStore, load_snapshot, read_meta, save_snapshot
+
+PARAMETERS = {'threshold': 5, 'consolidate_rings': 0}
+
+
+def detection(analyzer):
+    results = MoneyMulingDetector(None, analyzer=analyzer, parameters=PARAMETERS).analyze()
+    return results['fraud_rings'], results['suspicious_accounts']
+
+
+@pytest.mark.parametrize('backend', ['networkx', 'csr'])
+@pytest.mark.parametrize('mmap', [True, False])
+def test_snapshot_round_trip_gives_the_same_results(sample_df, tmp_path, backend, mmap):
+    meta = save_snapshot(GraphAnalyzer(sample_df, backend=backend), str(tmp_path / 'snap'))
+    analyzer, loaded_meta = load_snapshot(str(tmp_path / 'snap'), mmap=mmap)
+    assert loaded_meta == meta
+    assert isinstance(analyzer.store.src, np.memmap) == mmap
+    assert analyzer.graph_size() == GraphAnalyzer(sample_df).graph_size()
+    assert detection(analyzer) == detection(GraphAnalyzer(sample_df, backend=backend))
+
+
+def test_snapshot_after_appends_matches_a_fresh_build(sample_df, tmp_path):
+    # Appended rows not yet merged into the store's indexes are written too
+    half = len(sample_df) // 2
+    analyzer = GraphAnalyzer(sample_df.iloc[:half])
+    analyzer.append_transactions(sample_df.iloc[half:half + 5])
+    analyzer.append_transactions(sample_df.iloc[half + 5:])
+    save_snapshot(analyzer, str(tmp_path / 'snap'))
+    loaded, _ = load_snapshot(str(tmp_path / 'snap'))
+    assert detection(loaded) == detection(GraphAnalyzer(sample_df, backend='csr'))
+
+
+def test_incompatible_snapshots_are_rejected(sample_df, tmp_path):
+    path = tmp_path / 'snap'
+    save_snapshot(GraphAnalyzer(sample_df), str(path))
+    meta = json.loads((path / 'meta.json').read_text())
+    (path / 'meta.json').write_text(json.dumps(dict(meta, format=0)))
+    with pytest.raises(SnapshotError):
+        read_meta(str(path))
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(tmp_path / 'missing'))
+
+
+@pytest.mark.parametrize('snapshot_id', ['../secrets', 'ABCDEF', '', None, '0' * 31,
+                                         '0' * 32 + '/..'])
+def test_store_rejects_invalid_ids(tmp_path, snapshot_id):
+    store = SnapshotStore(str(tmp_path))
+    for method in (store.open, store.info, store.delete):
+        with pytest.raises(SnapshotError):
+            method(snapshot_id)
+
+
+def test_store_lifecycle(sample_df, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    meta = store.create(GraphAnalyzer(sample_df))
+    snapshot_id = meta['snapshot_id']
+    assert [info['snapshot_id'] for info in store.list()] == [snapshot_id]
+    assert store.info(snapshot_id) == meta
+    analyzer, _ = store.open(snapshot_id)
+    assert detection(analyzer) == detection(GraphAnalyzer(sample_df))
+
+    assert store.delete(snapshot_id)
+    assert not store.delete(snapshot_id)
+    assert store.list() == []
+    with pytest.raises(KeyError):
+        store.open(snapshot_id)
+
+
+def test_snapshot_endpoints_reject_unknown_ids(client):
+    assert client.get('/api/snapshots/not-an-id').status_code == 404
+    assert client.post('/api/snapshots/not-an-id/analyze').status_code == 404
+    assert client.delete('/api/snapshots/' + '0' * 32).status_code == 404